@@ -12,7 +12,10 @@ load_dotenv()
 backend_root = Path(__file__).parent.parent
 sys.path.append(str(backend_root))
 
-from api.routers import ocr, speech, math_solver, sketch, pdf_tools, auth, history
+from api.routers import ocr, speech, math_solver, sketch, pdf_tools, auth, history, system, jobs
+from services.executor import shutdown_executors
+from modules.redaction import shutdown_pool as shutdown_redaction_pool
+from modules.gemini_client import get_transport
 
 app = FastAPI(
     title="IntelliScan API",
@@ -60,6 +63,8 @@ app.include_router(speech.router, prefix="/api/speech", tags=["Speech"])
 app.include_router(math_solver.router, prefix="/api/math", tags=["Math"])
 app.include_router(sketch.router, prefix="/api/sketch", tags=["Sketch"])
 app.include_router(pdf_tools.router, prefix="/api/pdf", tags=["PDF"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(system.router, prefix="/api/system", tags=["System"])
 
 @app.on_event("startup")
 async def startup_event():
@@ -67,3 +72,8 @@ async def startup_event():
     # Models will be lazily loaded when first requested.
     print("Startup complete. Models will be loaded lazily on first request.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executors()
+    shutdown_redaction_pool()
+    get_transport().close()
@@ -0,0 +1,141 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
+from fastapi.responses import JSONResponse, FileResponse
+from typing import List
+import json
+import os
+import shutil
+import uuid
+
+from core.config import JOBS_DIR, TASK_PRIORITIES, TASK_DEFAULT_TIMEOUT, PDF_OCR_MIN_DPI, PDF_OCR_MAX_DPI
+from services.jobs import JOB_OPERATIONS, job_priority, job_cost
+from services.task_queue import get_task_queue_service, TaskStatus
+from services.reader_registry import normalize_languages
+from modules.database import save_task
+from api.routers.history import get_current_user
+
+router = APIRouter()
+
+def _remove_job_dir(task):
+    """Delete a job's uploads and file results once the task has expired"""
+    if task.task_type in JOB_OPERATIONS:
+        shutil.rmtree(JOBS_DIR / task.task_id, ignore_errors=True)
+
+get_task_queue_service().add_expiry_listener(_remove_job_dir)
+
+def _get_owned_task(job_id: str, userId: str):
+    """Look up a job, hiding jobs that belong to another user"""
+    task = get_task_queue_service().get_task(job_id)
+    if task is None or (task.user_id and task.user_id != userId):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return task
+
+def _job_status(task) -> dict:
+    status = {
+        "job_id": task.task_id,
+        "operation": task.task_type,
+        "priority": task.priority,
+        "status": task.status.value,
+        "created_at": task.created_at,
+        "started_at": task.started_at,
+        "finished_at": task.finished_at,
+    }
+    if task.status in (TaskStatus.FAILED, TaskStatus.CANCELLED):
+        status["error"] = task.error
+    if task.status == TaskStatus.COMPLETED:
+        status["result_url"] = f"/api/jobs/{task.task_id}/result"
+    return status
+
+@router.get("/operations")
+async def list_operations():
+    return {"operations": sorted(JOB_OPERATIONS)}
+
+@router.post("/", status_code=202)
+async def submit_job(
+    request: Request,
+    operation: str = Form(...),
+    files: List[UploadFile] = File(None),
+    options: str = Form("{}"),
+    priority: str = Form(None),
+    timeout: float = Form(None),
+    userId: str = Depends(get_current_user)
+):
+    """Queue an OCR/PDF/speech operation and return immediately with a job id"""
+    func = JOB_OPERATIONS.get(operation)
+    if func is None:
+        raise HTTPException(status_code=400, detail=f"Unknown operation '{operation}'")
+    priority = priority or job_priority(operation)
+    if priority not in TASK_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {list(TASK_PRIORITIES)}")
+    if timeout is not None and timeout <= 0:
+        raise HTTPException(status_code=400, detail="timeout must be a positive number of seconds")
+    try:
+        job_options = json.loads(options or "{}")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="options must be a JSON object")
+    if not isinstance(job_options, dict):
+        raise HTTPException(status_code=400, detail="options must be a JSON object")
+    if "dpi" in job_options:
+        # Same bounds as /api/ocr/extract-pdf: the raster size of one page
+        dpi = job_options["dpi"]
+        if isinstance(dpi, bool) or not isinstance(dpi, int) or not PDF_OCR_MIN_DPI <= dpi <= PDF_OCR_MAX_DPI:
+            raise HTTPException(status_code=400,
+                                detail=f"options.dpi must be an integer between {PDF_OCR_MIN_DPI} and {PDF_OCR_MAX_DPI}")
+    languages = job_options.get("languages")
+    if languages:
+        # Reject unsupported languages now rather than failing the job in a worker
+        if not isinstance(languages, (str, list)) or not all(isinstance(code, str) for code in languages):
+            raise HTTPException(status_code=400, detail="options.languages must be a string or a list of strings")
+        try:
+            job_options["languages"] = list(normalize_languages(languages))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    uploads = [(f.filename, await f.read()) for f in (files or [])]
+    
+    job_id = uuid.uuid4().hex
+    job_dir = str(JOBS_DIR / job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    get_task_queue_service().add_task(
+        job_id, func, job_dir, uploads, job_options,
+        user_id=userId, client_id=request.client.host if request.client else None, task_type=operation,
+        priority=priority, cost=job_cost(operation, uploads),
+        timeout=timeout or TASK_DEFAULT_TIMEOUT
+    )
+    
+    if userId:
+        await save_task(userId, f"job_{operation}", ", ".join(f for f, _ in uploads) or operation, f"Queued: {job_id}")
+    
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "status": TaskStatus.PENDING.value,
+        "status_url": f"/api/jobs/{job_id}",
+    })
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, userId: str = Depends(get_current_user)):
+    return _job_status(_get_owned_task(job_id, userId))
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str, userId: str = Depends(get_current_user)):
+    task = _get_owned_task(job_id, userId)
+    if task.status == TaskStatus.FAILED:
+        raise HTTPException(status_code=500, detail=task.error)
+    if task.status == TaskStatus.CANCELLED:
+        raise HTTPException(status_code=410, detail=f"Job was cancelled: {task.error}")
+    if task.status != TaskStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {task.status.value}")
+    
+    result = get_task_queue_service().get_task_result(job_id)
+    if isinstance(result, dict) and "file" in result:
+        if not os.path.exists(result["file"]):
+            raise HTTPException(status_code=410, detail="Job output is no longer available")
+        return FileResponse(result["file"], media_type=result["media_type"], filename=result["filename"])
+    return result
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, userId: str = Depends(get_current_user)):
+    """Cancel a queued job, or ask a running one to stop at its next checkpoint"""
+    task = _get_owned_task(job_id, userId)
+    if not get_task_queue_service().cancel_task(job_id, "Cancelled by user"):
+        raise HTTPException(status_code=409, detail=f"Job is already {task.status.value}")
+    return _job_status(task)
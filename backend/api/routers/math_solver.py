@@ -1,22 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
 from PIL import Image
 import io
 from modules.math_ocr import MathOCRModule
 from modules.database import save_task
 from api.routers.history import get_current_user
+from services.executor import get_executor, ExecutorSaturated
+from services.cancellation import cancel_on_disconnect, TaskCancelled, DeadlineExceeded
+from core.config import REQUEST_TIMEOUT
 
 router = APIRouter()
 math_module = MathOCRModule()
 
-from modules.gemini_client import GeminiClient
-gemini_client = GeminiClient()
+from modules.gemini_client import get_gemini_client
+gemini_client = get_gemini_client()
 
 @router.post("/solve")
-async def solve_math(file: UploadFile = File(...), userId: str = Depends(get_current_user)):
+async def solve_math(request: Request, file: UploadFile = File(...), userId: str = Depends(get_current_user)):
     try:
         content = await file.read()
         image = Image.open(io.BytesIO(content))
-        latex_result = math_module.perform_math_ocr(image)
+        with cancel_on_disconnect(request, REQUEST_TIMEOUT):
+            latex_result = await get_executor("math").run(math_module.perform_math_ocr, image)
         
         # Save to history if logged in
         if userId:
@@ -27,5 +31,12 @@ async def solve_math(file: UploadFile = File(...), userId: str = Depends(get_cur
             # latex_result now contains the solution if AI enhancement is enabled in MathOCRModule
             "solution": "Solution is integrated in the LaTeX/Output"
         }
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except TaskCancelled as e:
+        # The client is gone and never reads this; answer with a standard status anyway
+        raise HTTPException(status_code=408, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
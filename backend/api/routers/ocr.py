@@ -1,49 +1,191 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from PIL import Image
 import io
 import shutil
 import os
 
-from modules.ocr import OCRModule
+from modules.ocr import OCRModule, OUTPUT_FORMATS
+from modules.pdf_tools import PDFTools
 from modules.database import save_task
 from api.routers.history import get_current_user
+from services.executor import get_executor, ExecutorSaturated
+from services.result_cache import get_ocr_cache
+from services.reader_registry import normalize_languages
+from services.cancellation import (
+    cancel_on_disconnect, use_token, CancellationToken, TaskCancelled, DeadlineExceeded,
+)
+from core.config import (
+    REQUEST_TIMEOUT, PDF_OCR_MIN_DPI, PDF_OCR_MAX_DPI, PDF_OCR_RETRY_DELAY, PDF_OCR_PAGE_TIMEOUT,
+)
+import asyncio
+import json
 
 router = APIRouter()
 ocr_module = OCRModule()
+pdf_tools = PDFTools()
 
-from modules.gemini_client import GeminiClient
-gemini_client = GeminiClient()
+from modules.gemini_client import get_gemini_client
+gemini_client = get_gemini_client()
+
+def _parse_languages(languages: str):
+    """Validated language set from a form field, or None to detect per page"""
+    if not languages:
+        return None
+    try:
+        return normalize_languages(languages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _parse_format(output_format: str) -> str:
+    """Validated response format from a form field"""
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(OUTPUT_FORMATS)}")
+    return output_format
 
 @router.post("/extract")
 async def extract_text(
+    request: Request,
     file: UploadFile = File(...), 
     mode: str = Form("standard"),
     use_ai_correction: bool = Form(True),
+    languages: str = Form(None),
+    format: str = Form("text"),
     userId: str = Depends(get_current_user)
 ):
+    """
+    OCR one image
+    
+    `languages` is a comma-separated subset of SUPPORTED_LANGUAGES (e.g. "en"
+    or "en,hi"); without it the page's script picks the reader.
+    
+    `format=structured` adds a "layout" with the columnar line and word boxes
+    and confidences (modules.ocr_layout.encode_layout) to the response.
+    """
+    languages = _parse_languages(languages)
+    output_format = _parse_format(format)
     try:
         # Read image
         contents = await file.read()
         image = Image.open(io.BytesIO(contents))
         
-        text = ""
-        if mode == "high_accuracy":
-            text = ocr_module.perform_high_accuracy_ocr(image)
-        else:
-            text = ocr_module.perform_ocr(image)
-            
-        if use_ai_correction:
-            # Note: ocr_module already calls Gemini in the refined version, 
-            # but we can call it again or ensure it's handled.
-            # In the previous steps I integrated Gemini into ocr_module directly.
-            pass
+        # Repeat uploads are answered from the result cache without touching the OCR pool
+        cache_key = await asyncio.to_thread(
+            ocr_module.cache_key, image, mode, use_ai_correction, languages, output_format
+        )
+        result = get_ocr_cache().get(cache_key)
+        cached = result is not None
+        if not cached:
+            with cancel_on_disconnect(request, REQUEST_TIMEOUT):
+                result = await get_executor("ocr").run(
+                    ocr_module.recognize, image, mode, use_ai_correction, cache_key, languages, output_format
+                )
+        text = result if output_format == "text" else result["text"]
             
         # Save to history if logged in
         if userId:
             await save_task(userId, "ocr", file.filename, text)
             
-        return {"text": text, "mode": mode}
+        response = {"text": text, "mode": mode, "cached": cached}
+        if output_format == "structured":
+            response["layout"] = result["layout"]
+        return response
         
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except TaskCancelled as e:
+        # The client is gone and never reads this; answer with a standard status anyway
+        raise HTTPException(status_code=408, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _recognize_pdf_page(pdf_bytes: bytes, page_index: int, mode: str, use_ai_correction: bool, dpi: int,
+                        languages=None) -> str:
+    """Rasterize one PDF page in memory and OCR it (runs on the pdf_ocr pool)"""
+    image = pdf_tools.render_page(pdf_bytes, page_index, dpi=dpi)
+    return ocr_module.recognize(image, mode, use_ai_correction, languages=languages)
+
+@router.post("/extract-pdf")
+async def extract_pdf_text(
+    file: UploadFile = File(...),
+    mode: str = Form("standard"),
+    use_ai_correction: bool = Form(True),
+    dpi: int = Form(150),
+    languages: str = Form(None),
+    userId: str = Depends(get_current_user)
+):
+    """
+    OCR every page of a scanned PDF, streaming one NDJSON record per page as it finishes.
+    
+    Records are {"page": n, "text": ...} (or {"page": n, "error": ...}) in completion
+    order, followed by a final {"done": true, "pages": count} record.
+    `dpi` must be within PDF_OCR_MIN_DPI..PDF_OCR_MAX_DPI. Each page has its own
+    PDF_OCR_PAGE_TIMEOUT deadline, so long documents are not cut off part-way.
+    """
+    languages = _parse_languages(languages)
+    if not PDF_OCR_MIN_DPI <= dpi <= PDF_OCR_MAX_DPI:
+        raise HTTPException(status_code=400, detail=f"dpi must be between {PDF_OCR_MIN_DPI} and {PDF_OCR_MAX_DPI}")
+    contents = await file.read()
+    try:
+        page_count = await asyncio.to_thread(pdf_tools.page_count, contents)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid PDF: {e}")
+    
+    executor = get_executor("pdf_ocr")
+    if executor.is_saturated():
+        raise HTTPException(status_code=503, detail=f"The {executor.name} service is busy, please retry shortly", headers={"Retry-After": "5"})
+    
+    # Cancelled when the stream ends early (client disconnect); pages carry their own deadlines
+    token = CancellationToken()
+    
+    async def ocr_page(page_index: int) -> dict:
+        page_token = CancellationToken(PDF_OCR_PAGE_TIMEOUT)
+        token.add_callback(lambda: page_token.cancel(token.reason))
+        try:
+            with use_token(page_token):
+                while True:
+                    try:
+                        text = await executor.run(
+                            _recognize_pdf_page, contents, page_index, mode, use_ai_correction, dpi, languages
+                        )
+                        break
+                    except ExecutorSaturated:
+                        # Other uploads hold the pool: wait for a slot rather than fail the page
+                        page_token.check()
+                        await asyncio.sleep(PDF_OCR_RETRY_DELAY)
+            return {"page": page_index + 1, "text": text}
+        except Exception as e:
+            return {"page": page_index + 1, "error": str(e)}
+    
+    async def stream_pages():
+        texts = {}
+        pending = set()
+        next_page = 0
+        try:
+            # Keep at most one page per pool worker in flight for this document
+            while next_page < page_count or pending:
+                while next_page < page_count and len(pending) < executor.max_workers:
+                    pending.add(asyncio.ensure_future(ocr_page(next_page)))
+                    next_page += 1
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    texts[record["page"]] = record.get("text", "")
+                    yield json.dumps(record) + "\n"
+        finally:
+            # Client went away: stop scheduling the remaining pages and abandon the running ones
+            if pending:
+                token.cancel("Client disconnected")
+            for future in pending:
+                future.cancel()
+        
+        yield json.dumps({"done": True, "pages": page_count}) + "\n"
+        
+        # Save to history if logged in
+        if userId:
+            full_text = "\n\n".join(texts[page] for page in sorted(texts))
+            await save_task(userId, "ocr_pdf", file.filename, full_text)
+    
+    return StreamingResponse(stream_pages(), media_type="application/x-ndjson")
@@ -5,7 +5,8 @@ from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Background
 from fastapi.responses import FileResponse
 from typing import List
 from modules.pdf_tools import PDFTools
-from modules.gemini_client import GeminiClient
+from modules.gemini_client import get_gemini_client
+from modules.text_chunking import parse_json_list
 from modules.ilovepdf_service import ILovePDFService
 from modules.database import save_task
 from api.routers.history import get_current_user
@@ -15,7 +16,7 @@ from fastapi import Depends
 
 router = APIRouter()
 pdf_tools = PDFTools()
-gemini_client = GeminiClient()
+gemini_client = get_gemini_client()
 ilovepdf_service = ILovePDFService()
 
 def cleanup_file(path: str):
@@ -224,26 +225,15 @@ async def redact_pdf(
         # 1. Extract text
         text_content = pdf_tools.extract_text(input_path)
         
-        # 2. Identify sensitive info with Gemini
+        # 2. Identify sensitive info with Gemini (whole document, chunked)
         # It returns a JSON string like '["John", "email@example.com"]'
         sensitive_json = gemini_client.identify_sensitive_data(text_content)
-        
-        # Clean up JSON string if it has markdown code blocks
-        if "```json" in sensitive_json:
-            sensitive_json = sensitive_json.split("```json")[1].split("```")[0].strip()
-        elif "```" in sensitive_json:
-            sensitive_json = sensitive_json.split("```")[1].split("```")[0].strip()
-            
-        try:
-            redactions = json.loads(sensitive_json)
-        except:
-            redactions = [] # Fallback
-            print(f"Failed to parse redaction JSON: {sensitive_json}")
+        redactions = parse_json_list(sensitive_json)
             
         output_path = os.path.join(temp_dir, f"redacted_{file.filename}")
         
         # 3. Apply redactions
-        pdf_tools.redact_text(input_path, redactions, output_path)
+        hit_counts = pdf_tools.redact_terms(input_path, redactions, output_path)
         
         # Return file (UI can display success message)
         # We lose the 'counts' metadata here unless we send it as a header or multipart response. 
@@ -254,7 +244,10 @@ async def redact_pdf(
             output_path, 
             media_type="application/pdf", 
             filename=f"redacted_{file.filename}",
-            headers={"X-Redaction-Count": str(len(redactions))},
+            headers={
+                "X-Redaction-Count": str(len(redactions)),
+                "X-Redaction-Hits": str(sum(hit_counts.values())),
+            },
             background=background_tasks.add_task(shutil.rmtree, temp_dir)
         )
         
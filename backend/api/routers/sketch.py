@@ -1,17 +1,56 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Response
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import shutil
 import os
-import uuid
-from pathlib import Path
+import tempfile
 from modules.sketch import SketchModule
+from modules.sketch_vectorizer import resolve_quantization
 from modules.database import save_task
 from api.routers.history import get_current_user
+from services.executor import get_executor, ExecutorSaturated
+from services.cancellation import cancel_on_disconnect, TaskCancelled, DeadlineExceeded
+from core.config import REQUEST_TIMEOUT
 
 router = APIRouter()
 sketch_module = SketchModule()
 
+SVG_CHUNK_SIZE = 64 * 1024
+
+def _iter_file(path: str, chunk_size: int = SVG_CHUNK_SIZE):
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
 @router.post("/vectorize")
-async def vectorize_sketch(file: UploadFile = File(...), userId: str = Depends(get_current_user)):
+async def vectorize_sketch(
+    request: Request,
+    file: UploadFile = File(...),
+    quality: str = Form(None),
+    k: int = Form(None),
+    attempts: int = Form(None),
+    sample_size: int = Form(None),
+    output: str = Form("svg"),
+    userId: str = Depends(get_current_user)
+):
+    """
+    Vectorize an uploaded sketch
+    
+    The SVG is written to a temporary file by the sketch pool one colour layer
+    at a time and streamed back in chunks. output="svgz" returns a gzip-compressed
+    .svgz download; otherwise the SVG is gzip-encoded in transit when the client
+    sends Accept-Encoding: gzip.
+    """
+    if output not in ("svg", "svgz"):
+        raise HTTPException(status_code=400, detail="output must be 'svg' or 'svgz'")
+    try:
+        resolve_quantization(quality, k=k, attempts=attempts, sample_size=sample_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    gzip_encoded = output == "svg" and "gzip" in request.headers.get("accept-encoding", "")
+    compress = output == "svgz" or gzip_encoded
+    temp_dir = tempfile.mkdtemp()
     try:
         # Read file to bytes
         content = await file.read()
@@ -21,17 +60,42 @@ async def vectorize_sketch(file: UploadFile = File(...), userId: str = Depends(g
         import io
         image = Image.open(io.BytesIO(content))
         
-        # Convert to SVG (returns string)
-        svg_content = sketch_module.image_to_svg(image)
+        # Convert to SVG on disk; only the file path and a preview come back from the pool
+        output_path = os.path.join(temp_dir, "sketch.svgz" if compress else "sketch.svg")
+        with cancel_on_disconnect(request, REQUEST_TIMEOUT):
+            result = await get_executor("sketch").run(
+                sketch_module.write_svg, image, output_path, compress=compress,
+                quality=quality, k=k, attempts=attempts, sample_size=sample_size
+            )
         
-        # Save to history
+        # Save to history: a complete (if coarser) SVG rather than a truncated one
         if userId:
-            # Save a snippet or just the fact that it was vectorized
-            await save_task(userId, "sketch", file.filename, svg_content[:5000]) # Snippet for history
-            
-        # Return direct SVG content
-        return Response(content=svg_content, media_type="image/svg+xml")
+            preview = result["preview"] or f"<!-- SVG of {result['bytes']} bytes is too large for history -->"
+            await save_task(userId, "sketch", file.filename, preview)
+        
+        headers = {"Vary": "Accept-Encoding"}
+        if output == "svgz":
+            headers["Content-Disposition"] = 'attachment; filename="sketch.svgz"'
+        elif gzip_encoded:
+            headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(
+            _iter_file(output_path),
+            media_type="image/svg+xml",
+            headers=headers,
+            background=BackgroundTask(shutil.rmtree, temp_dir, ignore_errors=True),
+        )
             
+    except ExecutorSaturated as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except DeadlineExceeded as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise HTTPException(status_code=504, detail=str(e))
+    except TaskCancelled as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        # The client is gone and never reads this; answer with a standard status anyway
+        raise HTTPException(status_code=408, detail=str(e))
     except Exception as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
         print(f"Sketch Error: {e}") # Debug log
         raise HTTPException(status_code=500, detail=f"Vectorization failed: {str(e)}")
@@ -10,8 +10,8 @@ from api.routers.history import get_current_user
 router = APIRouter()
 toolkit = LanguageToolkit()
 
-from modules.gemini_client import GeminiClient
-gemini_client = GeminiClient()
+from modules.gemini_client import get_gemini_client
+gemini_client = get_gemini_client()
 
 @router.post("/transcribe")
 async def transcribe_audio(file: UploadFile = File(...), userId: str = Depends(get_current_user)):
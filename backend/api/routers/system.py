@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+from services.executor import get_executor_stats
+from services.result_cache import get_ocr_cache
+from services.reader_registry import get_reader_registry
+from modules.gemini_client import get_gemini_client
+from services.task_queue import get_task_queue_service
+
+router = APIRouter()
+
+@router.get("/executors")
+async def executor_stats():
+    """Worker pool utilisation and queue depth per executor"""
+    return get_executor_stats()
+
+@router.get("/ocr-cache")
+async def ocr_cache_stats():
+    """OCR result cache size and hit/miss counters"""
+    return get_ocr_cache().stats()
+
+@router.get("/ocr-readers")
+async def ocr_reader_stats():
+    """Loaded EasyOCR readers per language set and their memory budget"""
+    return get_reader_registry().stats()
+
+@router.get("/llm-cache")
+async def llm_cache_stats():
+    """Gemini response cache hit rates per method"""
+    cache = get_gemini_client().cache
+    if cache is None:
+        return {"backend": None}
+    return cache.stats()
+
+@router.get("/tasks")
+async def task_queue_stats():
+    """Background task queue depth and retained result memory"""
+    return get_task_queue_service().stats()
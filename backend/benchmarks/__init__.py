@@ -0,0 +1,3 @@
+"""
+Benchmarks package for Smart Handwritten Data Recognition
+"""
@@ -0,0 +1,131 @@
+"""
+Benchmark: layout reconstruction, moving-average grouping vs modules.ocr_layout
+
+Builds synthetic pages of word boxes (uniquely named, so every text line can
+be traced back to its boxes) in one or more columns, optionally skewed, and
+reports the wall time of the previous OCRModule.reconstruct_layout and of
+modules.ocr_layout.analyze_layout, with the share of true lines each one
+reproduces exactly (same words, same order).
+
+Usage:
+    python benchmarks/bench_ocr_layout.py --boxes 5000 --columns 2 --slope 0.02
+"""
+import argparse
+import random
+
+from common import time_call, print_table
+
+from modules.ocr_layout import analyze_layout
+
+def synthetic_boxes(boxes: int, columns: int = 1, slope: float = 0.0, words_per_line: int = 8,
+                    seed: int = 0):
+    """
+    Word boxes laid out in `columns` columns of lines, rotated by `slope` (dy/dx)
+
+    Returns:
+        (list of (bbox, text, prob), list of true lines as lists of word texts, in reading order)
+    """
+    rng = random.Random(seed)
+    word_width, word_height, space, line_pitch, gutter = 90, 24, 24, 40, 120
+    column_width = words_per_line * (word_width + space) - space
+    rows = -(-boxes // (columns * words_per_line))
+    results, lines = [], []
+    for column in range(columns):
+        left = 40 + column * (column_width + gutter)
+        for row in range(rows):
+            words = []
+            for i in range(words_per_line):
+                if len(results) >= boxes:
+                    break
+                x0 = left + i * (word_width + space) + rng.uniform(-2, 2)
+                y0 = 40 + row * line_pitch + slope * x0 + rng.uniform(-3, 3)
+                x1, y1 = x0 + word_width + rng.uniform(-20, 4), y0 + word_height + rng.uniform(-4, 4)
+                dy = slope * (x1 - x0)
+                text = f"b{len(results)}"
+                results.append(([[x0, y0], [x1, y0 + dy], [x1, y1 + dy], [x0, y1]], text, rng.uniform(0.5, 1.0)))
+                words.append(text)
+            if words:
+                lines.append(words)
+    rng.shuffle(results)
+    return results, lines
+
+def legacy_reconstruct_layout(results) -> str:
+    """OCRModule.reconstruct_layout as it was"""
+    def get_cy(bbox):
+        return sum([p[1] for p in bbox]) / 4
+
+    def get_cx(bbox):
+        return sum([p[0] for p in bbox]) / 4
+
+    sorted_results = sorted(results, key=lambda x: get_cy(x[0]))
+    lines = []
+    current_line = []
+    current_y = get_cy(sorted_results[0][0])
+    heights = [abs(r[0][2][1] - r[0][0][1]) for r in sorted_results]
+    avg_height = sum(heights) / len(heights) if heights else 20
+    line_threshold = avg_height * 0.5
+
+    for res in sorted_results:
+        cy = get_cy(res[0])
+        if abs(cy - current_y) > line_threshold:
+            lines.append(sorted(current_line, key=lambda x: get_cx(x[0])))
+            current_line = [res]
+            current_y = cy
+        else:
+            current_line.append(res)
+            n = len(current_line)
+            current_y = (current_y * (n - 1) + cy) / n
+    if current_line:
+        lines.append(sorted(current_line, key=lambda x: get_cx(x[0])))
+
+    final_text = []
+    for line in lines:
+        if not line:
+            continue
+        line_text = ""
+        last_x = line[0][0][0][0]
+        for bbox, text, _ in line:
+            dist = bbox[0][0] - last_x
+            if dist > avg_height:
+                line_text += " \t "
+            elif dist > 10 and line_text:
+                line_text += " "
+            line_text += text
+            last_x = bbox[1][0]
+        final_text.append(line_text)
+    return "\n".join(final_text)
+
+def line_accuracy(text: str, lines) -> float:
+    """Share of true lines that appear as a text line with the same words in the same order"""
+    found = {tuple(line.split()) for line in text.split("\n")}
+    return sum(tuple(words) in found for words in lines) / len(lines)
+
+def order_accuracy(text: str, lines) -> float:
+    """Share of recovered true lines that directly follow their true predecessor"""
+    position = {tuple(line.split()): i for i, line in enumerate(text.split("\n"))}
+    pairs = [(tuple(a), tuple(b)) for a, b in zip(lines, lines[1:])]
+    hits = [position[b] == position[a] + 1 for a, b in pairs if a in position and b in position]
+    return sum(hits) / len(hits) if hits else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=2)
+    parser.add_argument("--slope", type=float, default=0.02, help="Page skew as dy/dx")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results, lines = synthetic_boxes(args.boxes, args.columns, args.slope)
+    rows = []
+    for name, run in [("legacy moving average", lambda: legacy_reconstruct_layout(results)),
+                      ("ocr_layout", lambda: analyze_layout(results)["text"])]:
+        seconds = time_call(run, args.repeat)
+        text = run()
+        rows.append([name, f"{seconds * 1000:.1f}", f"{line_accuracy(text, lines):.1%}",
+                     f"{order_accuracy(text, lines):.1%}"])
+
+    print(f"{len(results)} boxes, {len(lines)} lines in {args.columns} column(s), skew {args.slope}")
+    print_table(["layout", "ms", "lines exact", "reading order"], rows)
+
+if __name__ == "__main__":
+    main()
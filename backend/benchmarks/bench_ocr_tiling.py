@@ -0,0 +1,76 @@
+"""
+Benchmark: peak RSS of full-page vs tiled OCR preprocessing on a very large scan
+
+Renders a synthetic A3 page at 600 dpi (7016x9921) in a fresh process per
+mode and reports the process's peak resident set size before and after
+preprocessing it whole (as OCRModule.preprocess_image does) or tile by tile
+(modules.ocr_tiling). With --detect, EasyOCR detection runs too, through
+OCRModule.detect_text, and the number of merged boxes is reported.
+
+Usage:
+    python benchmarks/bench_ocr_tiling.py --width 7016 --height 9921 [--detect]
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+
+import cv2
+import numpy as np
+
+from common import synthetic_page, print_table
+
+from modules.ocr_tiling import iter_preprocessed_tiles
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def full_page_preprocess(image) -> np.ndarray:
+    """The whole-page preprocessing of OCRModule.preprocess_image"""
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    img_array = np.array(image)
+    gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, binary = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+def run_mode(mode: str, width: int, height: int, detect: bool):
+    """Child process: render the page, then preprocess (and detect) it once"""
+    line_height = 120
+    image, _ = synthetic_page(lines=height // line_height - 2, width=width, line_height=line_height)
+    before = peak_rss_mib()
+    start = time.perf_counter()
+    boxes = "-"
+    if detect:
+        from modules.ocr import OCRModule
+        boxes = len(OCRModule().detect_text(image, tiled=mode == "tiled"))
+    elif mode == "tiled":
+        for _ in iter_preprocessed_tiles(image):
+            pass
+    else:
+        full_page_preprocess(image)
+    return before, peak_rss_mib(), time.perf_counter() - start, boxes, image.size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=7016)
+    parser.add_argument("--height", type=int, default=9921)
+    parser.add_argument("--detect", action="store_true", help="Also run EasyOCR detection (needs easyocr)")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    size = None
+    for mode in ("full", "tiled"):
+        # A fresh process per mode, so each peak RSS is its own
+        with context.Pool(1) as pool:
+            before, after, elapsed, boxes, size = pool.apply(run_mode, (mode, args.width, args.height, args.detect))
+        rows.append([mode, f"{elapsed:.2f}", f"{before:.0f}", f"{after:.0f}", f"{after - before:.0f}", boxes])
+
+    print(f"{size[0]}x{size[1]} page, {'preprocessing + detection' if args.detect else 'preprocessing only'}")
+    print_table(["mode", "seconds", "RSS after render MiB", "peak RSS MiB", "added MiB", "boxes"], rows)
+
+if __name__ == "__main__":
+    main()
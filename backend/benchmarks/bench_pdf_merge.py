@@ -0,0 +1,100 @@
+"""
+Benchmark: streaming PDF merge vs the previous open-everything merge
+
+Generates N input PDFs of P pages each, then merges them with both
+implementations, each in a fresh subprocess so peak RSS is measured per mode.
+
+Usage:
+    python benchmarks/bench_pdf_merge.py --inputs 100 --pages 50
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import print_table
+
+import fitz  # PyMuPDF
+import numpy as np
+
+def legacy_merge(pdf_paths, output_path):
+    """The merge as it was: every input stays open until the end"""
+    merged_pdf = fitz.open()
+    for path in pdf_paths:
+        doc = fitz.open(path)
+        merged_pdf.insert_pdf(doc)
+    merged_pdf.save(output_path)
+    return output_path
+
+def generate_inputs(directory, inputs, pages):
+    """Write `inputs` PDFs with `pages` pages of text and one scanned-looking image each"""
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(inputs):
+        doc = fitz.open()
+        noise = rng.integers(0, 255, size=(300, 400, 3), dtype=np.uint8)
+        pix = fitz.Pixmap(fitz.csRGB, 400, 300, noise.tobytes(), False)
+        image_xref = 0
+        for p in range(pages):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Document {i} page {p} " + "lorem ipsum " * 8)
+            if image_xref:
+                page.insert_image(fitz.Rect(72, 100, 472, 400), xref=image_xref)
+            else:
+                image_xref = page.insert_image(fitz.Rect(72, 100, 472, 400), pixmap=pix)
+        path = os.path.join(directory, f"input_{i:03d}.pdf")
+        doc.save(path, deflate=True)
+        doc.close()
+        paths.append(path)
+    return paths
+
+def run_worker(mode, directory, output_path):
+    """Merge in this process and print time and peak RSS as JSON"""
+    from modules.pdf_tools import PDFTools
+    paths = sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.startswith("input_"))
+    start = time.perf_counter()
+    if mode == "legacy":
+        legacy_merge(paths, output_path)
+    else:
+        PDFTools().merge_pdfs(paths, output_path)
+    elapsed = time.perf_counter() - start
+    with fitz.open(output_path) as doc:
+        page_count = len(doc)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(json.dumps({"time": elapsed, "peak_mb": peak_kb / 1024, "pages": page_count,
+                      "size_mb": os.path.getsize(output_path) / 1e6}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--inputs", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "DIR", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        run_worker(*args.worker)
+        return
+    
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Generating {args.inputs} inputs x {args.pages} pages...")
+        generate_inputs(directory, args.inputs, args.pages)
+        
+        rows = []
+        for mode in ("legacy", "streaming"):
+            output_path = os.path.join(directory, f"merged_{mode}.pdf")
+            out = subprocess.run(
+                [sys.executable, __file__, "--worker", mode, directory, output_path],
+                check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(out)
+            rows.append([mode, f"{result['time']:.2f}s", f"{result['peak_mb']:.0f} MB",
+                         result["pages"], f"{result['size_mb']:.1f} MB"])
+    
+    print_table(["mode", "wall time", "peak RSS", "pages", "output size"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: sketch colour quantization, full-image k-means vs sampled presets
+
+Runs the previous quantizer (10 random-center attempts over every pixel) and
+modules.sketch_vectorizer.quantize_colors for each SKETCH_QUALITY_PRESETS
+entry on a blurred synthetic sketch, reporting wall time and the colour error
+of the quantized image against the blurred input.
+
+Usage:
+    python benchmarks/bench_sketch_quantize.py --size 1024
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from common import print_table
+
+from bench_sketch_vectorize import synthetic_sketch
+from core.config import SKETCH_QUALITY_PRESETS
+from modules.sketch_vectorizer import quantize_colors
+
+def legacy_quantize(pixels: np.ndarray, k: int):
+    """The quantizer as it was"""
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 0.5)
+    _, labels, centers = cv2.kmeans(pixels, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+    return labels.ravel(), centers
+
+def colour_error(pixels: np.ndarray, labels: np.ndarray, centers: np.ndarray):
+    """MSE and PSNR of the uint8-rounded palette image"""
+    palette = np.uint8(centers).astype(np.float32)
+    mse = float(((pixels - palette[labels]) ** 2).mean())
+    return mse, 10 * np.log10(255.0 ** 2 / mse)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    image = cv2.bilateralFilter(synthetic_sketch(args.size), 5, 50, 50)
+    pixels = np.float32(image.reshape(-1, 3))
+    runs = [("legacy (full, 10 attempts)", lambda: legacy_quantize(pixels, 64))]
+    for name, preset in SKETCH_QUALITY_PRESETS.items():
+        runs.append((f"{name} (k={preset['k']}, sample={preset['sample_size'] or 'all'})",
+                     lambda preset=preset: quantize_colors(pixels, preset["k"], preset["attempts"],
+                                                           preset["sample_size"])))
+
+    rows = []
+    for name, run in runs:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            labels, centers = run()
+            best = min(best, time.perf_counter() - start)
+        mse, psnr = colour_error(pixels, labels, centers)
+        rows.append([name, f"{best:.2f}", f"{mse:.1f}", f"{psnr:.2f}"])
+
+    print(f"{args.size}x{args.size}, {len(pixels)} pixels")
+    print_table(["quantizer", "seconds", "MSE", "PSNR dB"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: SVG serialization, absolute-coordinate string vs streamed compact paths
+
+Traces a synthetic sketch once, then serializes the same contours the
+previous way ("M x,y L x,y ... Z" paths joined into one string, as returned
+in the HTTP response) and the current way (compact relative paths written
+layer by layer to a plain or gzip file). Reports wall time, peak Python
+memory and payload size.
+
+Usage:
+    python benchmarks/bench_sketch_svg.py --size 2056 --k 64
+"""
+import argparse
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from common import print_table
+
+from bench_sketch_vectorize import synthetic_sketch, quantize
+from modules.sketch_vectorizer import contour_to_path, label_bounding_boxes
+
+def traced_layers(label_img: np.ndarray, k: int):
+    """Simplified contours of every colour layer, as image_to_svg traces them"""
+    boxes = label_bounding_boxes(label_img, k)
+    layers = []
+    for i in range(k):
+        if boxes[i, 0] < 0:
+            continue
+        y0, y1, x0, x1 = (int(v) for v in boxes[i])
+        mask = np.zeros((y1 - y0 + 2, x1 - x0 + 2), dtype=np.uint8)
+        mask[1:-1, 1:-1][label_img[y0:y1, x0:x1] == i] = 255
+        contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE, offset=(x0 - 1, y0 - 1))
+        approx = [cv2.approxPolyDP(c, 0.0005 * cv2.arcLength(c, True), True) for c in contours
+                  if cv2.contourArea(c) >= 2]
+        layers.append([a for a in approx if len(a) >= 3])
+    return layers
+
+def header(width: int, height: int) -> str:
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" viewBox="0 0 {width} {height}" '
+            f'width="100%" height="100%" preserveAspectRatio="xMidYMid meet">')
+
+def path_element(d: str) -> str:
+    return (f'<path d="{d}" fill="#336699" stroke="#336699" stroke-width="1.5" '
+            f'stroke-linejoin="round" fill-rule="evenodd"/>')
+
+def legacy_svg(layers, width: int, height: int, output_path: str) -> int:
+    """The serializer as it was: absolute points, one string for the whole document"""
+    svg_content = [header(width, height)]
+    for layer in layers:
+        layer_paths = []
+        for approx in layer:
+            points = []
+            for point in approx:
+                x, y = point[0]
+                points.append(f"{x},{y}")
+            layer_paths.append("M " + " L ".join(points) + " Z")
+        if layer_paths:
+            svg_content.append(path_element(" ".join(layer_paths)))
+    svg_content.append('</svg>')
+    full_svg = "\n".join(svg_content)
+    with open(output_path, "w") as f:
+        f.write(full_svg)
+    return os.path.getsize(output_path)
+
+def streamed_svg(layers, width: int, height: int, output_path: str, compress: bool = False) -> int:
+    """Compact relative paths, written one layer at a time"""
+    f = gzip.open(output_path, "wt", compresslevel=6) if compress else open(output_path, "w")
+    with f:
+        f.write(header(width, height))
+        for layer in layers:
+            if layer:
+                f.write("\n" + path_element("".join(contour_to_path(approx) for approx in layer)))
+        f.write("\n</svg>")
+    return os.path.getsize(output_path)
+
+def measure(func, *args):
+    """Wall time of an untraced run, then peak Python memory of a traced one"""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=64)
+    args = parser.parse_args()
+
+    label_img = quantize(synthetic_sketch(args.size), args.k)
+    layers = traced_layers(label_img, args.k)
+    height, width = label_img.shape
+    temp_dir = tempfile.mkdtemp()
+    try:
+        runs = [
+            ("absolute, one string", legacy_svg, (layers, width, height, f"{temp_dir}/legacy.svg")),
+            ("compact, streamed", streamed_svg, (layers, width, height, f"{temp_dir}/stream.svg")),
+            ("compact, streamed gzip", streamed_svg, (layers, width, height, f"{temp_dir}/stream.svgz", True)),
+        ]
+        rows = []
+        for name, func, func_args in runs:
+            size, elapsed, peak = measure(func, *func_args)
+            rows.append([name, f"{elapsed:.2f}", f"{peak / 2**20:.1f}", f"{size / 2**20:.2f}"])
+    finally:
+        shutil.rmtree(temp_dir)
+
+    paths = sum(len(layer) for layer in layers)
+    print(f"{args.size}x{args.size}, K={args.k}, {paths} paths")
+    print_table(["serializer", "seconds", "peak MiB", "payload MiB"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark: parallel colour-layer tracing, speedup from 1 to N threads
+
+Quantizes a synthetic sketch once, then traces every layer with
+modules.sketch_vectorizer.trace_layers on thread pools of increasing size,
+checking that each run yields the same layers in the same order.
+
+Usage:
+    python benchmarks/bench_sketch_trace_scaling.py --size 2056 --k 64 --threads 1,2,4,8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import print_table
+
+from bench_sketch_vectorize import synthetic_sketch, quantize
+from modules.sketch_vectorizer import label_bounding_boxes, trace_layers
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2056)
+    parser.add_argument("--k", type=int, default=64)
+    parser.add_argument("--threads", default="1,2,4,8")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    label_img = quantize(synthetic_sketch(args.size), args.k)
+    boxes = label_bounding_boxes(label_img, args.k)
+
+    rows = []
+    reference = baseline = None
+    for threads in (int(t) for t in args.threads.split(",")):
+        best = float("inf")
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                layers = list(trace_layers(label_img, boxes, workers=threads, parallel_min_pixels=0, pool=pool))
+                best = min(best, time.perf_counter() - start)
+        if reference is None:
+            reference, baseline = layers, best
+        elif layers != reference:
+            raise SystemExit(f"Layers traced with {threads} threads differ from the serial run")
+        rows.append([threads, f"{best:.2f}", f"{baseline / best:.2f}x"])
+
+    print(f"{args.size}x{args.size}, K={args.k}, {os.cpu_count()} CPUs, identical layer order: yes")
+    print_table(["threads", "seconds", "speedup"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: per-cluster contour tracing, full-image masks vs bounding-box crops
+
+Quantizes a synthetic sketch once, then traces every colour layer with the
+previous full-image-mask loop and with modules.sketch_vectorizer, checks the
+path data is identical and reports wall time and peak numpy memory.
+
+Usage:
+    python benchmarks/bench_sketch_vectorize.py --size 2056 --k 64
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from common import print_table
+
+from modules.sketch_vectorizer import label_bounding_boxes, trace_label, contour_to_path
+
+def synthetic_sketch(size: int, seed: int = 0) -> np.ndarray:
+    """Coloured shapes and pen strokes on paper-white, with light sensor noise"""
+    rng = np.random.default_rng(seed)
+    image = np.full((size, size, 3), 245, dtype=np.uint8)
+    for _ in range(size // 8):
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        x, y = (int(v) for v in rng.integers(0, size, 2))
+        r = int(rng.integers(size // 100 + 2, size // 10))
+        kind = rng.integers(0, 3)
+        if kind == 0:
+            cv2.circle(image, (x, y), r, color, -1)
+        elif kind == 1:
+            cv2.rectangle(image, (x, y), (x + r, y + r // 2), color, -1)
+        else:
+            x2, y2 = (int(v) for v in rng.integers(0, size, 2))
+            cv2.line(image, (x, y), (x2, y2), color, int(rng.integers(1, 6)))
+    noise = rng.normal(0, 6, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+def quantize(image: np.ndarray, k: int) -> np.ndarray:
+    """Single-attempt k-means labels, shared by both tracers"""
+    pixels = np.float32(image.reshape(-1, 3))
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+    _, labels, _ = cv2.kmeans(pixels, k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+    return labels.reshape(image.shape[:2])
+
+def legacy_layers(label_img: np.ndarray, k: int):
+    """The loop as it was: a full-image mask and contour scan for every cluster"""
+    layers = []
+    for i in range(k):
+        mask = np.where(label_img == i, 255, 0).astype(np.uint8)
+        contours, hierarchy = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        layer_paths = []
+        for contour in contours:
+            if cv2.contourArea(contour) < 2:
+                continue
+            epsilon = 0.0005 * cv2.arcLength(contour, True)
+            approx = cv2.approxPolyDP(contour, epsilon, True)
+            if len(approx) < 3:
+                continue
+            layer_paths.append(contour_to_path(approx))
+        layers.append(layer_paths)
+    return layers
+
+def cropped_layers(label_img: np.ndarray, k: int):
+    boxes = label_bounding_boxes(label_img, k)
+    return [trace_label(label_img, i, boxes[i]) if boxes[i, 0] >= 0 else [] for i in range(k)]
+
+def measure(func, *args):
+    """Wall time of an untraced run, then peak numpy/Python memory of a traced one"""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=64)
+    args = parser.parse_args()
+
+    label_img = quantize(synthetic_sketch(args.size), args.k)
+    # Leave some clusters empty, as happens with flat scans
+    label_img = np.where(label_img % 5 == 4, 0, label_img).astype(label_img.dtype)
+
+    legacy, legacy_time, legacy_peak = measure(legacy_layers, label_img, args.k)
+    cropped, cropped_time, cropped_peak = measure(cropped_layers, label_img, args.k)
+    if legacy != cropped:
+        raise SystemExit("Output geometry differs between implementations")
+
+    paths = sum(len(layer) for layer in cropped)
+    rows = [
+        ["full-image masks", f"{legacy_time:.2f}", f"{legacy_peak / 2**20:.1f}", paths],
+        ["bbox crops", f"{cropped_time:.2f}", f"{cropped_peak / 2**20:.1f}", paths],
+    ]
+    print(f"{args.size}x{args.size}, K={args.k}, identical path data: yes")
+    print_table(["tracer", "seconds", "peak numpy MiB", "paths"], rows)
+
+if __name__ == "__main__":
+    main()
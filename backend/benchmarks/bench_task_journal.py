@@ -0,0 +1,61 @@
+"""
+Benchmark: task throughput with and without the durable SQLite journal
+
+Pushes N tasks through TaskQueueService in memory and in durable mode and
+reports tasks per second. Tasks sleep for --work-ms to stand in for real
+work (0 measures pure queue overhead), and carry an --payload-kb argument
+like a small upload.
+
+Usage:
+    python benchmarks/bench_task_journal.py --tasks 2000 --work-ms 5
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import print_table
+
+from services.task_queue import TaskQueueService, TaskStatus
+from services.task_journal import TaskJournal
+
+def fake_job(payload: bytes, work_ms: float) -> dict:
+    if work_ms:
+        time.sleep(work_ms / 1000)
+    return {"size": len(payload)}
+
+def run(tasks, workers, work_ms, payload, durable):
+    with tempfile.TemporaryDirectory() as directory:
+        journal = TaskJournal(Path(directory) / "journal.sqlite3") if durable else None
+        service = TaskQueueService(max_workers=workers, spill_dir=directory, journal=journal)
+        start = time.perf_counter()
+        for i in range(tasks):
+            service.add_task(f"t{i}", fake_job, payload, work_ms, user_id=f"user{i % 8}")
+        for i in range(tasks):
+            while service.get_task_status(f"t{i}") != TaskStatus.COMPLETED:
+                time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+        service.stop_workers()
+        if journal is not None:
+            journal.close()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--payload-kb", type=int, default=64)
+    args = parser.parse_args()
+    payload = b"x" * (args.payload_kb * 1024)
+
+    rows = []
+    for work_ms in (0, 5, 50):
+        tasks = args.tasks if work_ms < 50 else max(1, args.tasks // 10)
+        memory = run(tasks, args.workers, work_ms, payload, durable=False)
+        durable = run(tasks, args.workers, work_ms, payload, durable=True)
+        rows.append([work_ms, tasks, f"{tasks / memory:.0f}", f"{tasks / durable:.0f}",
+                     f"{(durable / memory - 1) * 100:+.1f}%"])
+    print_table(["work ms", "tasks", "memory tasks/s", "durable tasks/s", "overhead"], rows)
+
+if __name__ == "__main__":
+    main()
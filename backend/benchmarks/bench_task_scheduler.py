@@ -0,0 +1,113 @@
+"""
+Benchmark: tail latency of quick jobs behind a bulk backlog, FIFO vs FairScheduler
+
+Discrete-event simulation with a virtual clock, so it runs in well under a
+second and is deterministic. One heavy user submits a large batch of PDF
+pages at t=0; light users then submit short interactive jobs (translations,
+single-image OCR) at random times. The scheduler objects are the real ones,
+only the passage of time is simulated.
+
+Usage:
+    python benchmarks/bench_task_scheduler.py --workers 4 --bulk 500
+"""
+import argparse
+import heapq
+import queue
+import random
+
+from common import print_table
+
+from services.scheduler import FairScheduler
+
+class SimTask:
+    def __init__(self, user_id, duration, submitted, priority):
+        self.user_id = user_id
+        self.duration = duration
+        self.submitted = submitted
+        self.priority = priority
+
+class FifoScheduler:
+    """The previous behaviour: one queue.Queue shared by everyone"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def put(self, task, priority=None, cost=1.0):
+        self.queue.put(task)
+
+    def get(self, timeout=None):
+        return self.queue.get_nowait()
+
+    def task_done(self, task):
+        pass
+
+def workload(args):
+    rng = random.Random(args.seed)
+    tasks = [SimTask("bulk-user", rng.uniform(0.8, 1.2) * args.bulk_seconds, 0.0, "batch")
+             for _ in range(args.bulk)]
+    t = 0.0
+    for _ in range(args.quick):
+        t += rng.expovariate(args.quick_rate)
+        tasks.append(SimTask(f"user{rng.randrange(args.users)}", rng.uniform(0.5, 1.5) * args.quick_seconds,
+                             t, "interactive"))
+    return sorted(tasks, key=lambda task: task.submitted)
+
+def simulate(scheduler, tasks, workers):
+    """Run the workload on `workers` simulated workers; returns per-task latency"""
+    events = [(task.submitted, 0, i) for i, task in enumerate(tasks)]  # (time, kind, index); 0 = arrival
+    heapq.heapify(events)
+    idle = workers
+    latency = {}
+    running = {}
+    seq = len(tasks)
+    while events:
+        now, kind, index = heapq.heappop(events)
+        if kind == 0:
+            scheduler.put(tasks[index], priority=tasks[index].priority)
+        else:
+            idle += 1
+            scheduler.task_done(running.pop(index))
+        while idle:
+            try:
+                task = scheduler.get(timeout=0)
+            except queue.Empty:
+                break
+            idle -= 1
+            seq += 1
+            running[seq] = task
+            latency[id(task)] = now + task.duration - task.submitted
+            heapq.heappush(events, (now + task.duration, 1, seq))
+    return latency
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--bulk", type=int, default=500, help="Pages in the heavy user's backlog")
+    parser.add_argument("--bulk-seconds", type=float, default=2.0, help="Mean seconds per bulk page")
+    parser.add_argument("--quick", type=int, default=200, help="Number of interactive jobs")
+    parser.add_argument("--quick-seconds", type=float, default=0.3)
+    parser.add_argument("--quick-rate", type=float, default=1.0, help="Interactive arrivals per second")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tasks = workload(args)
+    rows = []
+    # With no per-user cap a quick job still waits for a bulk page to finish;
+    # reserving one worker removes that wait at the cost of bulk throughput
+    for name, scheduler in (("fifo", FifoScheduler()),
+                            ("fair", FairScheduler(max_in_flight=args.workers)),
+                            (f"fair cap={args.workers - 1}", FairScheduler(max_in_flight=max(1, args.workers - 1)))):
+        latency = simulate(scheduler, tasks, args.workers)
+        for group in ("interactive", "batch"):
+            values = [latency[id(t)] for t in tasks if t.priority == group]
+            rows.append([name, group, f"{percentile(values, 50):.1f}", f"{percentile(values, 95):.1f}",
+                         f"{percentile(values, 99):.1f}", f"{max(values):.1f}"])
+    print_table(["scheduler", "jobs", "p50 s", "p95 s", "p99 s", "max s"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: TrOCR per-line latency and resident memory per inference backend
+
+Loads each backend (fp32 torch, dynamic int8 quantized, ONNX Runtime) in a
+fresh process, recognizes line crops of a synthetic page one line at a time
+and reports latency percentiles, peak RSS after loading and after inference,
+and the character error rate against the fp32 output. --preset
+fast_handwriting decodes greedily with the per-crop token budget.
+
+Usage:
+    python benchmarks/bench_trocr_backends.py --lines 20 --backends torch quantized onnx
+    python benchmarks/bench_trocr_backends.py --backends torch torch --preset high_accuracy fast_handwriting
+"""
+import argparse
+import multiprocessing
+import resource
+import statistics
+import time
+
+from common import synthetic_page, print_table
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_backend(backend: str, lines: int, preset: str):
+    """Child process: load one backend, then time per-line recognition"""
+    from modules.trocr_backends import load_trocr, generate_text, fast_decoding_kwargs
+
+    page, line_boxes = synthetic_page(lines=lines)
+    crops = [page.crop(box) for box in line_boxes]
+    start = time.perf_counter()
+    processor, model, device = load_trocr(backend)
+    load_seconds = time.perf_counter() - start
+    loaded_rss = peak_rss_mib()
+
+    generate_text(processor, model, crops[:1], device)  # Warm-up
+    latencies, texts = [], []
+    for crop in crops:
+        start = time.perf_counter()
+        kwargs = fast_decoding_kwargs([crop]) if preset == "fast_handwriting" else {}
+        texts.extend(generate_text(processor, model, [crop], device, **kwargs))
+        latencies.append(time.perf_counter() - start)
+    return load_seconds, loaded_rss, peak_rss_mib(), latencies, texts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--backends", nargs="+", default=["torch", "quantized", "onnx"])
+    parser.add_argument("--preset", nargs="+", choices=["high_accuracy", "fast_handwriting"],
+                        default=["high_accuracy"], help="Decoding per backend (the last one repeats)")
+    args = parser.parse_args()
+
+    from modules.trocr_backends import HAS_ONNXRUNTIME
+    from modules.text_metrics import character_error_rate
+
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    reference = None
+    for index, backend in enumerate(args.backends):
+        preset = args.preset[min(index, len(args.preset) - 1)]
+        if backend == "onnx" and not HAS_ONNXRUNTIME:
+            print("Skipping onnx: optimum[onnxruntime] is not installed")
+            continue
+        # A fresh process per backend, so each peak RSS is its own
+        with context.Pool(1) as pool:
+            load_seconds, loaded_rss, peak_rss, latencies, texts = pool.apply(run_backend, (backend, args.lines, preset))
+        if reference is None:
+            reference = texts
+        cer = sum(character_error_rate(r, t) for r, t in zip(reference, texts)) / len(texts)
+        latencies.sort()
+        rows.append([
+            backend,
+            preset,
+            f"{load_seconds:.1f}",
+            f"{statistics.mean(latencies) * 1000:.0f}",
+            f"{latencies[len(latencies) // 2] * 1000:.0f}",
+            f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}",
+            f"{loaded_rss:.0f}",
+            f"{peak_rss:.0f}",
+            f"{cer:.3f}",
+        ])
+
+    print(f"TrOCR, {args.lines} line crops recognized one at a time (CER against {args.backends[0]})")
+    print_table(["backend", "preset", "load s", "mean ms", "p50 ms", "p95 ms", "RSS loaded MiB", "peak RSS MiB", "CER"], rows)
+
+if __name__ == "__main__":
+    main()
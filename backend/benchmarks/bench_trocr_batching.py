@@ -0,0 +1,57 @@
+"""
+Benchmark: per-box vs batched TrOCR recognition
+
+Renders a synthetic multi-line page, crops every line and recognizes the crops
+with OCRModule.recognize_crops at several batch sizes (batch size 1 is the
+previous per-box behaviour).
+
+Usage:
+    python benchmarks/bench_trocr_batching.py --lines 40 --batch-sizes 1 4 8 16
+"""
+import argparse
+
+from common import synthetic_page, time_call, print_table
+from modules.ocr import OCRModule, get_trocr_model
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=40, help="Text lines on the synthetic page")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    
+    processor, model = get_trocr_model()
+    if not processor or not model:
+        print("TrOCR model could not be loaded; aborting benchmark.")
+        return
+    
+    ocr = OCRModule()
+    page, line_boxes = synthetic_page(lines=args.lines)
+    crops = [page.crop(box) for box in line_boxes]
+    
+    # Warm up (first generate() call pays one-off initialisation costs)
+    ocr.recognize_crops(crops[:2], batch_size=2)
+    
+    rows = []
+    baseline = None
+    reference = None
+    for batch_size in args.batch_sizes:
+        texts = []
+        elapsed = time_call(lambda: texts.append(ocr.recognize_crops(crops, batch_size=batch_size)), args.repeat)
+        if baseline is None:
+            baseline = elapsed
+            reference = texts[-1]
+        same = sum(a == b for a, b in zip(reference, texts[-1]))
+        rows.append([
+            batch_size,
+            f"{elapsed:.2f}s",
+            f"{len(crops) / elapsed:.1f}",
+            f"{baseline / elapsed:.2f}x",
+            f"{same}/{len(crops)}",
+        ])
+    
+    print(f"TrOCR recognition of {len(crops)} line crops")
+    print_table(["batch", "time", "lines/s", "speedup", "same text"], rows)
+
+if __name__ == "__main__":
+    main()
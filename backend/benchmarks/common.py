@@ -0,0 +1,65 @@
+"""
+Shared helpers for benchmark scripts
+"""
+import sys
+import time
+import random
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+WORDS = [
+    "invoice", "total", "amount", "received", "signature", "address", "number",
+    "date", "customer", "payment", "balance", "notes", "handwritten", "sample",
+]
+
+def random_line(rng: random.Random, min_words: int = 2, max_words: int = 8) -> str:
+    """Build a random line of text from the word list"""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+def synthetic_page(lines: int = 40, width: int = 1654, line_height: int = 48,
+                   seed: int = 0) -> Tuple[Image.Image, List[Tuple[int, int, int, int]]]:
+    """
+    Render a white page with `lines` lines of black text
+    
+    Returns:
+        (RGB PIL Image, list of (x0, y0, x1, y1) line boxes)
+    """
+    rng = random.Random(seed)
+    height = line_height * (lines + 2)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", int(line_height * 0.6))
+    except Exception:
+        font = ImageFont.load_default()
+    
+    boxes = []
+    for i in range(lines):
+        text = random_line(rng)
+        x, y = 40 + rng.randint(0, 20), line_height * (i + 1)
+        draw.text((x, y), text, fill="black", font=font)
+        x0, y0, x1, y1 = draw.textbbox((x, y), text, font=font)
+        boxes.append((x0 - 4, y0 - 4, x1 + 4, y1 + 4))
+    return image, boxes
+
+def time_call(func: Callable, repeat: int = 3) -> float:
+    """Best-of-`repeat` wall time of func() in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def print_table(headers: List[str], rows: List[list]):
+    """Print a simple fixed-width results table"""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
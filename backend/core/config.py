@@ -20,6 +20,101 @@ OCR_MODEL_NAME = "easyocr"  # Could be "tesseract" or "custom"
 MATH_OCR_MODEL_NAME = "pix2tex"
 SKETCH_MODEL_NAME = "custom"
 
+# TrOCR settings
+TROCR_BATCH_SIZE = int(os.getenv("TROCR_BATCH_SIZE", "8"))  # Line crops per generate() call (1 = per-box)
+TROCR_MODEL_NAME = os.getenv("TROCR_MODEL_NAME", "microsoft/trocr-base-handwritten")
+# Inference backend (see modules/trocr_backends.py): "torch" (fp32), "quantized" (dynamic int8
+# linear layers, CPU) or "onnx" (ONNX Runtime export, needs optimum[onnxruntime])
+TROCR_BACKEND = os.getenv("TROCR_BACKEND", "torch")
+TROCR_ONNX_DIR = Path(os.getenv("TROCR_ONNX_DIR", str(MODELS_DIR / "trocr-onnx")))  # Export is cached here
+# "fast_handwriting" OCR mode: greedy decoding with a token budget of
+# TROCR_FAST_MIN_TOKENS + TROCR_FAST_TOKENS_PER_ASPECT * (crop width / height), capped at TROCR_FAST_MAX_TOKENS
+TROCR_FAST_MIN_TOKENS = int(os.getenv("TROCR_FAST_MIN_TOKENS", "4"))
+TROCR_FAST_TOKENS_PER_ASPECT = float(os.getenv("TROCR_FAST_TOKENS_PER_ASPECT", "1.0"))
+TROCR_FAST_MAX_TOKENS = int(os.getenv("TROCR_FAST_MAX_TOKENS", "64"))
+
+# Executor pools for blocking API work (see services/executor.py)
+# kind: "thread" for GIL-releasing OpenCV/torch code, "process" for pure-Python hot paths
+# workers: concurrent jobs, queue: extra jobs allowed to wait before requests get a 503
+EXECUTOR_POOLS = {
+    "default": {"kind": "thread", "workers": 2, "queue": 8},
+    "ocr": {"kind": "thread", "workers": int(os.getenv("OCR_WORKERS", "2")), "queue": int(os.getenv("OCR_QUEUE", "8"))},
+    "math": {"kind": "thread", "workers": int(os.getenv("MATH_WORKERS", "1")), "queue": int(os.getenv("MATH_QUEUE", "4"))},
+    "pdf_ocr": {"kind": "thread", "workers": int(os.getenv("PDF_OCR_WORKERS", "2")), "queue": int(os.getenv("PDF_OCR_QUEUE", "8"))},
+    "sketch": {"kind": "process", "workers": int(os.getenv("SKETCH_WORKERS", "2")), "queue": int(os.getenv("SKETCH_QUEUE", "4"))},
+}
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "300")) or None  # Deadline for a request's pool work; 0 = none
+
+# Streaming PDF OCR (/api/ocr/extract-pdf)
+PDF_OCR_MIN_DPI = int(os.getenv("PDF_OCR_MIN_DPI", "72"))
+PDF_OCR_MAX_DPI = int(os.getenv("PDF_OCR_MAX_DPI", "400"))  # Bounds the raster size of a single page
+PDF_OCR_RETRY_DELAY = float(os.getenv("PDF_OCR_RETRY_DELAY", "0.5"))  # Seconds between tries while the pool is full
+PDF_OCR_PAGE_TIMEOUT = float(os.getenv("PDF_OCR_PAGE_TIMEOUT", "120")) or None  # Deadline per page, including pool waits; 0 = none
+
+# OCR result cache (see services/result_cache.py)
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+OCR_CACHE_DISK_ENABLED = os.getenv("OCR_CACHE_DISK", "false").lower() in ("1", "true", "yes")  # Persist under OUTPUTS_DIR/cache/ocr
+
+# LLM response cache (see services/llm_cache.py)
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")  # "memory", "sqlite" or "none"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # Seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+
+# PDF merge: inputs merged between incremental saves (bounds memory for large merges)
+PDF_MERGE_FLUSH_EVERY = int(os.getenv("PDF_MERGE_FLUSH_EVERY", "20"))
+
+# PDF redaction engine (see modules/redaction.py)
+REDACTION_WORKERS = int(os.getenv("REDACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+REDACTION_PARALLEL_MIN_PAGES = int(os.getenv("REDACTION_PARALLEL_MIN_PAGES", "32"))  # Smaller documents are scanned in-process
+
+# Background jobs (see services/task_queue.py and /api/jobs)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOBS_DIR = OUTPUTS_DIR / "jobs"  # Per-job working directories for uploads and file results
+TASK_RESULT_TTL = float(os.getenv("TASK_RESULT_TTL", str(6 * 3600)))  # Seconds a finished task stays queryable
+TASK_RESULT_MAX_BYTES = int(os.getenv("TASK_RESULT_MAX_BYTES", str(128 * 1024 * 1024)))  # In-memory results; older ones spill to disk
+TASK_SPILL_DIR = OUTPUTS_DIR / "task_results"
+TASK_PRIORITIES = ("interactive", "batch")  # Scheduler lanes, served highest first
+TASK_DEFAULT_PRIORITY = os.getenv("TASK_DEFAULT_PRIORITY", "batch")
+TASK_DEFAULT_TIMEOUT = float(os.getenv("TASK_DEFAULT_TIMEOUT", "3600")) or None  # Seconds from submission; 0 = no deadline
+TASK_USER_MAX_IN_FLIGHT = int(os.getenv("TASK_USER_MAX_IN_FLIGHT", "2"))  # Running tasks per user (anonymous: per client)
+TASK_LANE_MAX_WAIT = float(os.getenv("TASK_LANE_MAX_WAIT", "60"))  # Seconds before a waiting lower lane jumps ahead; 0 = strict priority
+# Task types run in a process pool instead of the worker threads (GIL-bound pure-Python stages)
+TASK_PROCESS_TYPES = tuple(t.strip() for t in os.getenv("TASK_PROCESS_TYPES", "sketch").split(",") if t.strip())
+TASK_PROCESS_WORKERS = int(os.getenv("TASK_PROCESS_WORKERS", str(min(os.cpu_count() or 1, JOB_WORKERS))))
+TASK_JOURNAL_ENABLED = os.getenv("TASK_JOURNAL", "false").lower() in ("1", "true", "yes")  # Durable queue, replayed on startup
+TASK_JOURNAL_PATH = OUTPUTS_DIR / "task_journal.sqlite3"
+TASK_JOURNAL_FLUSH_INTERVAL = float(os.getenv("TASK_JOURNAL_FLUSH_INTERVAL", "0.05"))  # Group-commit period for outcomes
+TASK_JOURNAL_INLINE_BYTES = int(os.getenv("TASK_JOURNAL_INLINE_BYTES", str(64 * 1024)))  # Larger results go to files
+TASK_SHM_MIN_BYTES = int(os.getenv("TASK_SHM_MIN_BYTES", str(1024 * 1024)))  # Arrays this large return via shared memory
+
+# Sketch vectorization colour quantization presets (see modules/sketch_vectorizer.py)
+# k: colours, attempts: k-means restarts, sample_size: pixels the centers are fitted on (None = every pixel)
+SKETCH_QUALITY_PRESETS = {
+    "fast": {"k": 16, "attempts": 1, "sample_size": 20000},
+    "balanced": {"k": 32, "attempts": 3, "sample_size": 50000},
+    "high": {"k": 64, "attempts": 5, "sample_size": 100000},
+    "exact": {"k": 64, "attempts": 10, "sample_size": None},  # Fit on every pixel (slowest)
+}
+SKETCH_DEFAULT_QUALITY = os.getenv("SKETCH_DEFAULT_QUALITY", "high")
+SKETCH_HISTORY_PREVIEW_BYTES = int(os.getenv("SKETCH_HISTORY_PREVIEW_BYTES", "5000"))  # Valid SVG kept in each history record
+SKETCH_GZIP_LEVEL = int(os.getenv("SKETCH_GZIP_LEVEL", "6"))
+SKETCH_TRACE_THREADS = int(os.getenv("SKETCH_TRACE_THREADS", str(min(4, os.cpu_count() or 1))))  # Per sketch worker process
+SKETCH_PARALLEL_MIN_PIXELS = int(os.getenv("SKETCH_PARALLEL_MIN_PIXELS", str(512 * 512)))  # Smaller images trace serially
+
+# Tiled OCR for very large scans (see modules/ocr_tiling.py)
+OCR_TILE_SIZE = int(os.getenv("OCR_TILE_SIZE", "2048"))  # Below EasyOCR's 2560px canvas, so tiles are not downscaled
+OCR_TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", "256"))  # Words must fit inside this band; longer lines are joined across seams
+OCR_TILE_MIN_PIXELS = int(os.getenv("OCR_TILE_MIN_PIXELS", str(16_000_000)))  # Larger images are tiled (0 = never)
+
+# EasyOCR readers per language set (see services/reader_registry.py and modules/script_detection.py)
+OCR_READER_MAX_BYTES = int(os.getenv("OCR_READER_MAX_BYTES", str(512 * 1024 * 1024)))  # LRU budget for loaded readers
+OCR_READER_DEFAULT_BYTES = int(os.getenv("OCR_READER_DEFAULT_BYTES", str(100 * 1024 * 1024)))  # When a reader cannot be measured
+OCR_SCRIPT_DETECTION = os.getenv("OCR_SCRIPT_DETECTION", "true").lower() in ("1", "true", "yes")  # Pick the reader per page when no languages are given
+
+# Layout reconstruction (see modules/ocr_layout.py)
+OCR_LAYOUT_COLUMNS = os.getenv("OCR_LAYOUT_COLUMNS", "true").lower() in ("1", "true", "yes")  # Read multi-column pages column by column
+OCR_LAYOUT_COLUMN_GAP = float(os.getenv("OCR_LAYOUT_COLUMN_GAP", "2.0"))  # Minimum gutter width, in median text heights
+
 # Language settings
 SUPPORTED_LANGUAGES = ["en", "hi", "mr"]  # English, Hindi, Marathi
 
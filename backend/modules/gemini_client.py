@@ -2,67 +2,244 @@
 Gemini API Client Module (REST Implementation for Python 3.8 compatibility)
 Handles interaction with Google's Gemini models for text correction, refinement, and math solving.
 """
-import requests
+import asyncio
+import httpx
 import logging
 import json
 import os
+import threading
+from concurrent.futures import Future
+from typing import Optional
+from services.llm_cache import LLMCache, get_llm_cache
+from modules.text_chunking import split_text, stitch_chunks, parse_json_list, merge_unique
 
-# API Key provided by user
 # API Key provided by user
 API_KEY = os.getenv("GEMINI_API_KEY") 
-BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent")
+
+# Connection pool settings
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "10"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))  # In-flight requests per process
+GEMINI_KEEPALIVE_EXPIRY = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", "60"))
+
+# Long-document chunking
+GEMINI_CHUNK_CHARS = int(os.getenv("GEMINI_CHUNK_CHARS", "8000"))
+GEMINI_CHUNK_OVERLAP = int(os.getenv("GEMINI_CHUNK_OVERLAP", "200"))  # Redaction only; correction chunks never overlap
+GEMINI_CHUNK_CONCURRENCY = int(os.getenv("GEMINI_CHUNK_CONCURRENCY", "4"))  # Concurrent chunk requests per document
+
+class GeminiTransport:
+    """
+    Process-wide async HTTP client with a persistent keep-alive connection pool.
+    
+    The httpx client lives on a dedicated event-loop thread, so the same pool
+    serves async callers on any loop and sync callers on any thread.
+    """
+    
+    def __init__(self, max_connections: int = GEMINI_MAX_CONNECTIONS,
+                 max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+                 timeout: float = GEMINI_TIMEOUT):
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.loop = None
+        self.thread = None
+        self.client = None
+        self.semaphore = None
+        self.lock = threading.Lock()
+    
+    def _ensure_started(self):
+        """Start the event-loop thread and HTTP client on first use"""
+        if self.loop is not None:
+            return
+        with self.lock:
+            if self.loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="gemini-http", daemon=True)
+            thread.start()
+            
+            async def create_client():
+                self.client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY,
+                    ),
+                )
+                self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+            asyncio.run_coroutine_threadsafe(create_client(), loop).result()
+            self.thread = thread
+            self.loop = loop
+    
+    async def _post(self, url: str, payload: dict) -> httpx.Response:
+        async with self.semaphore:
+            return await self.client.post(url, json=payload)
+    
+    def submit(self, url: str, payload: dict) -> Future:
+        """Schedule a POST on the transport loop and return a concurrent Future"""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self._post(url, payload), self.loop)
+    
+    def post(self, url: str, payload: dict) -> httpx.Response:
+        """Blocking POST for sync callers (Streamlit app, worker threads)"""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("GeminiTransport.post() called from the transport loop; use apost()")
+        return self.submit(url, payload).result()
+    
+    def run(self, coro):
+        """Run a coroutine on the transport loop and block for its result"""
+        self._ensure_started()
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("GeminiTransport.run() called from the transport loop")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+    
+    async def apost(self, url: str, payload: dict) -> httpx.Response:
+        """POST awaitable from any event loop"""
+        return await asyncio.wrap_future(self.submit(url, payload))
+    
+    def close(self):
+        """Close pooled connections and stop the loop thread"""
+        with self.lock:
+            if self.loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.loop = self.thread = self.client = self.semaphore = None
+
+# Global instances
+_transport = None
+_gemini_client = None
+_transport_lock = threading.RLock()  # get_gemini_client() creates the transport while holding it
+
+def get_transport() -> GeminiTransport:
+    """Get singleton GeminiTransport"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = GeminiTransport()
+    return _transport
+
+def get_gemini_client() -> "GeminiClient":
+    """Get the shared GeminiClient (reuses the pooled transport)"""
+    global _gemini_client
+    if _gemini_client is None:
+        with _transport_lock:
+            if _gemini_client is None:
+                _gemini_client = GeminiClient()
+    return _gemini_client
 
 class GeminiClient:
-    def __init__(self):
-        self.api_key = API_KEY
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 transport: Optional[GeminiTransport] = None, cache: Optional[LLMCache] = None):
+        self.api_key = api_key if api_key is not None else API_KEY
+        self.base_url = base_url or BASE_URL
+        self.transport = transport or get_transport()
+        self.cache = cache if cache is not None else get_llm_cache(namespace=self.base_url)
         self.is_ready = bool(self.api_key)
 
+    def _request(self, prompt: str):
+        """URL and JSON body for a generateContent call"""
+        data = {
+            "contents": [{"parts": [{"text": prompt}]}]
+        }
+        return f"{self.base_url}?key={self.api_key}", data
+
+    def _parse_response(self, response: httpx.Response) -> str:
+        if response.status_code == 200:
+            result = response.json()
+            try:
+                return result['candidates'][0]['content']['parts'][0]['text']
+            except (KeyError, IndexError):
+                print(f"GeminiClient: Unexpected structure: {result}")
+                logging.error(f"Unexpected Gemini response structure: {result}")
+                return ""
+        else:
+            print(f"GeminiClient: API Error {response.status_code}: {response.text}")
+            logging.error(f"Gemini API Error {response.status_code}: {response.text}")
+            return ""
+
     def _generate(self, prompt: str) -> str:
         if not self.is_ready:
             print("GeminiClient: API Key missing.")
             return ""
             
         try:
-            headers = {'Content-Type': 'application/json'}
-            data = {
-                "contents": [{"parts": [{"text": prompt}]}]
-            }
-            
-            # Print for debugging
-            print(f"GeminiClient: Sending request to {BASE_URL}...")
-            
-            response = requests.post(
-                f"{BASE_URL}?key={self.api_key}",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+            url, data = self._request(prompt)
+            return self._parse_response(self.transport.post(url, data))
+        except Exception as e:
+            print(f"GeminiClient: Request Exception: {e}")
+            logging.error(f"Gemini Request failed: {e}")
+            return ""
+
+    async def agenerate(self, prompt: str) -> str:
+        """Async counterpart of _generate, sharing the same connection pool"""
+        if not self.is_ready:
+            print("GeminiClient: API Key missing.")
+            return ""
             
-            if response.status_code == 200:
-                result = response.json()
-                try:
-                    return result['candidates'][0]['content']['parts'][0]['text']
-                except (KeyError, IndexError):
-                    print(f"GeminiClient: Unexpected structure: {result}")
-                    logging.error(f"Unexpected Gemini response structure: {result}")
-                    return ""
-            else:
-                print(f"GeminiClient: API Error {response.status_code}: {response.text}")
-                logging.error(f"Gemini API Error {response.status_code}: {response.text}")
-                return ""
-                
+        try:
+            url, data = self._request(prompt)
+            return self._parse_response(await self.transport.apost(url, data))
         except Exception as e:
             print(f"GeminiClient: Request Exception: {e}")
             logging.error(f"Gemini Request failed: {e}")
             return ""
 
+    def _cached_generate(self, method: str, prompt: str) -> str:
+        """_generate through the LLM response cache; failed (empty) responses are not cached"""
+        if self.cache is not None and self.is_ready:
+            cached = self.cache.get(method, prompt)
+            if cached is not None:
+                return cached
+        result = self._generate(prompt)
+        if result and self.cache is not None:
+            self.cache.set(method, prompt, result)
+        return result
+
+    async def _acached_generate(self, method: str, prompt: str) -> str:
+        """Async counterpart of _cached_generate"""
+        if self.cache is not None and self.is_ready:
+            cached = self.cache.get(method, prompt)
+            if cached is not None:
+                return cached
+        result = await self.agenerate(prompt)
+        if result and self.cache is not None:
+            self.cache.set(method, prompt, result)
+        return result
+
+    def _generate_many(self, method: str, prompts: list) -> list:
+        """Run several cached prompts concurrently, at most GEMINI_CHUNK_CONCURRENCY at a time"""
+        async def generate_all():
+            semaphore = asyncio.Semaphore(GEMINI_CHUNK_CONCURRENCY)
+            
+            async def generate_one(prompt):
+                async with semaphore:
+                    return await self._acached_generate(method, prompt)
+            
+            return await asyncio.gather(*(generate_one(p) for p in prompts))
+        
+        return self.transport.run(generate_all())
+
+    def _correction_prompt(self, text: str) -> str:
+        return f"Please correct the following text, which was extracted using OCR. Fix any scanning errors, spelling mistakes, and formatting issues. Return ONLY the corrected text.\n\nText:\n{text}"
+
     def correct_ocr_text(self, text: str) -> str:
         """
         Corrects OCR errors and formats text using Gemini.
+        Long documents are corrected in concurrent chunks and stitched back together.
         """
         if not text: return text
-        prompt = f"Please correct the following text, which was extracted using OCR. Fix any scanning errors, spelling mistakes, and formatting issues. Return ONLY the corrected text.\n\nText:\n{text}"
-        result = self._generate(prompt)
+        if len(text) > GEMINI_CHUNK_CHARS and self.is_ready:
+            chunks = split_text(text, GEMINI_CHUNK_CHARS)
+            results = self._generate_many("correct_ocr_text", [self._correction_prompt(c) for c in chunks])
+            return stitch_chunks(chunks, results)
+        result = self._cached_generate("correct_ocr_text", self._correction_prompt(text))
         return result if result else text
 
     def refine_speech_text(self, text: str) -> str:
@@ -71,7 +248,7 @@ class GeminiClient:
         """
         if not text: return text
         prompt = f"Please refine the following speech transcription. Add proper punctuation, capitalization, and fix grammatical errors. Return ONLY the refined text.\n\nTranscription:\n{text}"
-        result = self._generate(prompt)
+        result = self._cached_generate("refine_speech_text", prompt)
         return result if result else text
 
     def solve_math_problem(self, latex_or_text: str) -> str:
@@ -80,25 +257,35 @@ class GeminiClient:
         """
         if not latex_or_text: return "AI Solution unavailable."
         prompt = f"Please solve the following math problem step-by-step. The input is in LaTeX or plain text. Explain the solution clearly.\n\nProblem:\n{latex_or_text}"
-        result = self._generate(prompt)
+        result = self._cached_generate("solve_math_problem", prompt)
         return result if result else "Failed to generate solution."
 
-    def identify_sensitive_data(self, text: str) -> str:
-        """
-        Identifies sensitive data in the text for redaction.
-        Returns a JSON list of strings to redact.
-        """
-        if not text: return "[]"
-        prompt = f"""
+    def _sensitive_data_prompt(self, text: str) -> str:
+        return f"""
         Analyze the following text and identify ALL sensitive personal information that should be redacted.
         Include: Names of people, Email addresses, Phone numbers, Credit Card numbers, Social Security Numbers (SSN), and Physical/Mailing Addresses.
         Return ONLY a raw JSON array of strings containing the exact text segments to redact. Do not include the type, just the text.
         Example output: ["John Doe", "john@example.com", "555-1234"]
         
         Text to analyze:
-        {text[:10000]} 
+        {text} 
         """ 
-        return self._generate(prompt)
+
+    def identify_sensitive_data(self, text: str) -> str:
+        """
+        Identifies sensitive data in the text for redaction.
+        The whole document is analysed in overlapping chunks sent concurrently.
+        Returns a JSON list of strings to redact.
+        """
+        if not text: return "[]"
+        chunks = split_text(text, GEMINI_CHUNK_CHARS, overlap=GEMINI_CHUNK_OVERLAP)
+        prompts = [self._sensitive_data_prompt(c) for c in chunks]
+        if len(prompts) == 1:
+            responses = [self._cached_generate("identify_sensitive_data", prompts[0])]
+        else:
+            responses = self._generate_many("identify_sensitive_data", prompts)
+        items = merge_unique([parse_json_list(r) for r in responses])
+        return json.dumps([item for item in items if isinstance(item, str) and item.strip()])
 
     def enhance_svg(self, svg_code: str) -> str:
         """
@@ -116,5 +303,5 @@ class GeminiClient:
         """
         if not text: return "en"
         prompt = f"Detect the language of the following text and return ONLY its 2-letter ISO code (e.g., en, hi, mr, es, fr, etc.).\n\nText:\n{text}"
-        result = self._generate(prompt).strip().lower()
+        result = self._cached_generate("detect_language", prompt).strip().lower()
         return result[:2] if result else "en"
@@ -7,7 +7,7 @@ import numpy as np
 from PIL import Image
 import logging
 from typing import Union, Optional
-from modules.gemini_client import GeminiClient
+from modules.gemini_client import get_gemini_client
 
 # Try to import pix2tex if available
 try:
@@ -62,7 +62,7 @@ class MathOCRModule:
                 latex = self.model(image)
                 
                 # AI Enhancement: Solve the problem
-                gemini = GeminiClient()
+                gemini = get_gemini_client()
                 if gemini.is_ready:
                     solution = gemini.solve_math_problem(latex)
                     return f"{latex}\n\n--- AI Solution ---\n{solution}"
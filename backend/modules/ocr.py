@@ -6,44 +6,63 @@ import cv2
 import numpy as np
 from PIL import Image
 import io
-import easyocr
-from typing import Union, List
+import threading
+from typing import Iterable, Union, List, Optional, Tuple
 import logging
-from transformers import TrOCRProcessor, VisionEncoderDecoderModel
-import torch
 from transformers import logging as transformers_logging
-from modules.gemini_client import GeminiClient
+from modules.gemini_client import get_gemini_client
+from core.config import TROCR_BATCH_SIZE, TROCR_BACKEND, OCR_TILE_MIN_PIXELS, OCR_SCRIPT_DETECTION
+from modules.trocr_backends import load_trocr, generate_text, crop_aspect, fast_decoding_kwargs
+from modules.ocr_tiling import image_size, iter_preprocessed_tiles, shift_results, merge_tile_results
+from modules.ocr_layout import analyze_layout, encode_layout
+from modules.script_detection import detect_languages, SCRIPT_LANGUAGES
+from services.reader_registry import get_reader_registry, normalize_languages
+from services.result_cache import get_ocr_cache, image_cache_key
+from services.cancellation import checkpoint, TaskCancelled
 
 transformers_logging.set_verbosity_error()
 
 # Lazy loading of models
-_ocr_reader = None
+def get_ocr_reader(languages: Optional[Iterable[str]] = None):
+    """
+    Lazy loading of the EasyOCR reader for a language set
+    
+    Readers are shared per set through the reader registry; None means every
+    supported language (English, Hindi, Marathi).
+    """
+    return get_reader_registry().get(languages)
+
+def preload_ocr_readers():
+    """Load the reader for each script the detection pre-pass can choose"""
+    for languages in set(SCRIPT_LANGUAGES.values()):
+        get_ocr_reader(languages)
 
-def get_ocr_reader():
-    """Lazy loading of OCR reader"""
-    global _ocr_reader
-    if _ocr_reader is None:
-        # Initialize EasyOCR with support for English and Hindi
-        # Note: For production, you might want to make this configurable
-        _ocr_reader = easyocr.Reader(['en', 'hi', 'mr'], verbose=False)  # Added 'mr' for Marathi
-    return _ocr_reader
+# OCR modes that recognize with TrOCR; the mode doubles as the decoding preset
+TROCR_MODES = ("high_accuracy", "fast_handwriting")
+
+# recognize() results: plain text, or text with its line/word layout
+OUTPUT_FORMATS = ("text", "structured")
 
 # Lazy loading for TrOCR
 _trocr_processor = None
 _trocr_model = None
+_trocr_device = "cpu"
+
+_trocr_lock = threading.Lock()
 
 def get_trocr_model():
-    """Lazy loading of TrOCR model"""
-    global _trocr_processor, _trocr_model
+    """Lazy loading of TrOCR model on the configured TROCR_BACKEND"""
+    global _trocr_processor, _trocr_model, _trocr_device
     if _trocr_processor is None:
-        try:
-            logging.info("Loading TrOCR model...")
-            # Use a smaller model for reasonable local performance, or 'microsoft/trocr-base-handwritten' for best accuracy
-            _trocr_processor = TrOCRProcessor.from_pretrained('microsoft/trocr-base-handwritten')
-            _trocr_model = VisionEncoderDecoderModel.from_pretrained('microsoft/trocr-base-handwritten')
-        except Exception as e:
-            logging.error(f"Failed to load TrOCR: {e}")
-            return None, None
+        with _trocr_lock:
+            if _trocr_processor is None:
+                try:
+                    logging.info(f"Loading TrOCR model ({TROCR_BACKEND} backend)...")
+                    _trocr_processor, _trocr_model, _trocr_device = load_trocr(TROCR_BACKEND)
+                except Exception as e:
+                    logging.error(f"Failed to load TrOCR: {e}")
+                    _trocr_processor = _trocr_model = None
+                    return None, None
             
     return _trocr_processor, _trocr_model
 
@@ -87,192 +106,327 @@ class OCRModule:
         
         return binary
     
-    def reconstruct_layout(self, results: List[tuple]) -> str:
+    def resolve_languages(self, image: Union[Image.Image, np.ndarray],
+                          languages: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
         """
-        Reconstruct text layout from OCR results using bounding boxes.
+        Language set to read an image with
+        
+        Explicit languages win; otherwise the script detection pre-pass picks
+        English alone for Latin pages and every language for Devanagari ones.
+        
+        Raises:
+            ValueError: For unsupported languages
+        """
+        if languages:
+            return normalize_languages(languages)
+        if OCR_SCRIPT_DETECTION:
+            return normalize_languages(detect_languages(image))
+        return normalize_languages(None)
+    
+    def detect_text(self, image: Union[Image.Image, np.ndarray], tiled: Optional[bool] = None,
+                    languages: Optional[Iterable[str]] = None) -> List[tuple]:
+        """
+        Preprocess and run EasyOCR detection/recognition
         
         Args:
-            results: List of (bbox, text, prob) tuples
+            image: PIL Image or numpy array
+            tiled: Process overlapping tiles one at a time (None = only images
+                of OCR_TILE_MIN_PIXELS or more)
+            languages: Reader languages (None = detect the page's script)
             
         Returns:
-            Formatted text string
+            List of (bbox, text, prob) tuples in image coordinates
         """
-        if not results:
-            return ""
-            
-        # Helper to get centroid y
-        def get_cy(bbox):
-            return sum([p[1] for p in bbox]) / 4
-            
-        def get_cx(bbox):
-            return sum([p[0] for p in bbox]) / 4
-            
-        # Sort by vertical position first
-        # results are (bbox, text, prob)
-        # bbox is [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-        sorted_results = sorted(results, key=lambda x: get_cy(x[0]))
-        
-        lines = []
-        current_line = []
-        current_y = get_cy(sorted_results[0][0])
+        width, height = image_size(image)
+        if tiled is None:
+            tiled = 0 < OCR_TILE_MIN_PIXELS <= width * height
+        reader = get_ocr_reader(self.resolve_languages(image, languages))
         
-        # Heuristic for line height: average height of boxes
-        heights = [abs(r[0][2][1] - r[0][0][1]) for r in sorted_results]
-        avg_height = sum(heights) / len(heights) if heights else 20
-        line_threshold = avg_height * 0.5
+        if not tiled:
+            processed_img = self.preprocess_image(image)
+            checkpoint()
+            # detail=1 returns (bbox, text, prob)
+            results = reader.readtext(processed_img, detail=1, paragraph=False)
+            checkpoint()
+            return results
         
-        for res in sorted_results:
-            cy = get_cy(res[0])
-            if abs(cy - current_y) > line_threshold:
-                # Start new line
-                lines.append(sorted(current_line, key=lambda x: get_cx(x[0])))
-                current_line = [res]
-                current_y = cy
-            else:
-                current_line.append(res)
-                # Update current_y to moving average to handle slightly slanted lines
-                n = len(current_line)
-                current_y = (current_y * (n-1) + cy) / n
+        # Bounded memory: one tile's arrays at a time, each small enough for EasyOCR's canvas
+        tile_results = []
+        for box, binary in iter_preprocessed_tiles(image):
+            checkpoint()
+            results = reader.readtext(binary, detail=1, paragraph=False)
+            tile_results.append((box, shift_results(results, box[0], box[1])))
+        checkpoint()
+        return merge_tile_results(tile_results, width, height)
+    
+    def analyze_layout(self, results: List[tuple]) -> dict:
+        """
+        Group OCR results into columns, lines and words in reading order
         
-        if current_line:
-            lines.append(sorted(current_line, key=lambda x: get_cx(x[0])))
-            
-        # Build text
-        final_text = []
-        for line in lines:
-            if not line:
-                continue
-            
-            line_text = ""
-            last_x = line[0][0][0][0] # x1 of first box
-            
-            for res in line:
-                bbox, text, _ = res
-                x1 = bbox[0][0]
-                
-                # Add spaces based on distance
-                # Simple heuristic: one space per char width approx? 
-                # Or just space if dist > threshold.
-                # Let's just use standard space joining for now, 
-                # but we could calculate indentation here.
-                dist = x1 - last_x
-                if dist > avg_height: # Significant gap
-                    line_text += " \t " 
-                elif dist > 10 and line_text: # Small gap
-                    line_text += " "
-                    
-                line_text += text
-                last_x = bbox[1][0] # x2 of current box
+        Args:
+            results: List of (bbox, text, prob) tuples
             
-            final_text.append(line_text)
+        Returns:
+            Dict with the page "text", "columns" count and "lines" with their
+            words, bboxes and confidences (see modules.ocr_layout.analyze_layout)
+        """
+        return analyze_layout(results)
+    
+    def reconstruct_layout(self, results: List[tuple]) -> str:
+        """
+        Reconstruct text layout from OCR results using bounding boxes.
+        
+        Args:
+            results: List of (bbox, text, prob) tuples
             
-        return "\n".join(final_text)
+        Returns:
+            Formatted text string
+        """
+        return self.analyze_layout(results)["text"]
 
-    def perform_ocr(self, image: Union[Image.Image, np.ndarray]) -> str:
+    def perform_ocr(self, image: Union[Image.Image, np.ndarray], use_ai_correction: bool = True,
+                    tiled: Optional[bool] = None, languages: Optional[Iterable[str]] = None) -> str:
         """
         Perform OCR on the given image with layout preservation
         
         Args:
             image: PIL Image or numpy array
+            use_ai_correction: Post-correct the text with Gemini when available
+            tiled: Tiled detection for very large scans (None = by image size)
+            languages: Reader languages (None = detect the page's script)
             
         Returns:
             Recognized text as string
         """
         try:
-            # Preprocess image
-            processed_img = self.preprocess_image(image)
+            layout = self._standard_layout(image, tiled=tiled, languages=languages)
+            return self._correct_text(layout["text"], use_ai_correction)
+        except Exception as e:
+            logging.error(f"OCR failed: {str(e)}")
+            raise e
+
+    def _standard_layout(self, image: Union[Image.Image, np.ndarray], tiled: Optional[bool] = None,
+                         languages: Optional[Iterable[str]] = None) -> dict:
+        """EasyOCR detection and recognition, grouped by analyze_layout"""
+        # Preprocess and perform OCR (get details for layout)
+        results = self.detect_text(image, tiled=tiled, languages=languages)
+        return self.analyze_layout(results)
+
+    def _correct_text(self, text: str, use_ai_correction: bool = True) -> str:
+        """Post-correct recognized text with Gemini when enabled and available"""
+        gemini = get_gemini_client()
+        if use_ai_correction and gemini.is_ready:
+            checkpoint()
+            return gemini.correct_ocr_text(text)
+        return text
+
+    def crop_text_regions(self, image: Image.Image, boxes: List[tuple]) -> List[tuple]:
+        """
+        Crop detected text regions out of the page
+        
+        Args:
+            image: RGB PIL Image
+            boxes: List of (bbox, text, prob) tuples from EasyOCR
             
-            # Perform OCR (get details for layout)
-            # detail=1 returns (bbox, text, prob)
-            reader = get_ocr_reader()
-            results = reader.readtext(processed_img, detail=1, paragraph=False)
+        Returns:
+            List of (box, cropped PIL Image) pairs, tiny boxes skipped
+        """
+        regions = []
+        for box in boxes:
+            bbox = box[0]
+            x_min = max(0, int(min([p[0] for p in bbox])))
+            x_max = int(max([p[0] for p in bbox]))
+            y_min = max(0, int(min([p[1] for p in bbox])))
+            y_max = int(max([p[1] for p in bbox]))
             
-            # Reconstruct layout
-            recognized_text = self.reconstruct_layout(results)
+            if x_max - x_min < 5 or y_max - y_min < 5:
+                # Skip tiny boxes
+                continue
+                
+            regions.append((box, image.crop((x_min, y_min, x_max, y_max))))
+        return regions
+
+    def recognize_crops(self, crops: List[Image.Image], batch_size: int = None,
+                        preset: str = "high_accuracy") -> List[str]:
+        """
+        Recognize line crops with TrOCR in padded batches
+        
+        The processor resizes every crop to the encoder resolution, so a batch is
+        a single stacked tensor and one generate() call serves the whole batch.
+        The "fast_handwriting" preset decodes greedily with a token budget per
+        batch; crops are grouped by aspect ratio so short words are not held
+        to the budget of a long line.
+        
+        Args:
+            crops: List of RGB PIL Images
+            batch_size: Crops per forward pass (defaults to TROCR_BATCH_SIZE, 1 = per-box)
+            preset: "high_accuracy" (model's generation config) or "fast_handwriting"
             
-            # AI Enhancement
-            gemini = GeminiClient()
-            if gemini.is_ready:
-                return gemini.correct_ocr_text(recognized_text)
+        Returns:
+            Recognized text per crop, in input order (None where a batch failed)
+        """
+        processor, model = get_trocr_model()
+        if not processor or not model:
+            raise RuntimeError("TrOCR model could not be loaded")
             
-            return recognized_text
-        except Exception as e:
-            logging.error(f"OCR failed: {str(e)}")
-            raise e
+        batch_size = max(1, batch_size or TROCR_BATCH_SIZE)
+        fast = preset == "fast_handwriting"
+        order = list(range(len(crops)))
+        if fast:
+            order.sort(key=lambda i: crop_aspect(crops[i]))
+        
+        texts = [None] * len(crops)
+        for start in range(0, len(order), batch_size):
+            # Stop between batches if the request was abandoned or timed out
+            checkpoint()
+            indices = order[start:start + batch_size]
+            batch = [crops[i] for i in indices]
+            generate_kwargs = fast_decoding_kwargs(batch) if fast else {}
+            try:
+                batch_texts = generate_text(processor, model, batch, _trocr_device, **generate_kwargs)
+            except Exception as batch_err:
+                logging.warning(f"Failed to recognize batch at box {start}: {batch_err}")
+                continue
+            for i, text in zip(indices, batch_texts):
+                texts[i] = text
+        return texts
 
-    def perform_high_accuracy_ocr(self, image: Union[Image.Image, np.ndarray]) -> str:
+    def perform_high_accuracy_ocr(self, image: Union[Image.Image, np.ndarray], batch_size: int = None,
+                                  use_ai_correction: bool = True, tiled: Optional[bool] = None,
+                                  languages: Optional[Iterable[str]] = None,
+                                  preset: str = "high_accuracy") -> str:
         """
         Perform OCR using TrOCR for high accuracy on handwriting
         
         Args:
             image: PIL Image or numpy array
+            batch_size: Line crops per TrOCR forward pass (defaults to TROCR_BATCH_SIZE)
+            use_ai_correction: Post-correct the text with Gemini when available
+            tiled: Tiled detection for very large scans (None = by image size)
+            languages: EasyOCR detection languages (None = detect the page's script)
+            preset: TrOCR decoding, "high_accuracy" or greedy "fast_handwriting"
         """
         processor, model = get_trocr_model()
         if not processor or not model:
             return "TrOCR model could not be loaded. Please check internet connection or cached models."
             
         try:
-            # Prepare image
-            if isinstance(image, np.ndarray):
-                image = Image.fromarray(image)
-            if image.mode != "RGB":
-                image = image.convert("RGB")
-                
-            # TrOCR works best on line crops. 
-            # For a full page, we strictly need segmentation first.
-            # For now, we will use EasyOCR for detection/segmentation, and TrOCR for recognition of chunks.
-            
-            # 1. Use EasyOCR for detection (getting bounding boxes) 
-            processed_img = self.preprocess_image(image)
-            reader = get_ocr_reader()
-            boxes = reader.readtext(processed_img, detail=1, paragraph=False) 
-            
-            # Check for GPU
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            model.to(device)
+            return self._high_accuracy_ocr(image, batch_size=batch_size, use_ai_correction=use_ai_correction,
+                                           tiled=tiled, languages=languages, preset=preset)
+        except TaskCancelled:
+            raise
+        except Exception as e:
+            logging.error(f"High accuracy OCR failed processing: {str(e)}")
+            return f"Error: {str(e)}"
+
+    def _high_accuracy_ocr(self, image: Union[Image.Image, np.ndarray], batch_size: int = None,
+                           use_ai_correction: bool = True, tiled: Optional[bool] = None,
+                           languages: Optional[Iterable[str]] = None, preset: str = "high_accuracy") -> str:
+        """TrOCR pipeline behind perform_high_accuracy_ocr; raises on failure"""
+        layout = self._high_accuracy_layout(image, batch_size=batch_size, tiled=tiled, languages=languages,
+                                            preset=preset)
+        return self._correct_text(layout["text"], use_ai_correction)
+
+    def _high_accuracy_layout(self, image: Union[Image.Image, np.ndarray], batch_size: int = None,
+                              tiled: Optional[bool] = None, languages: Optional[Iterable[str]] = None,
+                              preset: str = "high_accuracy") -> dict:
+        """
+        EasyOCR detection with TrOCR recognition, grouped by analyze_layout
+        
+        TrOCR replaces each box's text but not its confidence: the score is
+        EasyOCR's probability for the region, as generate() returns no
+        per-sequence score to compare it with.
+        """
+        # Prepare image
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
             
-            final_results = []
+        # TrOCR works best on line crops. 
+        # For a full page, we strictly need segmentation first.
+        # For now, we will use EasyOCR for detection/segmentation, and TrOCR for recognition of chunks.
+        
+        # 1. Use EasyOCR for detection (getting bounding boxes), tile by tile on huge scans
+        boxes = self.detect_text(image, tiled=tiled, languages=languages)
+        
+        # 2. Batched recognition with TrOCR
+        regions = self.crop_text_regions(image, boxes)
+        texts = self.recognize_crops([crop for _, crop in regions], batch_size=batch_size, preset=preset)
+        
+        final_results = []
+        for (box, _), generated_text in zip(regions, texts):
+            if generated_text is None:
+                # Fallback to EasyOCR text
+                final_results.append(box)
+            else:
+                # Keep the bbox and EasyOCR's confidence but replace text
+                final_results.append((box[0], generated_text, box[2]))
             
-            for box in boxes:
-                bbox = box[0]
-                # Crop the text region
-                try:
-                    x_min = max(0, int(min([p[0] for p in bbox])))
-                    x_max = int(max([p[0] for p in bbox]))
-                    y_min = max(0, int(min([p[1] for p in bbox])))
-                    y_max = int(max([p[1] for p in bbox]))
-                    
-                    if x_max - x_min < 5 or y_max - y_min < 5:
-                        # Skip tiny boxes
-                        continue
-                        
-                    cropped_img = image.crop((x_min, y_min, x_max, y_max))
-                    
-                    # Recognition with TrOCR
-                    pixel_values = processor(images=cropped_img, return_tensors="pt").pixel_values.to(device)
-                    generated_ids = model.generate(pixel_values)
-                    generated_text = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
-                    
-                    # Keep the bbox but replace text
-                    final_results.append((bbox, generated_text, 1.0))
-                except Exception as text_err:
-                    logging.warning(f"Failed to recognize box: {text_err}")
-                    # Fallback to EasyOCR text
-                    final_results.append(box)
-                
-            # Reconstruct layout with new high-acc text
-            text = self.reconstruct_layout(final_results)
+        # Reconstruct layout with new high-acc text
+        return self.analyze_layout(final_results)
+
+    def cache_key(self, image: Union[Image.Image, np.ndarray], mode: str = "standard",
+                  use_ai_correction: bool = True, languages: Optional[Iterable[str]] = None,
+                  output_format: str = "text") -> str:
+        """
+        Build the result-cache key for an image and OCR settings
+        
+        The key hashes the decoded pixels, so re-encoded uploads of the same scan hit.
+        Detected languages are a function of the pixels, so they key as "auto".
+        """
+        language_key = ",".join(normalize_languages(languages)) if languages else "auto"
+        if output_format == "text":
+            return image_cache_key(image, mode, use_ai_correction, language_key)
+        return image_cache_key(image, mode, use_ai_correction, language_key, output_format)
+
+    def recognize(self, image: Union[Image.Image, np.ndarray], mode: str = "standard",
+                  use_ai_correction: bool = True, cache_key: str = None,
+                  languages: Optional[Iterable[str]] = None,
+                  output_format: str = "text") -> Union[str, dict]:
+        """
+        Perform OCR in the given mode, serving repeated images from the result cache
+        
+        Args:
+            image: PIL Image or numpy array
+            mode: "standard" (EasyOCR), "high_accuracy" (TrOCR) or "fast_handwriting"
+                (TrOCR with greedy, length-capped decoding)
+            use_ai_correction: Post-correct the text with Gemini when available
+            cache_key: Precomputed cache_key() for a caller that has already checked the cache
+            languages: Reader languages (None = detect the page's script)
+            output_format: "text", or "structured" for the text plus its columnar
+                layout (see modules.ocr_layout.encode_layout)
             
-            # AI Enhancement
-            gemini = GeminiClient()
-            if gemini.is_ready:
-                return gemini.correct_ocr_text(text)
-                
-            return text
+        Returns:
+            Recognized text as string, or {"text", "layout"} for "structured".
+            Layout words are the recognizer's; only "text" is AI-corrected.
             
-        except Exception as e:
-            logging.error(f"High accuracy OCR failed processing: {str(e)}")
-            return f"Error: {str(e)}"
+        Raises:
+            ValueError: For an unknown output format
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}', expected one of {', '.join(OUTPUT_FORMATS)}")
+        cache = get_ocr_cache()
+        key = cache_key
+        if key is None:
+            key = self.cache_key(image, mode, use_ai_correction, languages, output_format)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
+        checkpoint()
+        if mode in TROCR_MODES:
+            processor, model = get_trocr_model()
+            if not processor or not model:
+                raise RuntimeError("TrOCR model could not be loaded. Please check internet connection or cached models.")
+            layout = self._high_accuracy_layout(image, languages=languages, preset=mode)
+        else:
+            layout = self._standard_layout(image, languages=languages)
+        
+        text = self._correct_text(layout["text"], use_ai_correction)
+        result = text if output_format == "text" else {"text": text, "layout": encode_layout(layout)}
+        cache.put(key, result)
+        return result
     
     def perform_math_ocr(self, image: Union[Image.Image, np.ndarray]) -> str:
         """
@@ -291,7 +445,7 @@ class OCRModule:
 def preload_models():
     """Explicitly lazy-load models into memory"""
     logging.info("Preloading OCR models...")
-    get_ocr_reader()
+    preload_ocr_readers()
     # Optional: Preload TrOCR too if we want it warm (consumes RAM)
     # get_trocr_model()
     logging.info("OCR models preloaded.")
@@ -0,0 +1,277 @@
+"""
+OCR Layout Module
+Groups (bbox, text, prob) detection results into columns, lines and words
+and rebuilds the page text in reading order
+"""
+from itertools import chain
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core.config import OCR_LAYOUT_COLUMNS, OCR_LAYOUT_COLUMN_GAP
+
+SPANNING = -1  # Column of a box that crosses a gutter (titles, full-width rules)
+
+def box_geometry(results: List[tuple]) -> Dict[str, np.ndarray]:
+    """
+    Per-box geometry as float arrays, computed once per page
+
+    Returns:
+        Dict of x0, y0, x1, y1 (axis-aligned bounds), cx, cy (centroid),
+        height (mean side length), slope (top edge dy/dx) and confidence arrays
+    """
+    points = chain.from_iterable(chain.from_iterable(r[0] for r in results))
+    quads = np.fromiter(points, dtype=np.float64, count=8 * len(results)).reshape(len(results), 4, 2)
+    xs, ys = quads[:, :, 0], quads[:, :, 1]
+    left = quads[:, 3] - quads[:, 0]
+    right = quads[:, 2] - quads[:, 1]
+    top = quads[:, 1] - quads[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(top[:, 0] > 0, top[:, 1] / top[:, 0], 0.0)
+    return {
+        "x0": xs.min(axis=1), "y0": ys.min(axis=1), "x1": xs.max(axis=1), "y1": ys.max(axis=1),
+        "cx": xs.mean(axis=1), "cy": ys.mean(axis=1),
+        "height": (np.hypot(left[:, 0], left[:, 1]) + np.hypot(right[:, 0], right[:, 1])) / 2,
+        "slope": slope,
+        "confidence": np.asarray([float(r[2]) for r in results], dtype=np.float64),
+    }
+
+def estimate_skew(geometry: Dict[str, np.ndarray], max_slope: float = 0.3) -> float:
+    """
+    Page skew as a slope, the median top-edge slope of clearly horizontal boxes
+
+    Axis-aligned boxes carry no orientation, so their pages read as unskewed.
+    """
+    height = geometry["height"]
+    reliable = (geometry["x1"] - geometry["x0"] > 2 * height) & (height > 0)
+    if not reliable.any():
+        return 0.0
+    return float(np.clip(np.median(geometry["slope"][reliable]), -max_slope, max_slope))
+
+def _line_centres(cy: np.ndarray, tolerance: float) -> np.ndarray:
+    """Mean centroid of each run of sorted centroids no more than `tolerance` apart"""
+    cy = np.sort(cy)
+    starts = np.flatnonzero(np.r_[True, np.diff(cy) > tolerance])
+    return np.add.reduceat(cy, starts) / np.diff(np.r_[starts, len(cy)])
+
+def rows_align(left_cy: np.ndarray, right_cy: np.ndarray, tolerance: float, min_aligned: float = 0.5) -> bool:
+    """
+    Whether the lines on two sides of a gap sit at the same heights, like table rows
+
+    True when at least `min_aligned` of the lines on the side with fewer
+    lines have a line on the other side within `tolerance`.
+    """
+    left, right = _line_centres(left_cy, tolerance), _line_centres(right_cy, tolerance)
+    if len(left) > len(right):
+        left, right = right, left
+    nearest = np.abs(left[:, None] - right[None, :]).min(axis=1)
+    return bool(np.count_nonzero(nearest <= tolerance) >= min_aligned * len(left))
+
+def detect_columns(geometry: Dict[str, np.ndarray], min_gap: float, max_straddle: float = 0.1,
+                   min_column_boxes: int = 3, cy: Optional[np.ndarray] = None,
+                   align_tolerance: float = 0.0, table_gap: float = 0.5) -> np.ndarray:
+    """
+    Column index per box, left to right, SPANNING for boxes that cross a gutter
+
+    A gutter is a vertical strip of at least `min_gap` pixels that no box
+    narrower than half the text block overlaps. Wide boxes are left out so
+    a title above the columns does not close the gutter; a gutter crossed by
+    more than `max_straddle` of all boxes is ordinary wide text instead, and
+    one with fewer than `min_column_boxes` boxes on a side is dropped too
+    (a page number in the margin is not a column).
+
+    With `cy` (de-skewed centroids), a gap is a form or table, read row by
+    row, when its two sides have their lines at the same heights (within
+    `align_tolerance`, see rows_align) and the gap is wider than `table_gap`
+    times the narrower side: labels, values and table cells are short next
+    to the space between them, while typeset columns, which usually share a
+    line pitch too, are several times wider than their gutter.
+    """
+    x0, x1 = geometry["x0"], geometry["x1"]
+    n = len(x0)
+    column = np.zeros(n, dtype=np.intp)
+    if n < 2:
+        return column
+    narrow = np.flatnonzero(x1 - x0 <= (x1.max() - x0.min()) / 2)
+    if len(narrow) < 2:
+        return column
+
+    # Sweep the narrow boxes left to right; a gutter opens where the next box
+    # starts past everything seen so far
+    order = narrow[np.argsort(x0[narrow], kind="stable")]
+    reach = np.maximum.accumulate(x1[order])
+    starts = x0[order]
+    at = np.flatnonzero(starts[1:] - reach[:-1] >= min_gap)
+    if not len(at):
+        return column
+    left, right = reach[at], starts[at + 1]
+
+    straddle = (x0[:, None] < right[None, :]) & (x1[:, None] > left[None, :])
+    keep = straddle.sum(axis=0) <= max_straddle * n
+    left, right, straddle = left[keep], right[keep], straddle[:, keep]
+
+    spanning = straddle.any(axis=1)
+    column = np.searchsorted(right, x0, side="right")
+    counts = np.bincount(column[~spanning], minlength=len(right) + 1)
+    keep = (counts[:-1] >= min_column_boxes) & (counts[1:] >= min_column_boxes)
+    if cy is not None:
+        side, side_cy = column[~spanning], cy[~spanning]
+        side_x0, side_x1 = x0[~spanning], x1[~spanning]
+        for gap in np.flatnonzero(keep):
+            lhs, rhs = side == gap, side == gap + 1
+            narrower = min(side_x1[lhs].max() - side_x0[lhs].min(), side_x1[rhs].max() - side_x0[rhs].min())
+            if right[gap] - left[gap] > table_gap * narrower and \
+                    rows_align(side_cy[lhs], side_cy[rhs], align_tolerance):
+                keep[gap] = False
+    if not keep.any():
+        return np.zeros(n, dtype=np.intp)
+    left, right, straddle = left[keep], right[keep], straddle[:, keep]
+
+    column = np.searchsorted(right, x0, side="right")
+    column[straddle.any(axis=1)] = SPANNING
+    return column
+
+def group_lines(cy: np.ndarray, column: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Line index per box: boxes of one column whose sorted (de-skewed) centroids
+    are within `threshold` of their neighbour share a line
+    """
+    order = np.lexsort((cy, column))
+    breaks = np.ones(len(cy), dtype=bool)
+    breaks[1:] = (np.diff(cy[order]) > threshold) | (np.diff(column[order]) != 0)
+    line = np.empty(len(cy), dtype=np.intp)
+    line[order] = np.cumsum(breaks) - 1
+    return line
+
+def reading_order(line: np.ndarray, column: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    """
+    Rank of each line in reading order
+
+    Spanning lines cut the page into bands; each band is read column by
+    column, top to bottom, before the spanning line below it.
+    """
+    count = int(line.max()) + 1
+    sizes = np.bincount(line, minlength=count)
+    line_cy = np.bincount(line, weights=cy, minlength=count) / sizes
+    line_column = np.empty(count, dtype=np.intp)
+    line_column[line] = column
+    spanning = line_column == SPANNING
+    band = np.searchsorted(np.sort(line_cy[spanning]), line_cy)
+    band = np.where(spanning, 2 * band + 1, 2 * band)
+    rank = np.empty(count, dtype=np.intp)
+    rank[np.lexsort((line_cy, line_column, band))] = np.arange(count)
+    return rank
+
+def analyze_layout(results: List[tuple], columns: bool = OCR_LAYOUT_COLUMNS,
+                   column_gap: float = OCR_LAYOUT_COLUMN_GAP, line_factor: float = 0.5,
+                   space_px: float = 10) -> dict:
+    """
+    Group OCR results into columns, lines and words in reading order
+
+    Box geometry is gathered into arrays once; lines are split where the
+    sorted, de-skewed centroids of a column jump by more than `line_factor`
+    median text heights, so the whole grouping is a few O(n log n) sorts.
+    A wide gap between short, row-aligned cells (a form or table) is not a
+    column gutter, so each row stays one line with a tab at the gap.
+
+    Args:
+        results: List of (bbox, text, prob) tuples
+        columns: Detect columns (False reads each row across the whole page)
+        column_gap: Minimum gutter width, in median text heights
+        line_factor: Centroid jump that starts a new line, in median text heights
+        space_px: Gap within a line that is written as a space
+
+    Returns:
+        Dict with "text" and "columns" (count), plus "lines", each with its
+        "text", "bbox" ([x0, y0, x1, y1]), "column" (SPANNING across a gutter),
+        mean "confidence" and "words" ("text", "bbox", "confidence")
+    """
+    if not results:
+        return {"text": "", "columns": 0, "lines": []}
+
+    geometry = box_geometry(results)
+    median_height = float(np.median(geometry["height"])) or 20.0
+    cy = geometry["cy"] - estimate_skew(geometry) * geometry["cx"]
+
+    if columns:
+        column = detect_columns(geometry, column_gap * median_height, cy=cy,
+                                align_tolerance=line_factor * median_height)
+    else:
+        column = np.zeros(len(results), dtype=np.intp)
+    line = group_lines(cy, column, line_factor * median_height)
+    rank = reading_order(line, column, cy)[line]
+
+    # Boxes in reading order; per-line values are reductions over each run
+    order = np.lexsort((geometry["x0"], rank))
+    starts = np.flatnonzero(np.r_[True, np.diff(rank[order]) != 0])
+    ends = np.r_[starts[1:], len(order)]
+    left, top = np.floor(geometry["x0"][order]), np.floor(geometry["y0"][order])
+    right, bottom = np.ceil(geometry["x1"][order]), np.ceil(geometry["y1"][order])
+    confidence = geometry["confidence"][order]
+
+    word_boxes = np.stack([left, top, right, bottom], axis=1).astype(np.int64).tolist()
+    line_boxes = np.stack([
+        np.minimum.reduceat(left, starts), np.minimum.reduceat(top, starts),
+        np.maximum.reduceat(right, starts), np.maximum.reduceat(bottom, starts),
+    ], axis=1).astype(np.int64).tolist()
+    line_confidence = (np.add.reduceat(confidence, starts) / (ends - starts)).tolist()
+    line_column = column[order][starts].tolist()
+
+    # Separator before each word: wide gaps (tab stops, form fields) are kept as tabs
+    gap = np.empty(len(order))
+    gap[1:] = geometry["x0"][order][1:] - geometry["x1"][order][:-1]
+    gap[starts] = 0
+    separators = np.select([gap > median_height, gap > space_px], [" \t ", " "], "").tolist()
+    texts = [results[i][1] for i in order.tolist()]
+    word_confidence = confidence.tolist()
+
+    lines = []
+    for k, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        lines.append({
+            "text": "".join(separators[i] + texts[i] for i in range(start, end)),
+            "bbox": line_boxes[k],
+            "column": line_column[k],
+            "confidence": line_confidence[k],
+            "words": [
+                {"text": texts[i], "bbox": word_boxes[i], "confidence": word_confidence[i]}
+                for i in range(start, end)
+            ],
+        })
+
+    return {
+        "text": "\n".join(entry["text"] for entry in lines),
+        "columns": int(column.max()) + 1,
+        "lines": lines,
+    }
+
+def encode_layout(layout: dict, precision: int = 3) -> dict:
+    """
+    Columnar, JSON-compact form of an analyze_layout() result
+
+    Each field is one flat list instead of an object per word, so key names
+    are not repeated for every box. Bboxes are flattened to 4 integers per
+    entry ([x0, y0, x1, y1, x0, ...]) and confidences rounded to `precision`
+    digits. Words are stored in reading order; line i owns the next
+    lines["words"][i] of them. Line text is left out; a line reads as its
+    words in order.
+
+    Returns:
+        {"columns": n, "lines": {"bbox", "column", "confidence", "words"},
+         "words": {"text", "bbox", "confidence"}}
+    """
+    lines = layout["lines"]
+    words = [word for line in lines for word in line["words"]]
+    return {
+        "columns": layout["columns"],
+        "lines": {
+            "bbox": [v for line in lines for v in line["bbox"]],
+            "column": [line["column"] for line in lines],
+            "confidence": [round(line["confidence"], precision) for line in lines],
+            "words": [len(line["words"]) for line in lines],
+        },
+        "words": {
+            "text": [word["text"] for word in words],
+            "bbox": [v for word in words for v in word["bbox"]],
+            "confidence": [round(word["confidence"], precision) for word in words],
+        },
+    }
@@ -0,0 +1,249 @@
+"""
+OCR Tiling Module
+Splits very large scans into overlapping tiles for preprocessing and text
+detection, then merges the per-tile boxes back into page coordinates
+"""
+from typing import Iterator, List, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from core.config import OCR_TILE_SIZE, OCR_TILE_OVERLAP
+
+Box = Tuple[int, int, int, int]  # (x0, y0, x1, y1), end-exclusive
+
+def _axis_starts(length: int, tile: int, overlap: int) -> List[int]:
+    """Evenly spaced tile starts, the last tile flush with the edge, overlapping by at least `overlap`"""
+    if length <= tile:
+        return [0]
+    count = -(-(length - overlap) // (tile - overlap))
+    return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+def tile_grid(width: int, height: int, tile_size: int = OCR_TILE_SIZE,
+              overlap: int = OCR_TILE_OVERLAP) -> List[Box]:
+    """
+    Overlapping tiles covering a width x height image, row by row
+
+    Raises:
+        ValueError: If the overlap leaves no step between tiles
+    """
+    if not 0 <= overlap < tile_size:
+        raise ValueError("Tile overlap must be smaller than the tile size")
+    return [
+        (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+        for y0 in _axis_starts(height, tile_size, overlap)
+        for x0 in _axis_starts(width, tile_size, overlap)
+    ]
+
+def image_size(image: Union[Image.Image, np.ndarray]) -> Tuple[int, int]:
+    if isinstance(image, Image.Image):
+        return image.size
+    return image.shape[1], image.shape[0]
+
+def tile_gray(image: Union[Image.Image, np.ndarray], box: Box) -> np.ndarray:
+    """Grayscale copy of one tile, converting only the tile's pixels"""
+    x0, y0, x1, y1 = box
+    if isinstance(image, Image.Image):
+        crop = image.crop(box)
+        if crop.mode == "L":
+            return np.asarray(crop)
+        if crop.mode != "RGB":
+            crop = crop.convert("RGB")
+        return cv2.cvtColor(np.asarray(crop), cv2.COLOR_RGB2GRAY)
+    tile = image[y0:y1, x0:x1]
+    if len(tile.shape) == 3:
+        return cv2.cvtColor(tile, cv2.COLOR_RGB2GRAY)
+    return tile
+
+def downscaled_gray(image: Union[Image.Image, np.ndarray], max_dim: int = 2048) -> np.ndarray:
+    """Grayscale copy of the whole image, shrunk to at most max_dim on its longer side"""
+    width, height = image_size(image)
+    scale = min(1.0, max_dim / max(width, height))
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    if isinstance(image, Image.Image):
+        small = image if scale == 1.0 else image.resize(size, Image.BOX)
+        return tile_gray(small, (0, 0) + small.size)
+    small = image if scale == 1.0 else cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    return tile_gray(small, (0, 0, size[0], size[1]))
+
+def page_threshold(image: Union[Image.Image, np.ndarray], max_dim: int = 2048) -> float:
+    """
+    Otsu threshold of the whole page, estimated on a downscaled copy
+
+    One threshold for every tile keeps the binarization consistent across
+    seams, where per-tile Otsu would shift with each tile's ink coverage.
+    """
+    blurred = cv2.GaussianBlur(downscaled_gray(image, max_dim), (5, 5), 0)
+    threshold, _ = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return threshold
+
+def iter_preprocessed_tiles(image: Union[Image.Image, np.ndarray], tile_size: int = OCR_TILE_SIZE,
+                            overlap: int = OCR_TILE_OVERLAP) -> Iterator[Tuple[Box, np.ndarray]]:
+    """
+    Yield (tile box, binary tile) pairs, preprocessed like OCRModule.preprocess_image
+
+    Only one tile's grayscale, blurred and binary arrays exist at a time.
+    """
+    width, height = image_size(image)
+    threshold = page_threshold(image)
+    for box in tile_grid(width, height, tile_size, overlap):
+        blurred = cv2.GaussianBlur(tile_gray(image, box), (5, 5), 0)
+        _, binary = cv2.threshold(blurred, threshold, 255, cv2.THRESH_BINARY)
+        yield box, binary
+
+def shift_results(results: List[tuple], dx: int, dy: int) -> List[tuple]:
+    """Move (bbox, text, prob) results from tile to page coordinates"""
+    return [([[x + dx, y + dy] for x, y in bbox], text, prob) for bbox, text, prob in results]
+
+def touches_inner_edge(bbox, tile: Box, width: int, height: int, margin: int = 2) -> bool:
+    """True if a page-coordinate bbox reaches a tile edge that has a neighbouring tile (likely cut off)"""
+    x0, y0, x1, y1 = tile
+    xs = [p[0] for p in bbox]
+    ys = [p[1] for p in bbox]
+    return ((x0 > 0 and min(xs) <= x0 + margin) or (x1 < width and max(xs) >= x1 - margin)
+            or (y0 > 0 and min(ys) <= y0 + margin) or (y1 < height and max(ys) >= y1 - margin))
+
+def _rect(bbox) -> Tuple[float, float, float, float]:
+    xs = [p[0] for p in bbox]
+    ys = [p[1] for p in bbox]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def _word_centres(text: str, x0: float, x1: float) -> List[Tuple[str, float]]:
+    """Words of a box's text with their x centres, assuming evenly spaced characters"""
+    pitch = (x1 - x0) / max(len(text), 1)
+    words, start = [], None
+    for i, char in enumerate(text + " "):
+        if char.isspace():
+            if start is not None:
+                words.append((text[start:i], x0 + pitch * (start + i) / 2))
+                start = None
+        elif start is None:
+            start = i
+    return words
+
+def _join_pieces(left: dict, right: dict) -> dict:
+    """
+    One box from two pieces of a line cut at a vertical seam
+
+    Both tiles read the words inside their overlap. The longest run of words
+    that ends the left piece and starts the right one (either piece's outer
+    word may be cut off at its tile edge and is skipped) is written once.
+    Without such a run, each word comes from the piece whose copy of it
+    lies on its side of the overlap's middle.
+    """
+    lx0, ly0, lx1, ly1 = left["rect"]
+    rx0, ry0, rx1, ry1 = right["rect"]
+    left_words = _word_centres(left["text"], lx0, lx1)
+    right_words = _word_centres(right["text"], rx0, rx1)
+    slack = (lx1 - rx0) / 2
+    tail = sum(1 for _, centre in left_words if centre >= rx0 - slack)
+    head = sum(1 for _, centre in right_words if centre <= lx1 + slack)
+    lw = [w for w, _ in left_words]
+    rw = [w for w, _ in right_words]
+
+    best = None  # (run length, left words dropped, right words dropped)
+    for drop_left in (0, 1):
+        for drop_right in (0, 1):
+            end = len(lw) - drop_left
+            for k in range(min(tail - drop_left, head - drop_right), 0, -1):
+                if lw[end - k:end] == rw[drop_right:drop_right + k]:
+                    if best is None or k > best[0]:
+                        best = (k, drop_left, drop_right)
+                    break
+    if best is not None:
+        k, drop_left, drop_right = best
+        words = lw[:len(lw) - drop_left] + rw[drop_right + k:]
+    else:
+        middle = (rx0 + lx1) / 2
+        words = [w for w, centre in left_words if centre < middle]
+        words += [w for w, centre in right_words if centre >= middle]
+
+    rect = (min(lx0, rx0), min(ly0, ry0), max(lx1, rx1), max(ly1, ry1))
+    return {
+        "rect": rect, "text": " ".join(words), "prob": min(left["prob"], right["prob"]),
+        "open_left": left["open_left"], "open_right": right["open_right"], "right_tile": right["right_tile"],
+        "joined": True,
+    }
+
+def _joinable(left: dict, right: dict) -> bool:
+    """Pieces cut at facing tile edges that overlap on the same line"""
+    if not (left["open_right"] and right["open_left"]) or right["right_tile"] <= left["right_tile"]:
+        return False
+    lx0, ly0, lx1, ly1 = left["rect"]
+    rx0, ry0, rx1, ry1 = right["rect"]
+    shared_height = min(ly1, ry1) - max(ly0, ry0)
+    return rx0 < lx1 < rx1 and shared_height > 0.5 * min(ly1 - ly0, ry1 - ry0)
+
+def merge_tile_results(tile_results: List[Tuple[Box, List[tuple]]], width: int, height: int,
+                       overlap_threshold: float = 0.5) -> List[tuple]:
+    """
+    Merge per-tile (bbox, text, prob) results, already in page coordinates
+
+    Text inside an overlap band is detected by both tiles, and text crossing
+    a seam is cut off by at least one of them. A line cut at a vertical seam
+    is rebuilt from its pieces: a piece ending at a tile's inner right edge
+    and a piece starting at the next tile's inner left edge that overlap on
+    the same line become one box (see _join_pieces), repeatedly for lines
+    crossing several seams. Other boxes that reach an inner tile edge are
+    treated as partial and only used where no complete box covers the same
+    area; among boxes that overlap by more than `overlap_threshold` of the
+    smaller one, the larger (then more confident) box is kept.
+    """
+    pieces = []
+    for tile, results in tile_results:
+        tx0, _, tx1, _ = tile
+        for result in results:
+            rect = _rect(result[0])
+            pieces.append({
+                "rect": rect, "text": result[1], "prob": float(result[2]), "result": result,
+                "open_left": tx0 > 0 and rect[0] <= tx0 + 2,
+                "open_right": tx1 < width and rect[2] >= tx1 - 2,
+                "right_tile": tx1, "joined": False,
+                "partial": touches_inner_edge(result[0], tile, width, height),
+            })
+
+    # Join seam pieces left to right; a joined box keeps the open end of its right piece
+    pieces.sort(key=lambda p: p["rect"][0])
+    open_left = [j for j, piece in enumerate(pieces) if piece["open_left"]]
+    used = [False] * len(pieces)
+    for i, piece in enumerate(pieces):
+        if used[i]:
+            continue
+        while piece["open_right"]:
+            match = next((j for j in open_left if not used[j] and j != i and _joinable(piece, pieces[j])), None)
+            if match is None:
+                break
+            used[match] = True
+            piece = _join_pieces(piece, pieces[match])
+        pieces[i] = piece
+    pieces = [piece for piece, joined_away in zip(pieces, used) if not joined_away]
+
+    candidates = []
+    for piece in pieces:
+        rect = piece["rect"]
+        area = max(0, rect[2] - rect[0]) * max(0, rect[3] - rect[1])
+        if piece["joined"]:
+            x0, y0, x1, y1 = rect
+            result = ([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], piece["text"], piece["prob"])
+            partial = piece["open_left"] or piece["open_right"]
+        else:
+            result, partial = piece["result"], piece["partial"]
+        candidates.append((partial, -area, -piece["prob"], rect, result))
+    candidates.sort(key=lambda c: c[:3])
+
+    kept = []
+    rects = np.empty((len(candidates), 4), dtype=np.float64)
+    for _, neg_area, _, rect, result in candidates:
+        if kept:
+            others = rects[:len(kept)]
+            iw = np.minimum(others[:, 2], rect[2]) - np.maximum(others[:, 0], rect[0])
+            ih = np.minimum(others[:, 3], rect[3]) - np.maximum(others[:, 1], rect[1])
+            inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+            other_areas = (others[:, 2] - others[:, 0]) * (others[:, 3] - others[:, 1])
+            smaller = np.maximum(np.minimum(other_areas, -neg_area), 1)
+            if (inter / smaller > overlap_threshold).any():
+                continue
+        rects[len(kept)] = rect
+        kept.append(result)
+    return kept
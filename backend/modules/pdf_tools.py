@@ -5,20 +5,66 @@ Handles standard PDF operations: Merge, Split, Watermark, Compress
 import os
 import fitz # PyMuPDF
 import pikepdf
+from PIL import Image
 from pathlib import Path
-from typing import List, Union
+from typing import List, Union, Dict, Optional, Callable
+from core.config import PDF_MERGE_FLUSH_EVERY
+from modules.redaction import RedactionEngine
+from services.cancellation import checkpoint
 
 class PDFTools:
     def __init__(self):
         pass
 
-    def merge_pdfs(self, pdf_paths: List[str], output_path: str):
-        """Merge multiple PDFs into one"""
-        merged_pdf = fitz.open()
-        for path in pdf_paths:
-            doc = fitz.open(path)
-            merged_pdf.insert_pdf(doc)
-        merged_pdf.save(output_path)
+    def merge_pdfs(self, pdf_paths: List[str], output_path: str, flush_every: int = PDF_MERGE_FLUSH_EVERY,
+                   progress_callback: Optional[Callable[[int, int], None]] = None):
+        """
+        Merge multiple PDFs into one, streaming inputs through memory
+        
+        Each source is closed right after its pages are copied, and every
+        `flush_every` inputs the partial result is appended to disk with an
+        incremental save and reopened, so memory stays bounded for any number
+        of inputs.
+        
+        Args:
+            pdf_paths: Input PDF paths, in merge order
+            output_path: Destination path
+            flush_every: Inputs merged between incremental saves (0 = only at the end)
+            progress_callback: Called as progress_callback(done, total) after each input
+        """
+        total = len(pdf_paths)
+        merged = fitz.open()
+        on_disk = False
+        pending = 0
+        try:
+            for done, path in enumerate(pdf_paths, 1):
+                checkpoint()
+                with fitz.open(path) as doc:
+                    merged.insert_pdf(doc)
+                pending += 1
+                
+                if flush_every and pending >= flush_every and done < total:
+                    if on_disk:
+                        merged.saveIncr()
+                    else:
+                        merged.save(output_path, deflate=True)
+                        on_disk = True
+                    merged.close()
+                    # Release MuPDF's cached fonts/images from the flushed inputs
+                    fitz.TOOLS.store_shrink(100)
+                    merged = fitz.open(output_path)
+                    pending = 0
+                
+                if progress_callback:
+                    progress_callback(done, total)
+            
+            if on_disk:
+                if pending:
+                    merged.saveIncr()
+            else:
+                merged.save(output_path, deflate=True)
+        finally:
+            merged.close()
         return output_path
 
     def split_pdf(self, pdf_path: str, output_dir: str):
@@ -31,6 +77,7 @@ class PDFTools:
             os.makedirs(output_dir)
         
         for i in range(len(doc)):
+            checkpoint()
             new_doc = fitz.open()
             new_doc.insert_pdf(doc, from_page=i, to_page=i)
             out_name = os.path.join(output_dir, f"{base_name}_page_{i+1}.pdf")
@@ -56,16 +103,34 @@ class PDFTools:
             os.makedirs(output_dir)
 
         for i, page in enumerate(doc):
+            checkpoint()
             pix = page.get_pixmap(dpi=150)
             out_name = os.path.join(output_dir, f"{base_name}_page_{i+1}.png")
             pix.save(out_name)
             generated_files.append(out_name)
         return generated_files
 
+    def page_count(self, pdf_bytes: bytes) -> int:
+        """Number of pages in an in-memory PDF"""
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return len(doc)
+
+    def render_page(self, pdf_bytes: bytes, page_index: int, dpi: int = 150) -> Image.Image:
+        """
+        Rasterize one page of an in-memory PDF without touching disk
+        
+        Each call opens its own document handle, so pages can be rendered
+        from several threads at once (MuPDF documents are not thread-safe).
+        """
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            pix = doc[page_index].get_pixmap(dpi=dpi)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
     def images_to_pdf(self, image_paths: List[str], output_path: str):
         """Convert list of images to a single PDF"""
         doc = fitz.open()
         for img_path in image_paths:
+            checkpoint()
             img = fitz.open(img_path)
             rect = img[0].rect
             pdfbytes = img.convert_to_pdf()
@@ -86,6 +151,7 @@ class PDFTools:
         """Add text watermark to center of every page"""
         doc = fitz.open(input_pdf)
         for page in doc:
+            checkpoint()
             # Calculate center
             rect = page.rect
             center = fitz.Point(rect.width/2, rect.height/2)
@@ -104,27 +170,23 @@ class PDFTools:
 
     def redact_text(self, pdf_path: str, redactions: List[str], output_path: str):
         """Redact specific text from the PDF"""
-        doc = fitz.open(pdf_path)
-        
-        for page in doc:
-            for text in redactions:
-                # Search for the text
-                areas = page.search_for(text)
-                
-                # Add redaction annotation for each occurrence
-                for area in areas:
-                    page.add_redact_annot(area, fill=(0, 0, 0)) # Black box
-            
-            # Apply redactions
-            page.apply_redactions()
-            
-        doc.save(output_path)
+        self.redact_terms(pdf_path, redactions, output_path)
         return output_path
 
+    def redact_terms(self, pdf_path: str, redactions: List[str], output_path: str) -> Dict[str, int]:
+        """
+        Redact all terms in a single pass per page
+        
+        Returns:
+            Hit count per term
+        """
+        return RedactionEngine(redactions).redact(pdf_path, output_path)
+
     def extract_text(self, pdf_path: str) -> str:
-        """Extract all text from PDF for analysis"""
+        """Extract all text from PDF for analysis (pages separated by form feeds)"""
         doc = fitz.open(pdf_path)
         text = ""
         for page in doc:
-            text += page.get_text() + "\n"
+            checkpoint()
+            text += page.get_text() + "\n\f"
         return text
@@ -0,0 +1,261 @@
+"""
+Redaction Engine Module
+Single-pass multi-term PDF redaction: each page's words are extracted once and
+matched against all terms at the same time with an Aho-Corasick automaton.
+"""
+import bisect
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from core.config import REDACTION_WORKERS, REDACTION_PARALLEL_MIN_PAGES
+from services.cancellation import checkpoint
+
+# Joins words of different text blocks; terms are whitespace-collapsed, so no term contains it
+BLOCK_SEPARATOR = "\n"
+
+def normalize_text(text: str) -> str:
+    """Case-fold and collapse whitespace the same way for terms and page text"""
+    return " ".join(text.casefold().split())
+
+def fold_word(word: str) -> Tuple[str, Optional[List[int]]]:
+    """
+    Case-fold one word, keeping track of where each folded character came from
+    
+    Returns:
+        (folded word, original index per folded character, or None when
+        folding kept every character's position, as it does for most words)
+    """
+    folded = word.casefold()
+    if len(folded) == len(word):
+        return folded, None
+    offsets = []
+    for index, char in enumerate(word):
+        offsets.extend([index] * len(char.casefold()))
+    return folded, offsets
+
+class MultiPatternMatcher:
+    """Aho-Corasick automaton finding every occurrence of many patterns in one scan"""
+    
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]  # pattern ids ending at each state
+        
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            if pattern:
+                self.output[state].append(pattern_id)
+        
+        # Breadth-first construction of failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+    
+    def find_all(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Find all pattern occurrences
+        
+        Returns:
+            List of (start, end, pattern_id) with end exclusive
+        """
+        matches = []
+        state = 0
+        goto, fail, output, patterns = self.goto, self.fail, self.output, self.patterns
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                matches.append((index + 1 - len(patterns[pattern_id]), index + 1, pattern_id))
+        return matches
+
+def match_page_words(words: List[tuple], matcher: MultiPatternMatcher) -> Tuple[List[tuple], Dict[int, int]]:
+    """
+    Match all patterns against one page's words
+    
+    Words of one text block are joined by spaces, so a term can run across
+    lines, but never from one block into an unrelated one.
+    
+    Args:
+        words: page.get_text("words") tuples (x0, y0, x1, y1, word, block, line, word_no)
+        matcher: Automaton built from normalized terms
+        
+    Returns:
+        (rects as (x0, y0, x1, y1) tuples, hits per pattern id)
+    """
+    starts = []
+    parts = []
+    offsets = []
+    pieces = []
+    position = 0
+    block = None
+    for word in words:
+        text, word_offsets = fold_word(word[4])
+        if pieces:
+            pieces.append(" " if word[5] == block else BLOCK_SEPARATOR)
+        block = word[5]
+        starts.append(position)
+        parts.append(text)
+        offsets.append(word_offsets)
+        pieces.append(text)
+        position += len(text) + 1
+    page_text = "".join(pieces)
+    
+    rects = []
+    hits = defaultdict(int)
+    for start, end, pattern_id in matcher.find_all(page_text):
+        hits[pattern_id] += 1
+        first = bisect.bisect_right(starts, start) - 1
+        last = bisect.bisect_right(starts, end - 1) - 1
+        spans = {}
+        for index in range(first, last + 1):
+            x0, y0, x1, y1, text = words[index][:5]
+            # Clip the match to this word (partial-word hits), in folded characters
+            char_start = max(start - starts[index], 0)
+            char_end = min(end - starts[index], len(parts[index]))
+            if offsets[index] is not None:
+                # Back to positions in the original word
+                char_start, char_end = offsets[index][char_start], offsets[index][char_end - 1] + 1
+            length = max(1, len(text))
+            # Scale to the word's width
+            left = x0 + (x1 - x0) * char_start / length
+            right = x0 + (x1 - x0) * char_end / length
+            line_key = words[index][5:7]
+            if line_key in spans:
+                span = spans[line_key]
+                spans[line_key] = (min(span[0], left), min(span[1], y0), max(span[2], right), max(span[3], y1))
+            else:
+                spans[line_key] = (left, y0, right, y1)
+        rects.extend(spans.values())
+    return rects, dict(hits)
+
+def _scan_pages(pdf_path: str, first_page: int, last_page: int, matcher: MultiPatternMatcher):
+    """Extract words and match terms for a page range (runs in worker processes)"""
+    results = []
+    with fitz.open(pdf_path) as doc:
+        for page_index in range(first_page, last_page):
+            checkpoint()
+            rects, hits = match_page_words(doc[page_index].get_text("words"), matcher)
+            results.append((page_index, rects, hits))
+    return results
+
+# Shared worker pool for large documents
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=REDACTION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_pool():
+    """Stop the shared worker pool (called on application shutdown)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+class RedactionEngine:
+    """Redacts many terms from a PDF in one pass per page"""
+    
+    def __init__(self, terms: List[str], workers: int = REDACTION_WORKERS,
+                 parallel_min_pages: int = REDACTION_PARALLEL_MIN_PAGES):
+        self.terms = [t for t in terms if isinstance(t, str) and t.strip()]
+        self.workers = workers
+        self.parallel_min_pages = parallel_min_pages
+        
+        # Terms that normalize identically share one pattern
+        self.pattern_terms = defaultdict(list)
+        for term in self.terms:
+            self.pattern_terms[normalize_text(term)].append(term)
+        self.matcher = MultiPatternMatcher(list(self.pattern_terms))
+    
+    def find_matches(self, pdf_path: str) -> Tuple[Dict[int, List[tuple]], Dict[str, int]]:
+        """
+        Locate every term occurrence without modifying the document
+        
+        Returns:
+            ({page_index: [rect, ...]}, {term: hit count})
+        """
+        with fitz.open(pdf_path) as doc:
+            page_count = len(doc)
+        
+        if not self.terms or page_count == 0:
+            return {}, {term: 0 for term in self.terms}
+        
+        if self.workers > 1 and page_count >= self.parallel_min_pages:
+            step = max(1, -(-page_count // (self.workers * 4)))  # a few ranges per worker for balance
+            futures = [
+                _get_pool().submit(_scan_pages, pdf_path, first, min(first + step, page_count), self.matcher)
+                for first in range(0, page_count, step)
+            ]
+            scanned = []
+            try:
+                for future in futures:
+                    # Worker processes cannot see our token; check it between ranges
+                    checkpoint()
+                    scanned.extend(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        else:
+            scanned = _scan_pages(pdf_path, 0, page_count, self.matcher)
+        
+        page_rects = {}
+        counts = {term: 0 for term in self.terms}
+        for page_index, rects, hits in scanned:
+            if rects:
+                page_rects[page_index] = rects
+            for pattern_id, hit_count in hits.items():
+                for term in self.pattern_terms[self.matcher.patterns[pattern_id]]:
+                    counts[term] += hit_count
+        return page_rects, counts
+    
+    def redact(self, pdf_path: str, output_path: str) -> Dict[str, int]:
+        """
+        Black out every term occurrence and save the result
+        
+        Returns:
+            Hit count per term
+        """
+        page_rects, counts = self.find_matches(pdf_path)
+        with fitz.open(pdf_path) as doc:
+            for page_index, rects in page_rects.items():
+                checkpoint()
+                page = doc[page_index]
+                for rect in rects:
+                    page.add_redact_annot(fitz.Rect(rect), fill=(0, 0, 0))  # Black box
+                # Apply all of this page's redactions at once
+                page.apply_redactions()
+            doc.save(output_path)
+        logging.info(f"Redacted {sum(counts.values())} occurrences of {len(self.terms)} terms on {len(page_rects)} pages")
+        return counts
@@ -0,0 +1,72 @@
+"""
+Script Detection Module
+Fast pre-pass that tells Devanagari pages from Latin ones so OCR can load only the reader it needs
+"""
+from typing import Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from core.config import SUPPORTED_LANGUAGES
+from modules.ocr_tiling import downscaled_gray
+
+# Languages to read a page with, per detected script (Hindi and Marathi share Devanagari)
+SCRIPT_LANGUAGES = {
+    "latin": ("en",),
+    "devanagari": tuple(sorted(SUPPORTED_LANGUAGES)),
+}
+
+def _longest_run(row: np.ndarray) -> int:
+    """Length of the longest run of True in a 1-D boolean array"""
+    if not row.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], row.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max())
+
+def headline_counts(image: Union[Image.Image, np.ndarray], max_dim: int = 1600,
+                    min_height: int = 8) -> Tuple[int, int]:
+    """
+    Count word-like ink components, and those carrying a Devanagari headline
+
+    Devanagari letters hang from a shirorekha, a continuous stroke along the
+    top of the word, which joins a word into one component at least twice
+    as wide as it is tall with an unbroken ink row near its top. Printed
+    Latin letters are separate, narrower components, and in cursive words
+    ascenders and loops break the top row. Boxes and underlined words are
+    rejected by also requiring no such row near the bottom.
+
+    Returns:
+        (components with a headline, candidate components)
+    """
+    gray = downscaled_gray(image, max_dim)
+    _, ink = cv2.threshold(cv2.GaussianBlur(gray, (3, 3), 0), 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+
+    page_h, page_w = gray.shape
+    headlines = candidates = 0
+    for i in range(1, count):
+        x, y, w, h = (int(v) for v in stats[i, :4])
+        if h < min_height or w < 2 * h or w > page_w // 2 or h > page_h // 5:
+            continue
+        candidates += 1
+        word = labels[y:y + h, x:x + w] == i
+        band = max(2, int(h * 0.35))
+        top = max(_longest_run(row) for row in word[:band])
+        bottom = max(_longest_run(row) for row in word[-band:])
+        if top >= 0.75 * w and bottom < 0.75 * w:
+            headlines += 1
+    return headlines, candidates
+
+def detect_script(image: Union[Image.Image, np.ndarray], min_fraction: float = 0.15) -> str:
+    """Return "devanagari" if enough word components carry a headline, otherwise "latin"."""
+    headlines, candidates = headline_counts(image)
+    if headlines >= 3 and headlines >= min_fraction * candidates:
+        return "devanagari"
+    return "latin"
+
+def detect_languages(image: Union[Image.Image, np.ndarray]) -> Tuple[str, ...]:
+    """Languages for the OCR reader, from the page's script"""
+    return SCRIPT_LANGUAGES[detect_script(image)]
@@ -5,6 +5,7 @@ Handles Digital Signatures and Redaction.
 import fitz # PyMuPDF
 import os
 from datetime import datetime
+from modules.redaction import RedactionEngine
 
 # For Digital Signatures (Self-Signed for simplicity in offline demo)
 # In production, use pyHanko with proper certs
@@ -85,16 +86,5 @@ class SecurityModule:
 
     def redact_text(self, pdf_path: str, text_to_redact: str, output_path: str):
         """Redacts specific text from PDF"""
-        doc = fitz.open(pdf_path)
-        count = 0
-        
-        for page in doc:
-            areas = page.search_for(text_to_redact)
-            if areas:
-                for area in areas:
-                    page.add_redact_annot(area, fill=(0, 0, 0))
-                    count += 1
-                page.apply_redactions()
-                
-        doc.save(output_path)
-        return count, output_path
\ No newline at end of file
+        counts = RedactionEngine([text_to_redact]).redact(pdf_path, output_path)
+        return counts.get(text_to_redact, 0), output_path
@@ -6,9 +6,15 @@ import cv2
 import numpy as np
 from PIL import Image
 import logging
-from typing import Union
+from typing import Any, Dict, Iterator, Union, Optional
+import gzip
 import os
-from modules.gemini_client import GeminiClient
+from core.config import SKETCH_HISTORY_PREVIEW_BYTES, SKETCH_GZIP_LEVEL
+from modules.gemini_client import get_gemini_client
+from modules.sketch_vectorizer import label_bounding_boxes, trace_layers, quantize_colors, resolve_quantization
+from services.cancellation import checkpoint
+
+SVG_END = "\n</svg>"
 
 class SketchModule:
     """Handles conversion of sketches to SVG"""
@@ -19,10 +25,23 @@ class SketchModule:
     def rgb_to_hex(self, rgb):
         return '#{:02x}{:02x}{:02x}'.format(int(rgb[0]), int(rgb[1]), int(rgb[2]))
 
-    def image_to_svg(self, image: Union[Image.Image, np.ndarray], output_path: str = None) -> str:
+    def iter_svg(self, image: Union[Image.Image, np.ndarray], quality: Optional[str] = None,
+                 k: Optional[int] = None, attempts: Optional[int] = None,
+                 sample_size: Optional[int] = None) -> Iterator[str]:
         """
-        Convert raster image to SVG using K-Means Color Quantization
+        Vectorize a raster image using K-Means Color Quantization, yielding the SVG in pieces
+        
+        The header, each colour layer's <path> and the closing tag are separate
+        chunks, so the document never has to be held in memory at once.
+        
+        Args:
+            image: PIL Image or numpy array
+            quality: Quantization preset from SKETCH_QUALITY_PRESETS ("fast" ... "exact")
+            k, attempts, sample_size: Override the preset's colour count, k-means restarts
+                and fitting sample (0 = every pixel)
         """
+        settings = resolve_quantization(quality, k=k, attempts=attempts, sample_size=sample_size)
+        
         # Convert PIL to numpy
         if isinstance(image, Image.Image):
             if image.mode == 'RGBA':
@@ -48,76 +67,59 @@ class SketchModule:
         # Slower but better quality: d=5, sigmaColor=25, sigmaSpace=25
         blurred = cv2.bilateralFilter(img_array, 5, 25, 25)
         
-        # 3. K-Means Quantization
+        # 3. K-Means Quantization, fitted on a pixel sample and applied to every pixel
         Z = blurred.reshape((-1, 3))
         Z = np.float32(Z)
         
-        # K = 32 for "High Fidelity" (looks almost like the photo)
-        K = 64
-        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 0.5)
-        ret, label, center = cv2.kmeans(Z, K, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+        checkpoint()
+        label, center = quantize_colors(Z, settings["k"], attempts=settings["attempts"],
+                                        sample_size=settings["sample_size"])
+        K = len(center)
         
         # Reshape labels to image size
         label_img = label.reshape(blurred.shape[:2])
         center = np.uint8(center) # Color centers
+        del Z, label, blurred, img_array
         
         # 4. Generate SVG
-        height, width = blurred.shape[:2]
+        height, width = label_img.shape
         # Use width="100%" height="100%" to let it scale in the container, while preserving viewBox
-        svg_content = [f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" viewBox="0 0 {width} {height}" width="100%" height="100%" preserveAspectRatio="xMidYMid meet">']
+        yield f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" viewBox="0 0 {width} {height}" width="100%" height="100%" preserveAspectRatio="xMidYMid meet">'
         
         # Determine background color (optional, usually white or dominant)
-        svg_content.append(f'<rect width="{width}" height="{height}" fill="white"/>')
+        yield f'\n<rect width="{width}" height="{height}" fill="white"/>'
         
-        # Iterate over each color cluster
-        for i in range(K):
-            color = center[i]
-            hex_color = self.rgb_to_hex(color)
-            
-            # Create mask for this color
-            mask = np.where(label_img == i, 255, 0).astype(np.uint8)
-            
-            # Very light cleanup (only 1px noise) to keep details
-            # kernel = np.ones((2,2), np.uint8)
-            # mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-            
-            # Find contours
-            contours, hierarchy = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-            
-            layer_paths = []
-            for contour in contours:
-                # Capture very small details (down to 2px area)
-                if cv2.contourArea(contour) < 2: 
-                    continue
-                    
-                # High Fidelity: Very low epsilon (0.0005) for smooth, accurate curves
-                epsilon = 0.0005 * cv2.arcLength(contour, True)
-                approx = cv2.approxPolyDP(contour, epsilon, True)
-                
-                if len(approx) < 3: 
-                    continue
-                
-                points = []
-                for point in approx:
-                    x, y = point[0]
-                    points.append(f"{x},{y}")
-                
-                path_data = "M " + " L ".join(points) + " Z"
-                layer_paths.append(path_data)
-                
+        # Locate every cluster in one pass, then trace each inside its own bounding box,
+        # several layers at a time on large images (output order stays by cluster)
+        boxes = label_bounding_boxes(label_img, K)
+        for i, layer_paths in trace_layers(label_img, boxes):
+            hex_color = self.rgb_to_hex(center[i])
             if layer_paths:
-                full_layer_d = " ".join(layer_paths)
+                full_layer_d = "".join(layer_paths)
                 # fill-rule="evenodd" allows holes in this color layer
                 # ADDED: stroke={hex_color} to fill gaps between adjacent regions
                 # stroke-width="1.5" is usually enough to cover the hairline gap
-                svg_content.append(f'<path d="{full_layer_d}" fill="{hex_color}" stroke="{hex_color}" stroke-width="1.5" stroke-linejoin="round" fill-rule="evenodd"/>')
+                yield f'\n<path d="{full_layer_d}" fill="{hex_color}" stroke="{hex_color}" stroke-width="1.5" stroke-linejoin="round" fill-rule="evenodd"/>'
                 
-        svg_content.append('</svg>')
-        full_svg = "\n".join(svg_content)
+        yield SVG_END
+
+    def image_to_svg(self, image: Union[Image.Image, np.ndarray], output_path: str = None,
+                     quality: Optional[str] = None, k: Optional[int] = None, attempts: Optional[int] = None,
+                     sample_size: Optional[int] = None) -> str:
+        """
+        Convert raster image to SVG using K-Means Color Quantization
+        
+        Args:
+            image: PIL Image or numpy array
+            output_path: Also write the SVG here
+            quality, k, attempts, sample_size: Quantization settings, see iter_svg
+        """
+        full_svg = "".join(self.iter_svg(image, quality=quality, k=k, attempts=attempts, sample_size=sample_size))
         
         # AI Enhancement
-        gemini = GeminiClient()
+        gemini = get_gemini_client()
         if gemini.is_ready:
+            checkpoint()
             print("SketchModule: Enhancing SVG with AI...")
             # We pass a truncated version if it's too large, but SVG is usually okay
             full_svg = gemini.enhance_svg(full_svg)
@@ -126,4 +128,54 @@ class SketchModule:
             with open(output_path, "w") as f:
                 f.write(full_svg)
                 
-        return full_svg
\ No newline at end of file
+        return full_svg
+
+    def write_svg(self, image: Union[Image.Image, np.ndarray], output_path: str, compress: bool = False,
+                  preview_bytes: int = SKETCH_HISTORY_PREVIEW_BYTES, quality: Optional[str] = None,
+                  k: Optional[int] = None, attempts: Optional[int] = None,
+                  sample_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Vectorize straight to a file, one colour layer at a time
+        
+        With AI enhancement enabled the whole document is needed for the
+        Gemini call, so it is built in memory first as in image_to_svg.
+        
+        Args:
+            output_path: Destination .svg (or .svgz when compress=True)
+            compress: Write gzip (SVGZ) instead of plain text
+            preview_bytes: Size limit of the returned preview
+            
+        Returns:
+            {"path", "bytes" (uncompressed size), "stored_bytes" (size on disk),
+             "preview": a complete SVG of the layers that fit in preview_bytes, or
+             None for an AI-enhanced document larger than that}
+        """
+        options = dict(quality=quality, k=k, attempts=attempts, sample_size=sample_size)
+        if compress:
+            f = gzip.open(output_path, "wt", encoding="utf-8", compresslevel=SKETCH_GZIP_LEVEL)
+        else:
+            f = open(output_path, "w", encoding="utf-8")
+        
+        with f:
+            if get_gemini_client().is_ready:
+                full_svg = self.image_to_svg(image, **options)
+                f.write(full_svg)
+                size = len(full_svg)
+                preview = full_svg if size <= preview_bytes else None
+            else:
+                # Whole layers only, so the preview stays well-formed however large the drawing is
+                parts, preview_size, size = [], len(SVG_END), 0
+                for chunk in self.iter_svg(image, **options):
+                    f.write(chunk)
+                    size += len(chunk)
+                    if chunk is not SVG_END and (not parts or preview_size + len(chunk) <= preview_bytes):
+                        parts.append(chunk)
+                        preview_size += len(chunk)
+                preview = "".join(parts) + SVG_END
+        
+        return {
+            "path": output_path,
+            "bytes": size,
+            "stored_bytes": os.path.getsize(output_path),
+            "preview": preview,
+        }
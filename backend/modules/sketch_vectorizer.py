@@ -0,0 +1,213 @@
+"""
+Sketch Vectorizer Module
+Traces colour-quantized label images into SVG path data, one layer per cluster
+"""
+import threading
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.config import (
+    SKETCH_QUALITY_PRESETS, SKETCH_DEFAULT_QUALITY, SKETCH_TRACE_THREADS, SKETCH_PARALLEL_MIN_PIXELS,
+)
+from services.cancellation import checkpoint
+
+def resolve_quantization(quality: Optional[str] = None, k: Optional[int] = None, attempts: Optional[int] = None,
+                         sample_size: Optional[int] = None) -> dict:
+    """
+    Quantization settings from a quality preset with optional overrides
+
+    Raises:
+        ValueError: For an unknown preset or out-of-range values
+    """
+    quality = quality or SKETCH_DEFAULT_QUALITY
+    if quality not in SKETCH_QUALITY_PRESETS:
+        raise ValueError(f"Unknown quality '{quality}', expected one of {sorted(SKETCH_QUALITY_PRESETS)}")
+    settings = dict(SKETCH_QUALITY_PRESETS[quality])
+    if k is not None:
+        if not 2 <= k <= 256:
+            raise ValueError("k must be between 2 and 256")
+        settings["k"] = k
+    if attempts is not None:
+        if not 1 <= attempts <= 20:
+            raise ValueError("attempts must be between 1 and 20")
+        settings["attempts"] = attempts
+    if sample_size is not None:
+        if sample_size < 0:
+            raise ValueError("sample_size must be positive (0 = every pixel)")
+        settings["sample_size"] = sample_size or None
+    return settings
+
+def assign_nearest(pixels: np.ndarray, centers: np.ndarray, chunk: int = 262144) -> np.ndarray:
+    """Label every pixel with its nearest center, a block of pixels per matrix product"""
+    centers = centers.astype(np.float32)
+    center_norms = (centers ** 2).sum(axis=1)
+    labels = np.empty(len(pixels), dtype=np.int32)
+    for start in range(0, len(pixels), chunk):
+        block = pixels[start:start + chunk]
+        # |x - c|^2 = |x|^2 - 2 x.c + |c|^2, and |x|^2 does not change the argmin
+        labels[start:start + chunk] = (center_norms - 2.0 * (block @ centers.T)).argmin(axis=1)
+    return labels
+
+def quantize_colors(pixels: np.ndarray, k: int, attempts: int = 1, sample_size: Optional[int] = None,
+                    max_iter: int = 20, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    K-means colour quantization fitted on a random pixel sample
+
+    Centers are fitted on `sample_size` pixels drawn with replacement (every
+    pixel when None or when the image is smaller), then all pixels are
+    assigned in one vectorized nearest-center pass.
+
+    Args:
+        pixels: (N, 3) float32 colours
+
+    Returns:
+        (labels (N,) int32, centers (k, 3) float32)
+    """
+    k = max(1, min(k, len(pixels)))
+    if sample_size and sample_size < len(pixels):
+        rng = np.random.default_rng(seed)
+        sample = pixels[rng.integers(0, len(pixels), size=max(sample_size, k))]
+    else:
+        sample = pixels
+    cv2.setRNGSeed(seed)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, max_iter, 0.5)
+    _, sample_labels, centers = cv2.kmeans(sample, k, None, criteria, attempts, cv2.KMEANS_PP_CENTERS)
+    if sample is pixels:
+        return sample_labels.ravel().astype(np.int32), centers
+    return assign_nearest(pixels, centers), centers
+
+def label_bounding_boxes(label_img: np.ndarray, k: int) -> np.ndarray:
+    """
+    Bounding box of every label in a single pass over the image
+
+    Args:
+        label_img: 2-D integer array of cluster labels in [0, k)
+        k: Number of labels
+
+    Returns:
+        (k, 4) int array of (y0, y1, x0, x1), end-exclusive; all -1 for labels that never occur
+    """
+    h, w = label_img.shape
+    row_hits = np.zeros((k, h), dtype=bool)
+    col_hits = np.zeros((k, w), dtype=bool)
+    row_hits[label_img, np.arange(h)[:, None]] = True
+    col_hits[label_img, np.arange(w)[None, :]] = True
+
+    boxes = np.full((k, 4), -1, dtype=np.int64)
+    present = row_hits.any(axis=1)
+    boxes[present, 0] = row_hits[present].argmax(axis=1)
+    boxes[present, 1] = h - row_hits[present, ::-1].argmax(axis=1)
+    boxes[present, 2] = col_hits[present].argmax(axis=1)
+    boxes[present, 3] = w - col_hits[present, ::-1].argmax(axis=1)
+    return boxes
+
+def contour_to_path(contour: np.ndarray) -> str:
+    """
+    Compact closed SVG sub-path for an integer contour
+
+    The first point is absolute and every later one relative to its
+    predecessor, using h/v for axis-aligned steps (most of a traced outline),
+    omitting repeated command letters and separators before minus signs:
+    "M12 40h5v-3l2 1 4-2z".
+    """
+    points = contour.reshape(-1, 2)
+    parts = [f"M{points[0, 0]} {points[0, 1]}"]
+    previous = "M"
+    for dx, dy in np.diff(points, axis=0).tolist():
+        if dy == 0:
+            command, values = "h", (dx,)
+        elif dx == 0:
+            command, values = "v", (dy,)
+        else:
+            command, values = "l", (dx, dy)
+        separate = command == previous
+        if not separate:
+            parts.append(command)
+            previous = command
+        for value in values:
+            parts.append(f" {value}" if separate and value >= 0 else str(value))
+            separate = True
+    parts.append("z")
+    return "".join(parts)
+
+def trace_label(label_img: np.ndarray, label: int, box) -> List[str]:
+    """
+    Trace one cluster's regions into closed SVG sub-paths
+
+    Only the label's bounding box (plus a one-pixel empty margin, so regions
+    touching the box edge close exactly as they would in the full image) is
+    scanned; contour coordinates are shifted back to image space.
+    """
+    y0, y1, x0, x1 = (int(v) for v in box)
+    mask = np.zeros((y1 - y0 + 2, x1 - x0 + 2), dtype=np.uint8)
+    mask[1:-1, 1:-1][label_img[y0:y1, x0:x1] == label] = 255
+    contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE, offset=(x0 - 1, y0 - 1))
+
+    paths = []
+    for contour in contours:
+        # Capture very small details (down to 2px area)
+        if cv2.contourArea(contour) < 2:
+            continue
+
+        # High Fidelity: Very low epsilon (0.0005) for smooth, accurate curves
+        epsilon = 0.0005 * cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, epsilon, True)
+        if len(approx) < 3:
+            continue
+        paths.append(contour_to_path(approx))
+    return paths
+
+# Shared tracing threads; findContours and approxPolyDP release the GIL
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=SKETCH_TRACE_THREADS, thread_name_prefix="sketch-trace")
+    return _pool
+
+def trace_layers(label_img: np.ndarray, boxes: np.ndarray, workers: int = SKETCH_TRACE_THREADS,
+                 parallel_min_pixels: int = SKETCH_PARALLEL_MIN_PIXELS,
+                 pool: Optional[Executor] = None) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Trace every non-empty label, yielding (label, paths) in label order
+
+    Large images are traced on the shared thread pool with at most a few
+    layers per worker in flight, so finished layers do not pile up ahead of
+    a slow consumer; smaller ones are traced in the calling thread. `pool`
+    replaces the shared SKETCH_TRACE_THREADS pool (e.g. to size it to `workers`).
+    """
+    labels = [i for i in range(len(boxes)) if boxes[i, 0] >= 0]
+    if workers <= 1 or label_img.size < parallel_min_pixels:
+        for i in labels:
+            checkpoint()
+            yield i, trace_label(label_img, i, boxes[i])
+        return
+
+    pool = pool or _get_pool()
+    window = deque()
+    pending = iter(labels)
+    try:
+        for i in pending:
+            window.append((i, pool.submit(trace_label, label_img, i, boxes[i])))
+            if len(window) >= workers * 2:
+                break
+        while window:
+            # Pool threads cannot see our token; check it between layers
+            checkpoint()
+            i, future = window.popleft()
+            paths = future.result()
+            following = next(pending, None)
+            if following is not None:
+                window.append((following, pool.submit(trace_label, label_img, following, boxes[following])))
+            yield i, paths
+    finally:
+        for _, future in window:
+            future.cancel()
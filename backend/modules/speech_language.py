@@ -13,7 +13,7 @@ import wave
 import edge_tts
 import asyncio
 import contextlib
-from modules.gemini_client import GeminiClient
+from modules.gemini_client import get_gemini_client
 
 # Global locks/instances
 _tts_engine = None
@@ -221,7 +221,7 @@ class LanguageToolkit:
                 logging.warning(f"Offline translation failed: {e}")
         
         # 2. Try Online (Gemini Priority)
-        gemini = GeminiClient()
+        gemini = get_gemini_client()
         if gemini.is_ready:
             try:
                 prompt = f"Translate the following text from {from_code} to {to_code}. Return ONLY the translated text.\n\nText:\n{text}"
@@ -303,7 +303,7 @@ class LanguageToolkit:
                 return "Transcription complete but no text recognized."
             
             # AI Enhancement: Refine transcription
-            gemini = GeminiClient()
+            gemini = get_gemini_client()
             if gemini.is_ready:
                 return gemini.refine_speech_text(text)
                 
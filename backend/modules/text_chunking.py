@@ -0,0 +1,109 @@
+"""
+Text Chunking Module
+Splits long documents on page/paragraph boundaries so they can be processed in parallel
+"""
+import json
+import re
+from typing import List
+
+# Boundaries tried in order: page break, paragraph, line, word
+SEPARATORS = ["\f", "\n\n", "\n", " "]
+
+def _split_units(text: str, max_chars: int, level: int = 0) -> List[str]:
+    """Split text into pieces of at most max_chars, keeping each separator at the end of its piece"""
+    if len(text) <= max_chars:
+        return [text]
+    if level >= len(SEPARATORS):
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    
+    sep = SEPARATORS[level]
+    pieces = [p for p in re.split(f"(?<={re.escape(sep)})", text) if p]
+    if len(pieces) == 1:
+        return _split_units(text, max_chars, level + 1)
+    
+    units = []
+    for piece in pieces:
+        units.extend(_split_units(piece, max_chars, level + 1))
+    return units
+
+def split_text(text: str, max_chars: int, overlap: int = 0) -> List[str]:
+    """
+    Split text into chunks of roughly max_chars on the coarsest available boundary
+    
+    Args:
+        text: Text to split (pages separated by form feeds)
+        max_chars: Target maximum chunk length
+        overlap: Characters of the previous chunk repeated at the start of the next
+                 (so items spanning a boundary are seen whole); 0 keeps
+                 "".join(chunks) == text
+                 
+    Returns:
+        List of chunks
+    """
+    if not text:
+        return []
+    
+    chunks = []
+    current = ""
+    for unit in _split_units(text, max_chars):
+        if current and len(current) + len(unit) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += unit
+    if current:
+        chunks.append(current)
+    
+    if overlap <= 0 or len(chunks) < 2:
+        return chunks
+    
+    overlapped = [chunks[0]]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        tail = previous[-overlap:]
+        # Start the overlap on a word boundary
+        space = tail.find(" ")
+        if 0 <= space < len(tail) - 1:
+            tail = tail[space + 1:]
+        overlapped.append(tail + chunk)
+    return overlapped
+
+def stitch_chunks(originals: List[str], processed: List[str]) -> str:
+    """
+    Join per-chunk results of a non-overlapping split back into one text
+    
+    Chunks whose processing failed (empty result) fall back to the original,
+    and each chunk keeps the boundary whitespace it was split on.
+    """
+    parts = []
+    for original, result in zip(originals, processed):
+        if not result:
+            parts.append(original)
+            continue
+        trailing = original[len(original.rstrip()):]
+        parts.append(result.rstrip() + trailing)
+    return "".join(parts)
+
+def parse_json_list(response: str) -> list:
+    """Parse a JSON array from an LLM response, tolerating markdown code fences"""
+    if not response:
+        return []
+    if "```json" in response:
+        response = response.split("```json")[1].split("```")[0]
+    elif "```" in response:
+        response = response.split("```")[1].split("```")[0]
+    try:
+        items = json.loads(response.strip())
+    except ValueError:
+        return []
+    return items if isinstance(items, list) else []
+
+def merge_unique(lists: List[list]) -> list:
+    """Concatenate lists, dropping duplicates but keeping first-seen order"""
+    seen = set()
+    merged = []
+    for items in lists:
+        for item in items:
+            key = json.dumps(item, sort_keys=True) if not isinstance(item, str) else item
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged
@@ -0,0 +1,16 @@
+"""
+Text Metrics Module
+Recognition accuracy measures shared by tests and benchmarks (pure Python, no model imports)
+"""
+
+def character_error_rate(reference: str, hypothesis: str) -> float:
+    """Levenshtein distance over reference length, for comparing backends' output"""
+    if not reference:
+        return float(bool(hypothesis))
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_char != hyp_char)))
+        previous = current
+    return previous[-1] / len(reference)
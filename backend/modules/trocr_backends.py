@@ -0,0 +1,142 @@
+"""
+TrOCR Backends Module
+Loads TrOCR for inference as fp32 PyTorch, dynamically quantized int8 PyTorch,
+or an ONNX Runtime export of the encoder/decoder
+"""
+import logging
+import math
+import os
+import re
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import torch
+from PIL import Image
+from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+
+from core.config import (
+    TROCR_MODEL_NAME, TROCR_BACKEND, TROCR_ONNX_DIR,
+    TROCR_FAST_MIN_TOKENS, TROCR_FAST_TOKENS_PER_ASPECT, TROCR_FAST_MAX_TOKENS,
+)
+
+# Try to import ONNX Runtime support if available
+try:
+    from optimum.onnxruntime import ORTModelForVision2Seq
+    HAS_ONNXRUNTIME = True
+except ImportError as e:
+    HAS_ONNXRUNTIME = False
+    logging.info(f"optimum[onnxruntime] not found, the onnx TrOCR backend is unavailable: {e}")
+
+TROCR_BACKENDS = ("torch", "quantized", "onnx")
+
+def _load_torch(model_name: str, device: str):
+    model = VisionEncoderDecoderModel.from_pretrained(model_name)
+    model.eval()
+    # Placed once here rather than on every request
+    return model.to(device)
+
+def _load_quantized(model_name: str):
+    """fp32 weights with every nn.Linear swapped for a dynamically quantized int8 one (CPU only)"""
+    model = VisionEncoderDecoderModel.from_pretrained(model_name)
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+_export_lock = threading.Lock()
+
+def onnx_export_path(model_name: str, export_dir: Path) -> Path:
+    """Directory holding the ONNX export of one model under export_dir"""
+    return Path(export_dir) / re.sub(r"[^A-Za-z0-9._-]+", "--", model_name).strip("-.")
+
+def _load_onnx(model_name: str, export_dir: Path):
+    """
+    ONNX Runtime encoder/decoder sessions, exported on first use and reused from export_dir
+
+    Each model exports to its own subdirectory. The export is written to a
+    temporary directory and renamed into place, so a reader never sees a
+    partial export and concurrent exporters (threads or worker processes)
+    cannot interleave their files.
+    """
+    model_dir = onnx_export_path(model_name, export_dir)
+    with _export_lock:
+        if not (model_dir / "config.json").exists():
+            logging.info(f"Exporting {model_name} to ONNX in {model_dir} (one-off)...")
+            model_dir.parent.mkdir(parents=True, exist_ok=True)
+            tmp_dir = Path(tempfile.mkdtemp(prefix=f".{model_dir.name}.", dir=model_dir.parent))
+            try:
+                ORTModelForVision2Seq.from_pretrained(model_name, export=True).save_pretrained(tmp_dir)
+                try:
+                    os.replace(tmp_dir, model_dir)
+                except OSError:
+                    if not (model_dir / "config.json").exists():
+                        raise
+                    # Another process finished the same export first
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+    return ORTModelForVision2Seq.from_pretrained(model_dir)
+
+def load_trocr(backend: str = TROCR_BACKEND, model_name: str = TROCR_MODEL_NAME,
+               export_dir: Path = TROCR_ONNX_DIR) -> Tuple[TrOCRProcessor, object, str]:
+    """
+    Load the TrOCR processor and a model for the given backend
+
+    An unknown backend, or "onnx" without optimum[onnxruntime], falls back
+    to "torch" with a warning. The quantized and ONNX backends run on CPU.
+
+    Returns:
+        (processor, model with a generate() method, device for pixel_values)
+    """
+    if backend not in TROCR_BACKENDS:
+        logging.warning(f"Unknown TrOCR backend '{backend}', using torch")
+        backend = "torch"
+    if backend == "onnx" and not HAS_ONNXRUNTIME:
+        logging.warning("TrOCR backend 'onnx' needs optimum[onnxruntime], using torch")
+        backend = "torch"
+
+    processor = TrOCRProcessor.from_pretrained(model_name)
+    if backend == "quantized":
+        return processor, _load_quantized(model_name), "cpu"
+    if backend == "onnx":
+        return processor, _load_onnx(model_name, Path(export_dir)), "cpu"
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return processor, _load_torch(model_name, device), device
+
+def generate_text(processor: TrOCRProcessor, model, crops: List[Image.Image], device: str = "cpu",
+                  **generate_kwargs) -> List[str]:
+    """Recognize one batch of RGB line crops with any backend's model"""
+    with torch.inference_mode():
+        pixel_values = processor(images=crops, return_tensors="pt").pixel_values.to(device)
+        generated_ids = model.generate(pixel_values, **generate_kwargs)
+    return processor.batch_decode(generated_ids, skip_special_tokens=True)
+
+def crop_aspect(crop: Image.Image) -> float:
+    width, height = crop.size
+    return width / max(height, 1)
+
+def token_budget(crop: Image.Image) -> int:
+    """
+    New-token limit for one line crop, from its width/height ratio
+
+    A line's text length grows with its aspect ratio, so a single word gets a
+    handful of tokens and a full line up to TROCR_FAST_MAX_TOKENS.
+    """
+    budget = TROCR_FAST_MIN_TOKENS + math.ceil(TROCR_FAST_TOKENS_PER_ASPECT * crop_aspect(crop))
+    return max(1, min(TROCR_FAST_MAX_TOKENS, budget))
+
+def fast_decoding_kwargs(crops: List[Image.Image]) -> Dict[str, Any]:
+    """
+    generate() settings for the fast handwriting preset
+
+    Greedy search with the decoder's key/value cache (the encoder runs once
+    per batch either way). Finished sequences stop contributing as soon as
+    they emit the end token, and the batch stops when all have, or at the
+    largest budget in the batch.
+    """
+    return {
+        "num_beams": 1,
+        "do_sample": False,
+        "use_cache": True,
+        "max_new_tokens": max(token_budget(crop) for crop in crops),
+    }
@@ -0,0 +1,204 @@
+"""
+Cancellation Service for Smart Handwritten Data Recognition
+Cooperative cancellation tokens and deadlines for long-running OCR, sketch and PDF work
+"""
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+class TaskCancelled(Exception):
+    """Raised at a checkpoint once the work it belongs to has been cancelled"""
+
+class DeadlineExceeded(TaskCancelled):
+    """Raised at a checkpoint once the work has run past its deadline"""
+
+class CancellationToken:
+    """
+    Cancellation flag plus optional deadline, shared by a caller and its work
+
+    The caller cancels; the work calls checkpoint() (or token.check()) between
+    units of work such as OCR stages, TrOCR batches, colour layers and PDF pages.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.reason = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def cancel(self, reason: str = "Cancelled"):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Cancellation callback failed: {e}")
+
+    def add_callback(self, callback: Callable[[], None]):
+        """Run callback when the token is cancelled (immediately if it already is)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None without one"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+    def check(self):
+        """
+        Raises:
+            TaskCancelled: If the token was cancelled
+            DeadlineExceeded: If the deadline has passed
+        """
+        if self._event.is_set():
+            raise TaskCancelled(self.reason)
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded("Deadline exceeded")
+
+_current_token: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    "cancellation_token", default=None
+)
+
+def current_token() -> Optional[CancellationToken]:
+    return _current_token.get()
+
+def checkpoint():
+    """Stop here if the current work was cancelled or is past its deadline (no-op without a token)"""
+    token = _current_token.get()
+    if token is not None:
+        token.check()
+
+@contextmanager
+def use_token(token: Optional[CancellationToken]):
+    """Make `token` the current token for checkpoint() within the block"""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+async def watch_disconnect(request, token: CancellationToken, interval: float = 0.5):
+    """Cancel `token` once the HTTP client disconnects (run as a background task)"""
+    while not token.cancelled:
+        if await request.is_disconnected():
+            token.cancel("Client disconnected")
+            return
+        await asyncio.sleep(interval)
+
+@contextmanager
+def cancel_on_disconnect(request, timeout: Optional[float] = None):
+    """
+    Token for one request's executor work: cancelled when the client goes
+    away, when the block exits early (e.g. the handler itself is cancelled),
+    or after `timeout` seconds. Executor threads see it via checkpoint().
+    """
+    token = CancellationToken(timeout)
+    watcher = asyncio.ensure_future(watch_disconnect(request, token))
+    try:
+        with use_token(token):
+            yield token
+    except BaseException:
+        token.cancel("Request aborted")
+        raise
+    finally:
+        watcher.cancel()
+
+# Cancellation across process boundaries: one shared byte per in-flight call
+
+class _FlagToken(CancellationToken):
+    """Token inside a worker process, cancelled through a shared flag set by the parent"""
+
+    def __init__(self, flags, slot: int, timeout: Optional[float]):
+        super().__init__(timeout)
+        self._flags = flags
+        self._slot = slot
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(self._flags[self._slot]) or super().cancelled
+
+    def check(self):
+        if self._flags[self._slot] and not self._event.is_set():
+            self.cancel("Cancelled")
+        super().check()
+
+_worker_flags = None
+
+def install_worker_flags(flags):
+    """Process-pool initializer: keep the shared flag array for _FlagToken"""
+    global _worker_flags
+    _worker_flags = flags
+
+def call_with_flag(func: Callable, slot: Optional[int], timeout: Optional[float], args: tuple, kwargs: dict):
+    """Run func in a worker process under a token bound to shared flag `slot`"""
+    if slot is None or _worker_flags is None:
+        token = CancellationToken(timeout) if timeout is not None else None
+    else:
+        token = _FlagToken(_worker_flags, slot, timeout)
+    with use_token(token):
+        if token is not None:
+            token.check()
+        return func(*args, **kwargs)
+
+class SharedCancelFlags:
+    """
+    Parent-side pool of shared cancellation flags for one process pool
+
+    Pass `flags` to the pool initializer (install_worker_flags), then wrap each
+    call with acquire()/release(); cancelling the parent token sets the slot's
+    flag, which the child's checkpoint() sees on its next check.
+    """
+
+    def __init__(self, size: int = 256, context=None):
+        context = context or multiprocessing.get_context("spawn")
+        self.flags = context.RawArray("b", size)
+        self.free = list(range(size))
+        self.owners = {}  # slot -> marker of the call currently holding it
+        self.lock = threading.Lock()
+
+    def acquire(self, token: Optional[CancellationToken]) -> Optional[int]:
+        """Bind a free slot to `token`; None without a token or when all slots are busy"""
+        if token is None:
+            return None
+        marker = object()
+        with self.lock:
+            if not self.free:
+                return None
+            slot = self.free.pop()
+            self.flags[slot] = 0
+            self.owners[slot] = marker
+
+        def set_flag():
+            with self.lock:
+                # The token may outlive the call; never flag a slot someone else now holds
+                if self.owners.get(slot) is marker:
+                    self.flags[slot] = 1
+        token.add_callback(set_flag)
+        return slot
+
+    def release(self, slot: Optional[int]):
+        if slot is None:
+            return
+        with self.lock:
+            self.owners.pop(slot, None)
+            self.flags[slot] = 0
+            self.free.append(slot)
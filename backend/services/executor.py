@@ -0,0 +1,172 @@
+"""
+Executor Service for Smart Handwritten Data Recognition
+Provides bounded thread/process pools that keep blocking work off the event loop
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Any, Dict
+
+from core.config import EXECUTOR_POOLS
+from services.cancellation import (
+    checkpoint, current_token, call_with_flag, install_worker_flags, SharedCancelFlags,
+)
+
+class ExecutorSaturated(Exception):
+    """Raised when an executor already holds its maximum number of queued jobs"""
+
+def _checked_call(func: Callable, *args, **kwargs) -> Any:
+    """Skip work whose token was cancelled while it waited in the queue"""
+    checkpoint()
+    return func(*args, **kwargs)
+
+class BoundedExecutor:
+    """
+    Thread or process pool with a bounded backlog
+    
+    "thread" pools suit OpenCV/torch code that releases the GIL, "process"
+    pools suit pure-Python hot paths (callables and arguments must be picklable).
+    """
+    
+    def __init__(self, name: str, kind: str = "thread", max_workers: int = 2, max_queue: int = 8):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self._pool = None
+        self._cancel_flags = SharedCancelFlags() if kind == "process" else None
+    
+    def _get_pool(self):
+        """Lazily create the underlying pool"""
+        if self._pool is None:
+            if self.kind == "thread":
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{self.name}-worker")
+            else:
+                # spawn: forking a multi-threaded server process is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=install_worker_flags,
+                    initargs=(self._cancel_flags.flags,),
+                )
+            logging.info(f"Started {self.kind} executor '{self.name}' with {self.max_workers} workers")
+        return self._pool
+    
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+    
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet picked up by a worker"""
+        return max(0, self.in_flight - self.max_workers)
+    
+    def is_saturated(self) -> bool:
+        return self.in_flight >= self.capacity
+    
+    def _release(self, _future):
+        with self.lock:
+            self.in_flight -= 1
+            self.completed += 1
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) on the pool and await its result
+        
+        The caller's cancellation token (services.cancellation.use_token) follows
+        the work: into the thread's context, or through a shared flag for processes.
+        
+        Raises:
+            ExecutorSaturated: if the pool and its queue are full
+            TaskCancelled: if the token was cancelled or its deadline passed
+        """
+        with self.lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(f"The {self.name} service is busy, please retry shortly")
+            self.in_flight += 1
+        
+        slot = None
+        try:
+            if self.kind == "thread":
+                # Carry context variables (e.g. cancellation tokens) into the worker thread
+                call = functools.partial(contextvars.copy_context().run, _checked_call, func, *args, **kwargs)
+            else:
+                token = current_token()
+                slot = self._cancel_flags.acquire(token)
+                timeout = token.remaining() if token is not None else None
+                call = functools.partial(call_with_flag, func, slot, timeout, args, kwargs)
+            future = self._get_pool().submit(call)
+        except Exception:
+            if slot is not None:
+                self._cancel_flags.release(slot)
+            self._release(None)
+            raise
+        
+        # Release the slot when the work really finishes, even if the awaiting request is cancelled
+        future.add_done_callback(self._release)
+        if slot is not None:
+            future.add_done_callback(lambda _future: self._cancel_flags.release(slot))
+        return await asyncio.wrap_future(future)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+    
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+# Shared executors, one per configured pool name
+_executors = {}
+_executors_lock = threading.Lock()
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Get the shared executor for a router, configured from EXECUTOR_POOLS"""
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                settings = EXECUTOR_POOLS.get(name, EXECUTOR_POOLS["default"])
+                executor = BoundedExecutor(
+                    name,
+                    kind=settings.get("kind", "thread"),
+                    max_workers=settings.get("workers", 2),
+                    max_queue=settings.get("queue", 8),
+                )
+                _executors[name] = executor
+    return executor
+
+def get_executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every executor created so far"""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.stats() for executor in executors}
+
+def shutdown_executors():
+    """Shut down all executors (called on application shutdown)"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=False)
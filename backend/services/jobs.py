@@ -0,0 +1,232 @@
+"""
+Job Operations for Smart Handwritten Data Recognition
+Long-running OCR, PDF and speech operations that can run as background jobs.
+
+Every operation has the signature (job_dir, files, options) -> dict, where
+files is a list of (filename, bytes) pairs. Operations that produce a file
+return {"file": path, "media_type": ..., "filename": ...}.
+
+Feature modules are imported on first use: process-pool workers import this
+module, and a sketch worker should not pay for torch, transformers and
+EasyOCR.
+"""
+import io
+import os
+import threading
+import zipfile
+from typing import List, Tuple, Dict, Any, Callable
+
+from PIL import Image
+
+from modules.gemini_client import get_gemini_client
+from modules.text_chunking import parse_json_list
+from services.cancellation import checkpoint
+
+def _create_ocr_module():
+    from modules.ocr import OCRModule
+    return OCRModule()
+
+def _create_math_module():
+    from modules.math_ocr import MathOCRModule
+    return MathOCRModule()
+
+def _create_sketch_module():
+    from modules.sketch import SketchModule
+    return SketchModule()
+
+def _create_pdf_tools():
+    from modules.pdf_tools import PDFTools
+    return PDFTools()
+
+def _create_toolkit():
+    from modules.speech_language import LanguageToolkit
+    return LanguageToolkit()
+
+_MODULE_FACTORIES: Dict[str, Callable] = {
+    "ocr": _create_ocr_module,
+    "math": _create_math_module,
+    "sketch": _create_sketch_module,
+    "pdf": _create_pdf_tools,
+    "speech": _create_toolkit,
+}
+_modules: Dict[str, Any] = {}
+_modules_lock = threading.Lock()
+
+def _module(name: str):
+    """Shared feature module instance, created on first use"""
+    instance = _modules.get(name)
+    if instance is None:
+        with _modules_lock:
+            instance = _modules.get(name)
+            if instance is None:
+                instance = _modules[name] = _MODULE_FACTORIES[name]()
+    return instance
+
+def _save_inputs(job_dir: str, files: List[Tuple[str, bytes]]) -> List[str]:
+    """Write uploaded files into the job directory, keeping their order"""
+    input_dir = os.path.join(job_dir, "inputs")
+    os.makedirs(input_dir, exist_ok=True)
+    paths = []
+    for index, (filename, content) in enumerate(files):
+        path = os.path.join(input_dir, f"{index:04d}_{os.path.basename(filename or 'upload')}")
+        with open(path, "wb") as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+def _file_result(path: str, media_type: str, filename: str, **extra) -> Dict[str, Any]:
+    return dict(extra, file=path, media_type=media_type, filename=filename)
+
+def _first_image(files: List[Tuple[str, bytes]]) -> Image.Image:
+    if not files:
+        raise ValueError("An input file is required")
+    return Image.open(io.BytesIO(files[0][1]))
+
+def ocr_job(job_dir, files, options):
+    mode = options.get("mode", "standard")
+    text = _module("ocr").recognize(_first_image(files), mode, bool(options.get("use_ai_correction", True)),
+                                languages=options.get("languages"))
+    return {"text": text, "mode": mode}
+
+def ocr_pdf_job(job_dir, files, options):
+    if not files:
+        raise ValueError("An input file is required")
+    pdf_bytes = files[0][1]
+    mode = options.get("mode", "standard")
+    use_ai_correction = bool(options.get("use_ai_correction", True))
+    dpi = int(options.get("dpi", 150))
+    languages = options.get("languages")
+    pdf_tools, ocr_module = _module("pdf"), _module("ocr")
+    pages = []
+    for page_index in range(pdf_tools.page_count(pdf_bytes)):
+        checkpoint()
+        image = pdf_tools.render_page(pdf_bytes, page_index, dpi=dpi)
+        pages.append({"page": page_index + 1, "text": ocr_module.recognize(image, mode, use_ai_correction, languages=languages)})
+    return {"pages": pages, "mode": mode}
+
+def math_job(job_dir, files, options):
+    return {"latex": _module("math").perform_math_ocr(_first_image(files))}
+
+def sketch_job(job_dir, files, options):
+    filename = "sketch.svgz" if options.get("output") == "svgz" else "sketch.svg"
+    result = _module("sketch").write_svg(
+        _first_image(files),
+        os.path.join(job_dir, filename),
+        compress=filename.endswith(".svgz"),
+        quality=options.get("quality"),
+        k=options.get("k"),
+        attempts=options.get("attempts"),
+        sample_size=options.get("sample_size"),
+    )
+    return _file_result(result["path"], "image/svg+xml", filename)
+
+def transcribe_job(job_dir, files, options):
+    if not files:
+        raise ValueError("An input file is required")
+    return {"text": _module("speech").transcribe_audio(files[0][1])}
+
+def translate_job(job_dir, files, options):
+    text = options.get("text")
+    if not text:
+        raise ValueError("options.text is required")
+    return {"translated_text": _module("speech").translate_text(text, to_code=options.get("target_lang", "hi"))}
+
+def pdf_merge_job(job_dir, files, options):
+    output_path = os.path.join(job_dir, "merged.pdf")
+    _module("pdf").merge_pdfs(_save_inputs(job_dir, files), output_path)
+    return _file_result(output_path, "application/pdf", "merged.pdf")
+
+def pdf_compress_job(job_dir, files, options):
+    input_path = _save_inputs(job_dir, files[:1])[0]
+    output_path = os.path.join(job_dir, "compressed.pdf")
+    _module("pdf").compress_pdf(input_path, output_path)
+    return _file_result(output_path, "application/pdf", f"compressed_{files[0][0]}")
+
+def pdf_split_job(job_dir, files, options):
+    input_path = _save_inputs(job_dir, files[:1])[0]
+    split_dir = os.path.join(job_dir, "split_pages")
+    generated = _module("pdf").split_pdf(input_path, split_dir)
+    zip_path = os.path.join(job_dir, "split_pages.zip")
+    with zipfile.ZipFile(zip_path, "w") as zipf:
+        for path in generated:
+            zipf.write(path, os.path.basename(path))
+    return _file_result(zip_path, "application/zip", "split_pages.zip")
+
+def pdf_redact_job(job_dir, files, options):
+    input_path = _save_inputs(job_dir, files[:1])[0]
+    pdf_tools = _module("pdf")
+    text_content = pdf_tools.extract_text(input_path)
+    redactions = parse_json_list(get_gemini_client().identify_sensitive_data(text_content))
+    output_path = os.path.join(job_dir, "redacted.pdf")
+    hit_counts = pdf_tools.redact_terms(input_path, redactions, output_path)
+    return _file_result(output_path, "application/pdf", f"redacted_{files[0][0]}", hits=hit_counts)
+
+def pdf_protect_job(job_dir, files, options):
+    password = options.get("password")
+    if not password:
+        raise ValueError("options.password is required")
+    input_path = _save_inputs(job_dir, files[:1])[0]
+    output_path = os.path.join(job_dir, "protected.pdf")
+    _module("pdf").protect_pdf(input_path, password, output_path)
+    return _file_result(output_path, "application/pdf", f"protected_{files[0][0]}")
+
+def image_to_pdf_job(job_dir, files, options):
+    output_path = os.path.join(job_dir, "images_converted.pdf")
+    _module("pdf").images_to_pdf(_save_inputs(job_dir, files), output_path)
+    return _file_result(output_path, "application/pdf", "images_converted.pdf")
+
+JOB_OPERATIONS: Dict[str, Callable] = {
+    "ocr": ocr_job,
+    "ocr_pdf": ocr_pdf_job,
+    "math": math_job,
+    "sketch": sketch_job,
+    "transcribe": transcribe_job,
+    "translate": translate_job,
+    "pdf_merge": pdf_merge_job,
+    "pdf_compress": pdf_compress_job,
+    "pdf_split": pdf_split_job,
+    "pdf_redact": pdf_redact_job,
+    "pdf_protect": pdf_protect_job,
+    "image_to_pdf": image_to_pdf_job,
+}
+
+# Quick single-request operations go ahead of bulk document work
+INTERACTIVE_OPERATIONS = {"ocr", "math", "sketch", "translate"}
+
+def job_priority(operation: str) -> str:
+    return "interactive" if operation in INTERACTIVE_OPERATIONS else "batch"
+
+def job_cost(operation: str, files: List[Tuple[str, bytes]]) -> float:
+    """Relative size of a job for fair sharing: pages for PDF OCR, else input count"""
+    if operation == "ocr_pdf" and files:
+        try:
+            return float(max(1, _module("pdf").page_count(files[0][1])))
+        except Exception:
+            return 1.0
+    return float(max(1, len(files)))
+
+def preload_ocr():
+    """Import the OCR stack and load the EasyOCR readers script detection can pick"""
+    from modules.ocr import preload_ocr_readers
+    preload_ocr_readers()
+
+def preload_sketch():
+    """Import OpenCV and the vectorizer (sketch jobs have no model weights to load)"""
+    _module("sketch")
+
+# Model loaders to warm in process-pool workers, per operation
+JOB_PRELOADERS: Dict[str, List[Callable]] = {
+    "ocr": [preload_ocr],
+    "ocr_pdf": [preload_ocr],
+    "sketch": [preload_sketch],
+}
+
+def preload_models(task_types):
+    """Process-pool initializer hook: load each model the given operations need once"""
+    loaders = []
+    for task_type in task_types:
+        for loader in JOB_PRELOADERS.get(task_type, []):
+            if loader not in loaders:
+                loaders.append(loader)
+    for loader in loaders:
+        loader()
@@ -0,0 +1,182 @@
+"""
+LLM Response Cache Service for Smart Handwritten Data Recognition
+Prompt-hash keyed cache with TTL, size-bounded eviction and pluggable backends
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from core.config import OUTPUTS_DIR, LLM_CACHE_BACKEND, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES
+
+class MemoryCacheBackend:
+    """In-process LRU backend"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key: str, value: str, ttl: float):
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+    
+    def __len__(self):
+        return len(self.entries)
+
+class SQLiteCacheBackend:
+    """On-disk backend, shared across restarts (and processes on the same host)"""
+    
+    def __init__(self, path: Path, max_entries: int):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self.conn.commit()
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return row[0]
+    
+    def set(self, key: str, value: str, ttl: float):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            # Drop expired rows, then least recently used rows beyond the cap
+            self.conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+            self.conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.conn.commit()
+    
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM llm_cache")
+            self.conn.commit()
+    
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+class LLMCache:
+    """Caches LLM responses per (method, prompt) with per-method hit/miss counters"""
+    
+    def __init__(self, backend, ttl: float = LLM_CACHE_TTL, namespace: str = ""):
+        self.backend = backend
+        self.ttl = ttl
+        self.namespace = namespace  # e.g. model endpoint, so switching models never serves stale answers
+        self.counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self.lock = threading.Lock()
+    
+    def _key(self, method: str, prompt: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{method}\0{prompt}".encode("utf-8")).hexdigest()
+    
+    def get(self, method: str, prompt: str) -> Optional[str]:
+        try:
+            value = self.backend.get(self._key(method, prompt))
+        except Exception as e:
+            logging.warning(f"LLM cache lookup failed: {e}")
+            value = None
+        with self.lock:
+            self.counters[method]["hits" if value is not None else "misses"] += 1
+        return value
+    
+    def set(self, method: str, prompt: str, value: str):
+        try:
+            self.backend.set(self._key(method, prompt), value, self.ttl)
+        except Exception as e:
+            logging.warning(f"LLM cache store failed: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            methods = {}
+            for method, counts in self.counters.items():
+                lookups = counts["hits"] + counts["misses"]
+                methods[method] = dict(counts, hit_rate=counts["hits"] / lookups if lookups else 0.0)
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "ttl": self.ttl,
+            "methods": methods,
+        }
+
+# Global instances: one backend, one LLMCache (key namespace and counters) per namespace
+_llm_backend = None
+_llm_backend_created = False
+_llm_caches: Dict[str, LLMCache] = {}
+_llm_cache_lock = threading.Lock()
+
+def _create_backend():
+    """Backend per LLM_CACHE_BACKEND, or None when caching is off (lock held)"""
+    if LLM_CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(OUTPUTS_DIR / "cache" / "llm_cache.sqlite3", LLM_CACHE_MAX_ENTRIES)
+    if LLM_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(LLM_CACHE_MAX_ENTRIES)
+    return None
+
+def get_llm_cache(namespace: str = "") -> Optional[LLMCache]:
+    """
+    Get the LLM cache for a namespace per LLM_CACHE_BACKEND ("memory", "sqlite" or "none")
+    
+    Every namespace shares one backend (and its size bound), but keys its
+    entries separately, so clients of different models never see each
+    other's answers.
+    """
+    global _llm_backend, _llm_backend_created
+    cache = _llm_caches.get(namespace)
+    if cache is not None:
+        return cache
+    with _llm_cache_lock:
+        if not _llm_backend_created:
+            _llm_backend = _create_backend()
+            _llm_backend_created = True
+        if _llm_backend is None:
+            return None
+        cache = _llm_caches.get(namespace)
+        if cache is None:
+            cache = _llm_caches[namespace] = LLMCache(_llm_backend, namespace=namespace)
+        return cache
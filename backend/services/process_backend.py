@@ -0,0 +1,141 @@
+"""
+Process Backend for Smart Handwritten Data Recognition
+Runs CPU-bound background tasks in worker processes, returning large arrays through shared memory
+"""
+import importlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from core.config import TASK_SHM_MIN_BYTES
+from services.cancellation import call_with_flag, current_token, install_worker_flags, SharedCancelFlags
+
+class SharedArray:
+    """Picklable handle to a numpy array placed in a shared memory block by a worker"""
+
+    __slots__ = ("name", "shape", "dtype")
+
+    def __init__(self, name: str, shape, dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+def export_shared(obj: Any, min_bytes: int = TASK_SHM_MIN_BYTES) -> Any:
+    """Replace large numpy arrays inside a result with SharedArray handles (worker side)"""
+    if isinstance(obj, np.ndarray) and obj.nbytes >= min_bytes and obj.dtype != object:
+        shm = shared_memory.SharedMemory(create=True, size=obj.nbytes)
+        np.ndarray(obj.shape, dtype=obj.dtype, buffer=shm.buf)[...] = obj
+        handle = SharedArray(shm.name, obj.shape, obj.dtype.str)
+        # The parent unlinks the block once it has copied the data out
+        shm.close()
+        return handle
+    if isinstance(obj, dict):
+        return {key: export_shared(value, min_bytes) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(export_shared(value, min_bytes) for value in obj)
+    return obj
+
+def import_shared(obj: Any) -> Any:
+    """Copy SharedArray handles back into ordinary arrays and free the blocks (parent side)"""
+    if isinstance(obj, SharedArray):
+        shm = shared_memory.SharedMemory(name=obj.name)
+        try:
+            return np.ndarray(obj.shape, dtype=np.dtype(obj.dtype), buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+    if isinstance(obj, dict):
+        return {key: import_shared(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(import_shared(value) for value in obj)
+    return obj
+
+def _call(func: Callable, args: tuple, kwargs: dict, min_bytes: int, slot: Optional[int],
+          timeout: Optional[float]) -> Any:
+    """Entry point executed inside the worker process"""
+    return export_shared(call_with_flag(func, slot, timeout, args, kwargs), min_bytes)
+
+def _initialize_worker(modules: Sequence[str], preload: Optional[str], task_types: Sequence[str], flags):
+    """Import task modules once per worker and warm their models"""
+    install_worker_flags(flags)
+    for module in modules:
+        importlib.import_module(module)
+    if preload:
+        module_name, _, attr = preload.rpartition(".")
+        try:
+            getattr(importlib.import_module(module_name), attr)(task_types)
+        except Exception as e:
+            # A worker without warm models is still usable; the first task loads them lazily
+            logging.error(f"Worker preload failed: {e}")
+
+class ProcessBackend:
+    """
+    Lazily started spawn-context process pool for TaskQueueService
+
+    `modules` are imported by every worker before its first task, and
+    `preload` ("module.function") is called with `task_types` so models are
+    loaded once per process rather than once per task. Task functions and
+    their arguments must be picklable (module-level functions, not lambdas).
+    """
+
+    def __init__(self, max_workers: int, modules: Sequence[str] = (), preload: Optional[str] = None,
+                 task_types: Sequence[str] = (), shm_min_bytes: int = TASK_SHM_MIN_BYTES):
+        self.max_workers = max_workers
+        self.modules = tuple(modules)
+        self.preload = preload
+        self.task_types = tuple(task_types)
+        self.shm_min_bytes = shm_min_bytes
+        self.submitted = 0
+        self.lock = threading.Lock()
+        self._pool = None
+        self._cancel_flags = SharedCancelFlags()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self._pool is None:
+                # spawn: forking a multi-threaded server process is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_initialize_worker,
+                    initargs=(self.modules, self.preload, self.task_types, self._cancel_flags.flags),
+                )
+                logging.info(f"Started task process pool with {self.max_workers} workers")
+            self.submitted += 1
+            return self._pool
+
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) in a worker process and block for its result
+
+        The calling thread's cancellation token reaches the worker's checkpoint()
+        calls through a shared flag, and its remaining time becomes the worker's deadline.
+        """
+        token = current_token()
+        slot = self._cancel_flags.acquire(token)
+        timeout = token.remaining() if token is not None else None
+        try:
+            future = self._get_pool().submit(_call, func, args, kwargs, self.shm_min_bytes, slot, timeout)
+            return import_shared(future.result())
+        finally:
+            self._cancel_flags.release(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "workers": self.max_workers,
+                "started": self._pool is not None,
+                "submitted": self.submitted,
+                "task_types": list(self.task_types),
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self.lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
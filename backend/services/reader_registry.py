@@ -0,0 +1,137 @@
+"""
+Reader Registry Service for Smart Handwritten Data Recognition
+EasyOCR readers keyed by language set, kept in an LRU under a memory budget
+"""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from core.config import SUPPORTED_LANGUAGES, OCR_READER_MAX_BYTES, OCR_READER_DEFAULT_BYTES
+
+LanguageSet = Tuple[str, ...]
+
+def normalize_languages(languages: Optional[Iterable[str]]) -> LanguageSet:
+    """
+    Canonical language set: validated, deduplicated, sorted, English always included
+
+    English is added to every set because page furniture (numbers, dates,
+    codes) is Latin even in Hindi or Marathi documents, and EasyOCR pairs it
+    with any script.
+
+    Raises:
+        ValueError: For a language outside SUPPORTED_LANGUAGES
+    """
+    if languages is None:
+        return tuple(sorted(SUPPORTED_LANGUAGES))
+    if isinstance(languages, str):
+        languages = languages.split(",")
+    codes = {code.strip().lower() for code in languages if code and code.strip()}
+    unknown = codes - set(SUPPORTED_LANGUAGES)
+    if unknown:
+        raise ValueError(f"Unsupported languages {sorted(unknown)}, expected some of {SUPPORTED_LANGUAGES}")
+    return tuple(sorted(codes | {"en"}))
+
+def create_easyocr_reader(languages: LanguageSet):
+    import easyocr
+    return easyocr.Reader(list(languages), verbose=False)
+
+def easyocr_reader_bytes(reader) -> int:
+    """Parameter memory of a reader's detector and recognizer networks"""
+    total = 0
+    for name in ("detector", "recognizer"):
+        model = getattr(reader, name, None)
+        if hasattr(model, "parameters"):
+            total += sum(p.numel() * p.element_size() for p in model.parameters())
+    return total or OCR_READER_DEFAULT_BYTES
+
+class ReaderRegistry:
+    """
+    Thread-safe LRU of loaded readers bounded by their estimated memory
+
+    A reader is built once per language set even when several threads ask
+    for it at the same time. Evicting a reader only drops the registry's
+    reference; threads still using it keep it alive until they finish. The
+    most recently used reader is never evicted, even above the budget.
+    """
+
+    def __init__(self, factory: Callable[[LanguageSet], Any] = create_easyocr_reader,
+                 sizer: Callable[[Any], int] = easyocr_reader_bytes, max_bytes: int = OCR_READER_MAX_BYTES):
+        self.factory = factory
+        self.sizer = sizer
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # languages -> (reader, size)
+        self.loading: Dict[LanguageSet, Future] = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, languages: Optional[Iterable[str]] = None):
+        """Reader for a language set, loading it on first use"""
+        key = normalize_languages(languages)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            future = self.loading.get(key)
+            owner = future is None
+            if owner:
+                future = self.loading[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            logging.info(f"Loading OCR reader for {', '.join(key)}")
+            reader = self.factory(key)
+            size = self.sizer(reader)
+        except BaseException as e:
+            with self.lock:
+                del self.loading[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            del self.loading[key]
+            self.loads += 1
+            self.entries[key] = (reader, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and len(self.entries) > 1:
+                evicted, (_, evicted_size) = self.entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+                logging.info(f"Evicted OCR reader for {', '.join(evicted)}")
+        future.set_result(reader)
+        return reader
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "readers": [",".join(key) for key in self.entries],
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+# Global instance
+_reader_registry = None
+_registry_lock = threading.Lock()
+
+def get_reader_registry() -> ReaderRegistry:
+    """Get singleton EasyOCR reader registry"""
+    global _reader_registry
+    if _reader_registry is None:
+        with _registry_lock:
+            if _reader_registry is None:
+                _reader_registry = ReaderRegistry()
+    return _reader_registry
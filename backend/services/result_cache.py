@@ -0,0 +1,160 @@
+"""
+Result Cache Service for Smart Handwritten Data Recognition
+Content-addressed cache for recognition results with a memory LRU tier and an optional disk tier
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+from core.config import OUTPUTS_DIR, OCR_CACHE_MAX_BYTES, OCR_CACHE_DISK_ENABLED
+
+def image_cache_key(image: Union[Image.Image, np.ndarray], *parts) -> str:
+    """
+    Hash the decoded pixels of an image together with extra key parts
+    
+    Args:
+        image: PIL Image or numpy array
+        *parts: Settings that change the result (mode, flags, ...)
+        
+    Returns:
+        Hex digest usable as a cache key
+    """
+    if isinstance(image, Image.Image):
+        if image.mode not in ("L", "RGB"):
+            # Palette (and other) modes store indices; hash what the page looks like
+            image = image.convert("RGB")
+        pixels = np.asarray(image)
+        image_mode = image.mode
+    else:
+        pixels = np.ascontiguousarray(image)
+        image_mode = "array"
+    
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{image_mode}|{pixels.shape}|{pixels.dtype}".encode())
+    digest.update(memoryview(pixels).cast("B"))
+    digest.update("|".join(str(p) for p in parts).encode())
+    return digest.hexdigest()
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by total value size, with optional write-through disk tier"""
+    
+    def __init__(self, max_bytes: int, disk_dir: Optional[Path] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.entries = OrderedDict()  # key -> (value, size)
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+    
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+    
+    def _store(self, key: str, value: Any, size: int):
+        """Insert into the memory tier and evict least recently used entries (lock held)"""
+        if key in self.entries:
+            self.current_bytes -= self.entries.pop(key)[1]
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+    
+    def get(self, key: str) -> Any:
+        """
+        Look up a cached value
+        
+        Returns:
+            Cached value or None on a miss
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                payload = path.read_bytes()
+                value = json.loads(payload)
+                with self.lock:
+                    self.disk_hits += 1
+                    self._store(key, value, len(payload))
+                return value
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"Ignoring unreadable cache entry {path}: {e}")
+        
+        with self.lock:
+            self.misses += 1
+        return None
+    
+    def put(self, key: str, value: Any):
+        """Cache a JSON-serialisable value"""
+        payload = json.dumps(value).encode("utf-8")
+        with self.lock:
+            self._store(key, value, len(payload))
+        
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                path.parent.mkdir(exist_ok=True)
+                tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(payload)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logging.warning(f"Failed to write cache entry {path}: {e}")
+    
+    def clear(self):
+        """Drop the memory tier (disk entries are kept)"""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_enabled": self.disk_dir is not None,
+            }
+
+# Global instance
+_ocr_cache = None
+_cache_lock = threading.Lock()
+
+def get_ocr_cache() -> ResultCache:
+    """Get singleton OCR result cache"""
+    global _ocr_cache
+    if _ocr_cache is None:
+        with _cache_lock:
+            if _ocr_cache is None:
+                disk_dir = OUTPUTS_DIR / "cache" / "ocr" if OCR_CACHE_DISK_ENABLED else None
+                _ocr_cache = ResultCache(OCR_CACHE_MAX_BYTES, disk_dir=disk_dir)
+    return _ocr_cache
@@ -0,0 +1,216 @@
+"""
+Fair Task Scheduler for Smart Handwritten Data Recognition
+Priority lanes with weighted fair queuing across users for TaskQueueService
+"""
+import threading
+import queue
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Sequence
+
+from core.config import TASK_PRIORITIES, TASK_DEFAULT_PRIORITY, TASK_USER_MAX_IN_FLIGHT, TASK_LANE_MAX_WAIT
+
+def share_key(task) -> Any:
+    """
+    Identity a task is fair-shared and capped under
+
+    Signed-in users share by user id. Anonymous tasks share by the submitting
+    client when it is known, otherwise each task stands alone, so one
+    anonymous caller cannot hold every other anonymous caller at the cap.
+    """
+    if task.user_id is not None:
+        return task.user_id
+    return ("anonymous", getattr(task, "client_id", None) or id(task))
+
+class _Flow:
+    """Queued tasks of one user within one priority lane"""
+
+    __slots__ = ("items", "last_finish")
+
+    def __init__(self):
+        self.items = deque()  # (start_tag, finish_tag, task, enqueued_at)
+        self.last_finish = 0.0
+
+class _Lane:
+    """One priority class; users share it by weighted fair queuing"""
+
+    __slots__ = ("flows", "virtual_time", "size")
+
+    def __init__(self):
+        self.flows: Dict[Any, _Flow] = {}
+        self.virtual_time = 0.0
+        self.size = 0
+
+class FairScheduler:
+    """
+    Drop-in replacement for the worker queue.Queue
+
+    Lanes are served in priority order (first lane first), except that a
+    lower lane whose oldest runnable task has waited `max_wait` seconds is
+    served ahead of the others on alternate turns, so a steady interactive
+    load cannot starve batch work and an aged batch backlog cannot starve
+    interactive work either. Within a lane every user (see share_key) gets a share of the
+    workers proportional to their weight: each task is stamped with a
+    virtual finish time of max(lane virtual time, user's previous finish) +
+    cost / weight, and the smallest stamp among eligible users runs next. A
+    user already running `max_in_flight` tasks is skipped until one of them
+    finishes.
+    """
+
+    def __init__(self, priorities: Sequence[str] = TASK_PRIORITIES,
+                 default_priority: str = TASK_DEFAULT_PRIORITY,
+                 max_in_flight: int = TASK_USER_MAX_IN_FLIGHT,
+                 user_weights: Optional[Dict[Any, float]] = None,
+                 max_wait: Optional[float] = TASK_LANE_MAX_WAIT):
+        if default_priority not in priorities:
+            raise ValueError(f"Default priority '{default_priority}' is not one of {list(priorities)}")
+        self.priorities = list(priorities)
+        self.default_priority = default_priority
+        self.max_in_flight = max_in_flight
+        self.user_weights = dict(user_weights or {})
+        self.max_wait = max_wait or None  # 0/None = strict priority
+        self.last_pop_aged = False  # The previous pop jumped an aged lane ahead of its betters
+        self.lanes = {name: _Lane() for name in self.priorities}
+        self.in_flight: Dict[Any, int] = {}
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, task, priority: Optional[str] = None, cost: float = 1.0):
+        """Queue a task in its priority lane, stamped with its virtual finish time"""
+        priority = priority or self.default_priority
+        lane = self.lanes.get(priority)
+        if lane is None:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {self.priorities}")
+
+        key = share_key(task)
+        with self.condition:
+            flow = lane.flows.get(key)
+            if flow is None:
+                flow = lane.flows[key] = _Flow()
+            start = max(lane.virtual_time, flow.last_finish)
+            flow.last_finish = start + max(cost, 0.0) / self.user_weights.get(task.user_id, 1.0)
+            flow.items.append((start, flow.last_finish, task, time.monotonic()))
+            lane.size += 1
+            self.condition.notify()
+
+    def _oldest_eligible(self, lane: _Lane) -> Optional[float]:
+        """Enqueue time of the longest-waiting task a free user could run (condition held)"""
+        oldest = None
+        for key, flow in lane.flows.items():
+            if flow.items and self.in_flight.get(key, 0) < self.max_in_flight:
+                enqueued_at = flow.items[0][3]
+                if oldest is None or enqueued_at < oldest:
+                    oldest = enqueued_at
+        return oldest
+
+    def _lane_order(self):
+        """
+        Lanes to try and the aged ones moved to the front (condition held)
+
+        Promotion alternates with normal priority order: right after an aged
+        pop the lanes are tried in priority order, so a backlog that has aged
+        as a whole takes every other turn rather than all of them.
+        """
+        if self.max_wait is None or self.last_pop_aged:
+            return self.priorities, ()
+        cutoff = time.monotonic() - self.max_wait
+        aged = []
+        for name in self.priorities[1:]:
+            lane = self.lanes[name]
+            if lane.size:
+                oldest = self._oldest_eligible(lane)
+                if oldest is not None and oldest <= cutoff:
+                    aged.append(name)
+        if not aged:
+            return self.priorities, ()
+        return aged + [name for name in self.priorities if name not in aged], aged
+
+    def _pop_eligible(self):
+        """Remove and return the next runnable task, or None (condition held)"""
+        order, promoted = self._lane_order()
+        self.last_pop_aged = False
+        for name in order:
+            lane = self.lanes[name]
+            if not lane.size:
+                continue
+            best_key, best_finish = None, None
+            idle = []
+            for key, flow in lane.flows.items():
+                if not flow.items:
+                    if flow.last_finish <= lane.virtual_time:
+                        idle.append(key)
+                    continue
+                if self.in_flight.get(key, 0) >= self.max_in_flight:
+                    continue
+                finish = flow.items[0][1]
+                if best_finish is None or finish < best_finish:
+                    best_key, best_finish = key, finish
+            for key in idle:
+                del lane.flows[key]  # Idle users earn no credit
+            if best_finish is None:
+                continue  # Everyone queued here is at their limit; try lower lanes
+
+            flow = lane.flows[best_key]
+            start, _, task, _ = flow.items.popleft()
+            lane.size -= 1
+            lane.virtual_time = max(lane.virtual_time, start)
+            self.in_flight[best_key] = self.in_flight.get(best_key, 0) + 1
+            self.last_pop_aged = name in promoted
+            return task
+        return None
+
+    def get(self, timeout: Optional[float] = None):
+        """
+        Block until a task is runnable
+
+        Returns:
+            The task, or None once the scheduler is closed
+
+        Raises:
+            queue.Empty: If nothing became runnable within `timeout` seconds
+        """
+        with self.condition:
+            while True:
+                if self.closed:
+                    return None
+                task = self._pop_eligible()
+                if task is not None:
+                    return task
+                if not self.condition.wait(timeout):
+                    raise queue.Empty
+
+    def task_done(self, task):
+        """Release the task's in-flight slot so its user can run more work"""
+        key = share_key(task)
+        with self.condition:
+            remaining = self.in_flight.get(key, 0) - 1
+            if remaining > 0:
+                self.in_flight[key] = remaining
+            else:
+                self.in_flight.pop(key, None)
+            self.condition.notify_all()
+
+    def close(self):
+        """Wake every waiting worker and make get() return None"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def reopen(self):
+        with self.condition:
+            self.closed = False
+
+    def qsize(self) -> int:
+        with self.condition:
+            return sum(lane.size for lane in self.lanes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Queued tasks per lane and running tasks per user"""
+        with self.condition:
+            return {
+                "queued": {name: lane.size for name, lane in self.lanes.items()},
+                "in_flight_users": len(self.in_flight),
+                "in_flight": sum(self.in_flight.values()),
+                "max_in_flight_per_user": self.max_in_flight,
+                "lane_max_wait": self.max_wait,
+            }
@@ -0,0 +1,162 @@
+"""
+Task Journal for Smart Handwritten Data Recognition
+SQLite journal of submitted tasks so queued work survives restarts and crashes
+"""
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.config import TASK_JOURNAL_FLUSH_INTERVAL
+
+class TaskJournal:
+    """
+    Durable record of task submissions and outcomes
+
+    A task is written once when submitted (with its pickled function reference
+    and arguments) and once when it finishes (status plus the result: small
+    results inline, larger ones by reference to a pickle file; job outputs are
+    themselves files, so their results are only a path). Anything still
+    pending at startup is replayed, so a task that was running when the
+    process died runs again: delivery is at-least-once.
+
+    Submissions commit before record_submit returns. Outcomes are group
+    committed by a background thread every `flush_interval` seconds, which
+    keeps worker threads off the journal lock; an outcome lost in a crash just
+    means the task runs once more. WAL mode with synchronous=NORMAL survives
+    process crashes without an fsync per commit.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = TASK_JOURNAL_FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.pending_finishes = []
+        self.pending_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "task_id TEXT PRIMARY KEY, task_type TEXT, user_id TEXT, priority TEXT, cost REAL NOT NULL, "
+            "status TEXT NOT NULL, payload BLOB, result BLOB, result_path TEXT, error TEXT, "
+            "created_at REAL NOT NULL, finished_at REAL)"
+        )
+        self.conn.commit()
+        self.flusher = threading.Thread(target=self._flush_loop, name="task-journal", daemon=True)
+        self.flusher.start()
+
+    def record_submit(self, task, cost: float) -> bool:
+        """
+        Journal a newly queued task
+
+        Returns:
+            False if the task cannot be pickled (e.g. a lambda) and is therefore not durable
+        """
+        try:
+            payload = pickle.dumps((task.func, task.args, task.kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logging.warning(f"Task {task.task_id} is not journaled, its arguments cannot be pickled: {e}")
+            return False
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tasks (task_id, task_type, user_id, priority, cost, status, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (task.task_id, task.task_type, task.user_id, task.priority, cost,
+                 task.status.value, payload, task.created_at),
+            )
+            self.conn.commit()
+        return True
+
+    def record_finish(self, task, result: Optional[bytes] = None):
+        """Queue the outcome of a task (pickled result or task.result_path) for the next group commit"""
+        row = (task.status.value, result, task.result_path, task.error,
+               task.finished_at or time.time(), task.task_id)
+        with self.pending_lock:
+            self.pending_finishes.append(row)
+
+    def flush(self):
+        """Write queued outcomes in one transaction and drop the finished tasks' arguments"""
+        with self.pending_lock:
+            rows, self.pending_finishes = self.pending_finishes, []
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE tasks SET status = ?, payload = NULL, result = ?, result_path = ?, error = ?, finished_at = ? "
+                "WHERE task_id = ?",
+                rows,
+            )
+            self.conn.commit()
+
+    def _flush_loop(self):
+        while not self.closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Task journal flush failed: {e}")
+
+    def delete(self, task_id: str):
+        self.flush()
+        with self.lock:
+            self.conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+            self.conn.commit()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        All journaled tasks in submission order
+
+        Pending rows carry "func", "args" and "kwargs", finished rows with an
+        inline result carry "result"; rows whose payload no longer unpickles
+        (e.g. the function was renamed) come back as failed.
+        """
+        self.flush()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT task_id, task_type, user_id, priority, cost, status, payload, result, result_path, error, "
+                "created_at, finished_at FROM tasks ORDER BY created_at, rowid"
+            ).fetchall()
+
+        entries = []
+        for (task_id, task_type, user_id, priority, cost, status, payload,
+             result, result_path, error, created_at, finished_at) in rows:
+            entry = {
+                "task_id": task_id, "task_type": task_type, "user_id": user_id, "priority": priority,
+                "cost": cost, "status": status, "result_path": result_path, "error": error,
+                "created_at": created_at, "finished_at": finished_at,
+            }
+            if payload is not None:
+                try:
+                    entry["func"], entry["args"], entry["kwargs"] = pickle.loads(payload)
+                except Exception as e:
+                    entry["status"] = "failed"
+                    entry["error"] = f"Could not restore task after restart: {e}"
+            if result is not None:
+                try:
+                    entry["result"] = pickle.loads(result)
+                except Exception as e:
+                    entry["status"] = "failed"
+                    entry["error"] = f"Could not restore result after restart: {e}"
+            entries.append(entry)
+        return entries
+
+    def count(self, status: Optional[str] = None) -> int:
+        self.flush()
+        with self.lock:
+            if status is None:
+                return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            return self.conn.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (status,)).fetchone()[0]
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.flusher.join()
+        self.flush()
+        with self.lock:
+            self.conn.close()
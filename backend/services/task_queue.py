@@ -5,14 +5,32 @@ Provides thread-safe background processing queue
 import threading
 import queue
 import logging
-from typing import Callable, Any, Optional
+import os
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Any, Optional, Dict, List
 from enum import Enum
+from core.config import (
+    JOB_WORKERS, TASK_DEFAULT_TIMEOUT, TASK_RESULT_TTL, TASK_RESULT_MAX_BYTES, TASK_SPILL_DIR,
+    TASK_PROCESS_TYPES, TASK_PROCESS_WORKERS, TASK_JOURNAL_ENABLED, TASK_JOURNAL_PATH,
+    TASK_JOURNAL_INLINE_BYTES,
+)
+from services.scheduler import FairScheduler
+from services.process_backend import ProcessBackend
+from services.task_journal import TaskJournal
+from services.cancellation import CancellationToken, TaskCancelled, use_token
 
 class TaskStatus(Enum):
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
 
 class Task:
     """Represents a task in the queue"""
@@ -25,18 +43,65 @@ class Task:
         self.status = TaskStatus.PENDING
         self.result = None
         self.error = None
+        self.user_id = None
+        self.client_id = None  # Fair-share key for anonymous tasks, e.g. the client address
+        self.task_type = None
+        self.priority = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result_size = 0
+        self.result_path = None  # Set when the result was spilled or journaled to disk
+        self.journaled = False
+        self.token = CancellationToken()
+
+def estimate_size(obj: Any) -> int:
+    """Approximate memory held by a task result, in bytes"""
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+    if isinstance(obj, str):
+        return len(obj.encode("utf-8", errors="ignore"))
+    if hasattr(obj, "nbytes"):  # numpy arrays
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_size(item) for item in obj)
+    return sys.getsizeof(obj)
 
 class TaskQueueService:
     """Thread-safe task queue for background processing"""
     
-    def __init__(self, max_workers: int = 4):
+    def __init__(self, max_workers: int = 4, result_ttl: float = TASK_RESULT_TTL,
+                 max_result_bytes: int = TASK_RESULT_MAX_BYTES, spill_dir: Path = TASK_SPILL_DIR,
+                 scheduler: Optional[FairScheduler] = None,
+                 process_backend: Optional[ProcessBackend] = None,
+                 journal: Optional[TaskJournal] = None):
         self.max_workers = max_workers
-        self.task_queue = queue.Queue()
+        self.task_queue = scheduler or FairScheduler()
+        # Task types listed in process_backend.task_types run in its worker processes
+        self.process_backend = process_backend
         self.results = {}
         self.workers = []
         self.lock = threading.Lock()
         self.running = False
         
+        # Result retention
+        self.result_ttl = result_ttl
+        self.max_result_bytes = max_result_bytes
+        self.spill_dir = Path(spill_dir)
+        self.retained = OrderedDict()  # task_id -> result size, oldest finished first
+        self.retained_bytes = 0
+        self.spilled_count = 0
+        self.expired_count = 0
+        self.expiry_listeners: List[Callable[[Task], None]] = []
+        
+        # Durable mode: restore journaled tasks before workers start
+        self.journal = journal
+        self.replayed_count = 0
+        if self.journal is not None:
+            self._replay()
+        
         # Start worker threads
         self.start_workers()
     
@@ -44,6 +109,7 @@ class TaskQueueService:
         """Start worker threads"""
         if not self.running:
             self.running = True
+            self.task_queue.reopen()
             for i in range(self.max_workers):
                 worker = threading.Thread(target=self._worker, daemon=True)
                 worker.start()
@@ -53,15 +119,16 @@ class TaskQueueService:
     def stop_workers(self):
         """Stop worker threads"""
         self.running = False
-        # Add sentinel values to wake up workers
-        for _ in range(self.max_workers):
-            self.task_queue.put(None)
+        # Wake up idle workers
+        self.task_queue.close()
         
         # Wait for workers to finish
         for worker in self.workers:
             worker.join()
         
         self.workers.clear()
+        if self.process_backend is not None:
+            self.process_backend.shutdown(wait=False)
         logging.info("Stopped worker threads")
     
     def _worker(self):
@@ -69,36 +136,236 @@ class TaskQueueService:
         while self.running:
             try:
                 task = self.task_queue.get(timeout=1)
-                if task is None:  # Sentinel value to stop worker
+                if task is None:  # Scheduler closed
                     break
                 
                 with self.lock:
-                    task.status = TaskStatus.IN_PROGRESS
+                    if task.status == TaskStatus.CANCELLED:
+                        # Cancelled while queued; cancel_task() already recorded it
+                        skip = True
+                    else:
+                        skip = False
+                        task.status = TaskStatus.IN_PROGRESS
+                        task.started_at = time.time()
+                if skip:
+                    self.task_queue.task_done(task)
+                    continue
                 
+                journal_result = None
                 try:
-                    # Execute the task
-                    result = task.func(*task.args, **task.kwargs)
+                    # Execute the task; checkpoint() calls inside see task.token
+                    with use_token(task.token):
+                        task.token.check()
+                        if self.process_backend is not None and task.task_type in self.process_backend.task_types:
+                            result = self.process_backend.run(task.func, *task.args, **task.kwargs)
+                        else:
+                            result = task.func(*task.args, **task.kwargs)
                     
                     with self.lock:
                         task.status = TaskStatus.COMPLETED
                         task.result = result
-                        self.results[task.task_id] = task
+                        self._finish(task)
                         
+                except TaskCancelled as e:
+                    with self.lock:
+                        task.status = TaskStatus.CANCELLED
+                        task.error = str(e) or "Cancelled"
+                        self._finish(task)
+                    logging.info(f"Task {task.task_id} stopped: {task.error}")
                 except Exception as e:
                     with self.lock:
                         task.status = TaskStatus.FAILED
                         task.error = str(e)
-                        self.results[task.task_id] = task
+                        self._finish(task)
                     logging.error(f"Task {task.task_id} failed: {str(e)}")
                 
-                self.task_queue.task_done()
+                if task.journaled:
+                    if task.status == TaskStatus.COMPLETED:
+                        journal_result = self._durable_result(task)
+                    self.journal.record_finish(task, journal_result)
+                self.task_queue.task_done(task)
+                self._enforce_retention()
                 
             except queue.Empty:
+                self._enforce_retention()
                 continue
             except Exception as e:
                 logging.error(f"Worker error: {str(e)}")
     
-    def add_task(self, task_id: str, func: Callable, *args, **kwargs) -> str:
+    def _durable_result(self, task: Task) -> Optional[bytes]:
+        """
+        Pickle a completed task's result for the journal
+        
+        Small results are returned for storing inline; large ones are written
+        to a file recorded in task.result_path. The task has already
+        succeeded, so a result that cannot be pickled or written is logged
+        and the task is journaled without one.
+        """
+        with self.lock:
+            result = task.result
+            if result is None and task.result_path is not None:
+                return None  # Already spilled to disk
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(data) <= TASK_JOURNAL_INLINE_BYTES:
+                return data
+            path = self._write_result(task.task_id, data)
+            with self.lock:
+                task.result_path = path
+        except Exception as e:
+            logging.error(f"Result of task {task.task_id} is not durable: {e}")
+        return None
+    
+    def _finish(self, task: Task):
+        """Record a finished task and drop its inputs (lock held)"""
+        task.finished_at = time.time()
+        # Arguments can hold raw uploads; they are never needed again
+        task.args = ()
+        task.kwargs = {}
+        task.result_size = estimate_size(task.result) if task.result is not None else 0
+        self.results[task.task_id] = task
+        self.retained[task.task_id] = task.result_size
+        self.retained_bytes += task.result_size
+    
+    def _write_result(self, task_id: str, data: bytes) -> str:
+        """Write a pickled result under spill_dir and return its path"""
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f"{task_id}.pkl"
+        with open(path, "wb") as f:
+            f.write(data)
+        return str(path)
+    
+    def _spill(self, task: Task, result: Any, result_path: Optional[str]):
+        """
+        Move a task result from memory to disk
+        
+        Pickling and writing run without the lock; it is taken again only to
+        swap the in-memory result for its file, and only if the task still
+        holds that result and has not expired in the meantime.
+        """
+        if result_path is None:
+            result_path = self._write_result(
+                task.task_id, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+        with self.lock:
+            if task.result is not result:
+                return
+            task.result_path = result_path
+            task.result = None
+            self.spilled_count += 1
+            expired = self.results.get(task.task_id) is not task
+        if expired:
+            try:
+                os.remove(result_path)
+            except OSError:
+                pass
+    
+    def _replay(self):
+        """Re-queue journaled tasks that never finished and restore finished ones"""
+        for entry in self.journal.load():
+            task = Task(entry["task_id"], entry.get("func"), *entry.get("args", ()), **entry.get("kwargs", {}))
+            task.user_id = entry["user_id"]
+            task.task_type = entry["task_type"]
+            task.priority = entry["priority"]
+            task.created_at = entry["created_at"]
+            task.journaled = True
+            task.token = CancellationToken(TASK_DEFAULT_TIMEOUT)  # Deadlines restart with the process
+            
+            if entry["status"] in (TaskStatus.PENDING.value, TaskStatus.IN_PROGRESS.value):
+                with self.lock:
+                    self.results[task.task_id] = task
+                self.task_queue.put(task, priority=task.priority, cost=entry["cost"])
+                self.replayed_count += 1
+                continue
+            
+            task.status = TaskStatus(entry["status"])
+            task.error = entry["error"]
+            task.result = entry.get("result")
+            task.result_path = entry["result_path"]
+            task.finished_at = entry["finished_at"] or time.time()
+            with self.lock:
+                self.results[task.task_id] = task
+                if task.result is not None:
+                    task.result_size = estimate_size(task.result)
+                    self.retained[task.task_id] = task.result_size
+                    self.retained_bytes += task.result_size
+            if entry["finished_at"] is None:
+                self.journal.record_finish(task)  # Pending task whose payload could not be restored
+        
+        if self.replayed_count:
+            logging.info(f"Replayed {self.replayed_count} unfinished tasks from the journal")
+    
+    def _enforce_retention(self):
+        """Expire finished tasks past their TTL and spill results beyond the byte cap"""
+        expired, spill = [], []
+        with self.lock:
+            now = time.time()
+            for task_id, task in list(self.results.items()):
+                if task.finished_at is not None and now - task.finished_at > self.result_ttl:
+                    del self.results[task_id]
+                    self.retained_bytes -= self.retained.pop(task_id, 0)
+                    expired.append(task)
+            
+            while self.retained_bytes > self.max_result_bytes and self.retained:
+                task_id, size = self.retained.popitem(last=False)
+                self.retained_bytes -= size
+                task = self.results.get(task_id)
+                if task is None or task.result is None:
+                    continue
+                spill.append((task, task.result, task.result_path))
+            self.expired_count += len(expired)
+        
+        for task, result, result_path in spill:
+            try:
+                self._spill(task, result, result_path)
+            except Exception as e:
+                logging.error(f"Failed to spill result of task {task.task_id}: {e}")
+                with self.lock:
+                    if task.result is result:
+                        task.result = None
+                        task.status = TaskStatus.FAILED
+                        task.error = f"Result evicted: {e}"
+        
+        for task in expired:
+            if task.journaled:
+                self.journal.delete(task.task_id)
+            if task.result_path:
+                try:
+                    os.remove(task.result_path)
+                except OSError:
+                    pass
+            for listener in self.expiry_listeners:
+                try:
+                    listener(task)
+                except Exception as e:
+                    logging.error(f"Expiry listener failed for task {task.task_id}: {e}")
+    
+    def add_expiry_listener(self, listener: Callable[[Task], None]):
+        """Register a callback run when a finished task expires (e.g. to delete its files)"""
+        self.expiry_listeners.append(listener)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue and result-retention statistics"""
+        with self.lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self.task_queue.qsize(),
+                "scheduler": self.task_queue.stats(),
+                "process_backend": self.process_backend.stats() if self.process_backend else None,
+                "tracked": len(self.results),
+                "retained_count": len(self.retained),
+                "retained_bytes": self.retained_bytes,
+                "max_result_bytes": self.max_result_bytes,
+                "spilled_count": self.spilled_count,
+                "expired_count": self.expired_count,
+                "result_ttl": self.result_ttl,
+                "durable": self.journal is not None,
+                "replayed_count": self.replayed_count,
+            }
+    
+    def add_task(self, task_id: str, func: Callable, *args, user_id: Optional[str] = None,
+                 client_id: Optional[str] = None, task_type: Optional[str] = None, priority: Optional[str] = None,
+                 cost: float = 1.0, timeout: Optional[float] = TASK_DEFAULT_TIMEOUT, **kwargs) -> str:
         """
         Add a task to the queue
         
@@ -106,17 +373,69 @@ class TaskQueueService:
             task_id: Unique identifier for the task
             func: Function to execute
             *args: Positional arguments for the function
+            user_id: Owner of the task (reserved keyword, not passed to func)
+            client_id: Submitting client, shares the queue for anonymous tasks (reserved keyword)
+            task_type: Operation name, e.g. "ocr" (reserved keyword, not passed to func)
+            priority: Scheduler lane, e.g. "interactive" or "batch" (reserved keyword)
+            cost: Relative amount of work, e.g. page count, used for fair sharing (reserved keyword)
+            timeout: Seconds from submission after which the task is cancelled, None for no deadline (reserved keyword)
             **kwargs: Keyword arguments for the function
             
         Returns:
             Task ID
         """
         task = Task(task_id, func, *args, **kwargs)
+        task.user_id = user_id
+        task.client_id = client_id
+        task.task_type = task_type
+        task.priority = priority or self.task_queue.default_priority
+        task.token = CancellationToken(timeout)
+        if task.priority not in self.task_queue.lanes:
+            raise ValueError(f"Unknown priority '{task.priority}', expected one of {self.task_queue.priorities}")
+        if self.journal is not None:
+            task.journaled = self.journal.record_submit(task, cost)
         with self.lock:
             self.results[task_id] = task
-        self.task_queue.put(task)
+        self.task_queue.put(task, priority=task.priority, cost=cost)
         return task_id
     
+    def cancel_task(self, task_id: str, reason: str = "Cancelled") -> bool:
+        """
+        Cancel a queued or running task
+        
+        Queued tasks are finished as cancelled immediately; running tasks stop
+        at their next checkpoint().
+        
+        Returns:
+            False if the task is unknown or already finished
+        """
+        with self.lock:
+            task = self.results.get(task_id)
+            if task is None or task.status in FINISHED_STATUSES:
+                return False
+            task.token.cancel(reason)
+            if task.status != TaskStatus.PENDING:
+                return True
+            task.status = TaskStatus.CANCELLED
+            task.error = reason
+            self._finish(task)
+        if task.journaled:
+            self.journal.record_finish(task)
+        return True
+    
+    def get_task(self, task_id: str) -> Optional[Task]:
+        """
+        Get a task by ID
+        
+        Args:
+            task_id: Task identifier
+            
+        Returns:
+            Task or None if task not found
+        """
+        with self.lock:
+            return self.results.get(task_id)
+    
     def get_task_status(self, task_id: str) -> Optional[TaskStatus]:
         """
         Get the status of a task
@@ -143,13 +462,23 @@ class TaskQueueService:
             Task result or None if task not completed or failed
         """
         with self.lock:
-            if task_id in self.results:
-                task = self.results[task_id]
-                if task.status == TaskStatus.COMPLETED:
-                    return task.result
-                elif task.status == TaskStatus.FAILED:
-                    raise Exception(f"Task failed: {task.error}")
-        return None
+            task = self.results.get(task_id)
+            if task is None:
+                return None
+            if task.status == TaskStatus.FAILED:
+                raise Exception(f"Task failed: {task.error}")
+            if task.status != TaskStatus.COMPLETED:
+                return None
+            if task.result is not None or task.result_path is None:
+                return task.result
+            result_path = task.result_path
+        
+        # Spilled results are read back from disk on demand
+        try:
+            with open(result_path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None  # Expired while we were reading
 
 # Global instance
 _task_queue_service = None
@@ -161,7 +490,18 @@ def get_task_queue_service() -> TaskQueueService:
     if _task_queue_service is None:
         with _service_lock:
             if _task_queue_service is None:
-                _task_queue_service = TaskQueueService()
+                process_backend = None
+                if TASK_PROCESS_TYPES:
+                    process_backend = ProcessBackend(
+                        TASK_PROCESS_WORKERS,
+                        modules=("services.jobs",),
+                        preload="services.jobs.preload_models",
+                        task_types=TASK_PROCESS_TYPES,
+                    )
+                journal = TaskJournal(TASK_JOURNAL_PATH) if TASK_JOURNAL_ENABLED else None
+                _task_queue_service = TaskQueueService(
+                    max_workers=JOB_WORKERS, process_backend=process_backend, journal=journal
+                )
     return _task_queue_service
 
 # For testing purposes
@@ -0,0 +1,124 @@
+"""
+Unit tests for cancellation tokens and deadlines
+"""
+import unittest
+import asyncio
+import threading
+import time
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.cancellation import (
+    CancellationToken, TaskCancelled, DeadlineExceeded, checkpoint, use_token,
+)
+from services.executor import BoundedExecutor
+from services.process_backend import ProcessBackend
+from services.task_queue import TaskQueueService, TaskStatus
+from tests.test_task_queue import wait_for
+
+def spin(seconds: float = 30.0) -> str:
+    """Busy loop with checkpoints; module-level so worker processes can import it"""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        checkpoint()
+        time.sleep(0.01)
+    return "finished"
+
+class TestCancellationToken(unittest.TestCase):
+    
+    def test_checkpoint_without_token_is_noop(self):
+        checkpoint()
+    
+    def test_cancel_and_deadline(self):
+        token = CancellationToken()
+        with use_token(token):
+            checkpoint()
+            token.cancel("stop")
+            with self.assertRaisesRegex(TaskCancelled, "stop"):
+                checkpoint()
+        with self.assertRaises(DeadlineExceeded):
+            CancellationToken(timeout=0).check()
+    
+    def test_callbacks_run_once(self):
+        calls = []
+        token = CancellationToken()
+        token.add_callback(lambda: calls.append(1))
+        token.cancel()
+        token.cancel()
+        token.add_callback(lambda: calls.append(2))
+        self.assertEqual(calls, [1, 2])
+
+class TestExecutorCancellation(unittest.TestCase):
+    
+    def test_thread_work_stops_at_checkpoint(self):
+        """Test that the caller's token reaches checkpoints on the pool thread"""
+        executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+        token = CancellationToken()
+        
+        async def scenario():
+            with use_token(token):
+                future = asyncio.ensure_future(executor.run(spin))
+            await asyncio.sleep(0.05)
+            token.cancel("Client disconnected")
+            with self.assertRaises(TaskCancelled):
+                await asyncio.wait_for(future, 5)
+        try:
+            asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+    
+    def test_process_work_stops_at_checkpoint(self):
+        """Test that cancellation crosses into a worker process via the shared flag"""
+        backend = ProcessBackend(1)
+        token = CancellationToken()
+        try:
+            timer = threading.Timer(1.0, token.cancel)
+            timer.start()
+            start = time.monotonic()
+            with use_token(token), self.assertRaises(TaskCancelled):
+                backend.run(spin)
+            self.assertLess(time.monotonic() - start, 20)
+            # The slot is free again and the next call is unaffected
+            self.assertEqual(backend.run(spin, 0.05), "finished")
+        finally:
+            backend.shutdown()
+
+class TestTaskQueueCancellation(unittest.TestCase):
+    
+    def setUp(self):
+        self.service = TaskQueueService(max_workers=1)
+    
+    def tearDown(self):
+        self.service.stop_workers()
+    
+    def test_cancel_running_task(self):
+        self.service.add_task("t1", spin)
+        time.sleep(0.1)
+        self.assertTrue(self.service.cancel_task("t1", "Cancelled by user"))
+        self.assertEqual(wait_for(self.service, "t1"), TaskStatus.CANCELLED)
+        self.assertEqual(self.service.get_task("t1").error, "Cancelled by user")
+        self.assertFalse(self.service.cancel_task("t1"))
+    
+    def test_cancel_queued_task_never_runs(self):
+        gate = threading.Event()
+        ran = []
+        self.service.add_task("blocker", gate.wait, 5)
+        self.service.add_task("t2", lambda: ran.append(1))
+        self.assertTrue(self.service.cancel_task("t2"))
+        self.assertEqual(self.service.get_task_status("t2"), TaskStatus.CANCELLED)
+        gate.set()
+        wait_for(self.service, "blocker")
+        self.service.add_task("t3", lambda: "after")
+        self.assertEqual(wait_for(self.service, "t3"), TaskStatus.COMPLETED)
+        self.assertEqual(ran, [])
+    
+    def test_deadline(self):
+        self.service.add_task("t1", spin, timeout=0.2)
+        self.assertEqual(wait_for(self.service, "t1"), TaskStatus.CANCELLED)
+        self.assertIn("Deadline", self.service.get_task("t1").error)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Unit tests for the bounded executor service
+"""
+import unittest
+import asyncio
+import threading
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.executor import BoundedExecutor, ExecutorSaturated
+
+class TestBoundedExecutor(unittest.TestCase):
+    
+    def test_run_returns_result(self):
+        """Test that work runs on the pool and the result is returned"""
+        executor = BoundedExecutor("test", max_workers=2, max_queue=2)
+        try:
+            result = asyncio.run(executor.run(pow, 2, 10))
+            self.assertEqual(result, 1024)
+            self.assertEqual(executor.stats()["in_flight"], 0)
+            self.assertEqual(executor.stats()["completed"], 1)
+        finally:
+            executor.shutdown()
+    
+    def test_saturated_executor_rejects(self):
+        """Test that jobs beyond workers + queue are rejected"""
+        executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+        gate = threading.Event()
+        
+        async def scenario():
+            first = asyncio.ensure_future(executor.run(gate.wait, 5))
+            second = asyncio.ensure_future(executor.run(gate.wait, 5))
+            await asyncio.sleep(0.05)
+            self.assertEqual(executor.queue_depth, 1)
+            with self.assertRaises(ExecutorSaturated):
+                await executor.run(gate.wait, 5)
+            gate.set()
+            await asyncio.gather(first, second)
+        
+        try:
+            asyncio.run(scenario())
+            self.assertEqual(executor.stats()["rejected"], 1)
+            self.assertEqual(executor.stats()["in_flight"], 0)
+        finally:
+            gate.set()
+            executor.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Tests for the pooled Gemini client against a local stub HTTP server
+"""
+import unittest
+import asyncio
+import json
+import threading
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    from modules import gemini_client
+    from modules.gemini_client import GeminiClient, GeminiTransport
+    MODULE_AVAILABLE = True
+except ImportError:
+    MODULE_AVAILABLE = False
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Echoes the prompt back in Gemini's response shape and records client ports"""
+    protocol_version = "HTTP/1.1"  # keep-alive
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["contents"][0]["parts"][0]["text"]
+        self.server.client_ports.add(self.client_address[1])
+        if "fail" in prompt:
+            status, payload = 500, {"error": "stub failure"}
+        else:
+            status, payload = 200, {"candidates": [{"content": {"parts": [{"text": f"echo:{prompt}"}]}}]}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, *args):
+        pass
+
+@unittest.skipIf(not MODULE_AVAILABLE, "Gemini client dependencies not available")
+class TestGeminiClient(unittest.TestCase):
+    
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGeminiHandler)
+        self.server.client_ports = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.transport = GeminiTransport(max_connections=2, max_concurrency=2, timeout=5)
+        self.client = GeminiClient(
+            api_key="test-key",
+            base_url=f"http://127.0.0.1:{self.server.server_port}/generate",
+            transport=self.transport,
+        )
+    
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def test_sync_calls_reuse_connection(self):
+        """Test that sequential sync calls share one keep-alive connection"""
+        for i in range(5):
+            self.assertEqual(self.client._generate(f"p{i}"), f"echo:p{i}")
+        self.assertEqual(len(self.server.client_ports), 1)
+    
+    def test_async_calls_respect_pool_limit(self):
+        """Test that concurrent async calls never open more than max_connections"""
+        async def run_all():
+            return await asyncio.gather(*(self.client.agenerate(f"q{i}") for i in range(10)))
+        
+        results = asyncio.run(run_all())
+        self.assertEqual(results, [f"echo:q{i}" for i in range(10)])
+        self.assertLessEqual(len(self.server.client_ports), 2)
+    
+    def test_api_error_returns_fallback(self):
+        """Test that API errors fall back to the original text"""
+        self.assertEqual(self.client._generate("fail"), "")
+        self.assertEqual(self.client.correct_ocr_text("fail me"), "fail me")
+    
+    def test_shared_client_creates_transport(self):
+        """Test that the first get_gemini_client() call also builds the shared transport"""
+        saved = gemini_client._gemini_client, gemini_client._transport
+        gemini_client._gemini_client = gemini_client._transport = None
+        try:
+            worker = threading.Thread(target=gemini_client.get_gemini_client, daemon=True)
+            worker.start()
+            worker.join(5)
+            self.assertFalse(worker.is_alive())
+            self.assertIs(gemini_client.get_gemini_client().transport, gemini_client._transport)
+        finally:
+            gemini_client._gemini_client, gemini_client._transport = saved
+
+if __name__ == '__main__':
+    unittest.main()
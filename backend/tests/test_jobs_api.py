@@ -0,0 +1,77 @@
+"""
+Unit tests for background job submission
+"""
+import unittest
+import json
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api.routers import jobs as jobs_router
+    from api.routers.history import get_current_user
+    API_AVAILABLE = True
+except ImportError:
+    API_AVAILABLE = False
+
+class FakeTaskQueue:
+    """Records submitted jobs instead of running them"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def add_task(self, task_id, func, job_dir, uploads, options, **kwargs):
+        self.submitted.append((options, kwargs))
+        return task_id
+
+@unittest.skipIf(not API_AVAILABLE, "API dependencies not available")
+class TestSubmitJob(unittest.TestCase):
+
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(jobs_router.router, prefix="/api/jobs")
+        app.dependency_overrides[get_current_user] = lambda: None
+        self.client = TestClient(app)
+        self.queue = FakeTaskQueue()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for target, value in [("get_task_queue_service", mock.Mock(return_value=self.queue)),
+                              ("JOBS_DIR", Path(tmp.name))]:
+            patcher = mock.patch.object(jobs_router, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def submit(self, options):
+        return self.client.post("/api/jobs/", data={"operation": "translate", "options": json.dumps(options)})
+
+    def test_languages_are_normalized(self):
+        response = self.submit({"text": "hello", "languages": "HI, hi"})
+        self.assertEqual(response.status_code, 202)
+        options, kwargs = self.queue.submitted[0]
+        self.assertEqual(options["languages"], ["en", "hi"])
+        self.assertEqual(kwargs["client_id"], "testclient")
+
+    def test_unsupported_language(self):
+        for languages in ("en,xx", ["fr"], 5):
+            with self.subTest(languages=languages):
+                self.assertEqual(self.submit({"languages": languages}).status_code, 400)
+        self.assertEqual(self.queue.submitted, [])
+
+    def test_dpi_bounds(self):
+        for dpi in (10, 10000, "150", 150.5):
+            with self.subTest(dpi=dpi):
+                self.assertEqual(self.submit({"dpi": dpi}).status_code, 400)
+        self.assertEqual(self.submit({"text": "hello", "dpi": 300}).status_code, 202)
+
+    def test_unknown_operation(self):
+        response = self.client.post("/api/jobs/", data={"operation": "teleport"})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
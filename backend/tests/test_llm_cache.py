@@ -0,0 +1,101 @@
+"""
+Unit tests for the LLM response cache
+"""
+import unittest
+import tempfile
+import time
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services import llm_cache
+from services.llm_cache import LLMCache, MemoryCacheBackend, SQLiteCacheBackend, get_llm_cache
+
+try:
+    from modules.gemini_client import GeminiClient
+    CLIENT_AVAILABLE = True
+except ImportError:
+    CLIENT_AVAILABLE = False
+
+class TestLLMCache(unittest.TestCase):
+    
+    def test_shared_cache_per_namespace(self):
+        """Test that each namespace gets its own keys on one shared backend"""
+        with mock.patch.multiple(llm_cache, _llm_backend=None, _llm_backend_created=False, _llm_caches={},
+                                 LLM_CACHE_BACKEND="memory"):
+            first, second = get_llm_cache("model-a"), get_llm_cache("model-b")
+            self.assertIs(first, get_llm_cache("model-a"))
+            self.assertIsNot(first, second)
+            self.assertIs(first.backend, second.backend)
+            first.set("correct", "prompt", "answer a")
+            self.assertIsNone(second.get("correct", "prompt"))
+            self.assertEqual(get_llm_cache("model-a").get("correct", "prompt"), "answer a")
+    
+    def test_no_cache_when_disabled(self):
+        """Test that LLM_CACHE_BACKEND=none disables caching for every namespace"""
+        with mock.patch.multiple(llm_cache, _llm_backend=None, _llm_backend_created=False, _llm_caches={},
+                                 LLM_CACHE_BACKEND="none"):
+            self.assertIsNone(get_llm_cache("model-a"))
+    
+    def test_memory_backend_ttl_and_lru(self):
+        """Test TTL expiry and least-recently-used eviction"""
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set("a", "1", ttl=60)
+        backend.set("b", "2", ttl=60)
+        backend.get("a")
+        backend.set("c", "3", ttl=60)  # evicts b
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("a"), "1")
+        backend.set("d", "4", ttl=-1)  # already expired
+        self.assertIsNone(backend.get("d"))
+    
+    def test_sqlite_backend_persists_and_bounds(self):
+        """Test that the SQLite backend survives reopening and caps its size"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cache.sqlite3"
+            backend = SQLiteCacheBackend(path, max_entries=2)
+            for key in ("a", "b", "c"):
+                backend.set(key, key.upper(), ttl=60)
+                time.sleep(0.01)
+            self.assertEqual(len(backend), 2)
+            self.assertIsNone(backend.get("a"))
+            backend.conn.close()
+            
+            reopened = SQLiteCacheBackend(path, max_entries=2)
+            self.assertEqual(reopened.get("c"), "C")
+            reopened.conn.close()
+    
+    def test_hit_rates_per_method(self):
+        """Test that hits and misses are counted per method"""
+        cache = LLMCache(MemoryCacheBackend(10), ttl=60)
+        cache.get("correct_ocr_text", "p")
+        cache.set("correct_ocr_text", "p", "fixed")
+        self.assertEqual(cache.get("correct_ocr_text", "p"), "fixed")
+        self.assertIsNone(cache.get("detect_language", "p"))
+        methods = cache.stats()["methods"]
+        self.assertEqual(methods["correct_ocr_text"], {"hits": 1, "misses": 1, "hit_rate": 0.5})
+        self.assertEqual(methods["detect_language"]["misses"], 1)
+    
+    @unittest.skipIf(not CLIENT_AVAILABLE, "Gemini client dependencies not available")
+    def test_client_serves_repeats_from_cache(self):
+        """Test that repeated prompts reach the API once and failures are not cached"""
+        calls = []
+        
+        class CountingClient(GeminiClient):
+            def _generate(self, prompt):
+                calls.append(prompt)
+                return "" if "broken" in prompt else "$x = 2$"
+        
+        client = CountingClient(api_key="test-key", cache=LLMCache(MemoryCacheBackend(10), ttl=60))
+        self.assertEqual(client.solve_math_problem("x+1=3"), "$x = 2$")
+        self.assertEqual(client.solve_math_problem("x+1=3"), "$x = 2$")
+        self.assertEqual(len(calls), 1)
+        client.correct_ocr_text("broken")
+        client.correct_ocr_text("broken")
+        self.assertEqual(len(calls), 3)
+
+if __name__ == '__main__':
+    unittest.main()
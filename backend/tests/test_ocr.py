@@ -2,6 +2,7 @@
 Unit tests for OCR module
 """
 import unittest
+from unittest import mock
 import numpy as np
 from PIL import Image
 import sys
@@ -11,6 +12,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 try:
+    from modules import ocr
     from modules.ocr import OCRModule
     MODULE_AVAILABLE = True
 except ImportError:
@@ -59,5 +61,70 @@ class TestOCRModule(unittest.TestCase):
         # Check data type
         self.assertEqual(processed.dtype, np.uint8)
 
+class FakeTrOCR:
+    """Stands in for generate_text: "reads" each crop as its width, failing batches with a given width"""
+    
+    def __init__(self, fail_width: int = None):
+        self.fail_width = fail_width
+        self.batches = []
+    
+    def __call__(self, processor, model, crops, device="cpu", **generate_kwargs):
+        widths = [crop.width for crop in crops]
+        self.batches.append(widths)
+        if self.fail_width in widths:
+            raise RuntimeError("batch failed")
+        return [str(width) for width in widths]
+
+@unittest.skipIf(not MODULE_AVAILABLE, "OCR module not available")
+class TestRecognizeCrops(unittest.TestCase):
+    
+    def setUp(self):
+        self.ocr_module = OCRModule()
+        self.crops = [Image.new("RGB", (width, 20), "white") for width in (40, 90, 60, 120, 30)]
+        patcher = mock.patch.object(ocr, "get_trocr_model", return_value=("processor", "model"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def recognize(self, fake, **kwargs):
+        with mock.patch.object(ocr, "generate_text", fake):
+            return self.ocr_module.recognize_crops(self.crops, **kwargs)
+    
+    def test_batches_keep_input_order(self):
+        fake = FakeTrOCR()
+        texts = self.recognize(fake, batch_size=2)
+        self.assertEqual(texts, ["40", "90", "60", "120", "30"])
+        self.assertEqual(fake.batches, [[40, 90], [60, 120], [30]])
+    
+    def test_fast_preset_sorts_by_aspect_but_keeps_order(self):
+        fake = FakeTrOCR()
+        texts = self.recognize(fake, batch_size=2, preset="fast_handwriting")
+        self.assertEqual(texts, ["40", "90", "60", "120", "30"])
+        self.assertEqual(fake.batches, [[30, 40], [60, 90], [120]])
+    
+    def test_failed_batch_yields_none(self):
+        texts = self.recognize(FakeTrOCR(fail_width=60), batch_size=2)
+        self.assertEqual(texts, ["40", "90", None, None, "30"])
+    
+    def test_batch_size_one_is_per_box(self):
+        fake = FakeTrOCR(fail_width=90)
+        texts = self.recognize(fake, batch_size=1)
+        self.assertEqual(texts, ["40", None, "60", "120", "30"])
+        self.assertEqual(fake.batches, [[40], [90], [60], [120], [30]])
+    
+    def test_missing_model_raises(self):
+        with mock.patch.object(ocr, "get_trocr_model", return_value=(None, None)):
+            with self.assertRaises(RuntimeError):
+                self.ocr_module.recognize_crops(self.crops)
+    
+    def test_high_accuracy_keeps_detection_confidence(self):
+        """Test that TrOCR text carries EasyOCR's confidence for its box, not a fixed 1.0"""
+        boxes = [([[10, 10], [90, 10], [90, 30], [10, 30]], "he1lo", 0.42),
+                 ([[10, 50], [90, 50], [90, 70], [10, 70]], "world", 0.8)]
+        with mock.patch.object(self.ocr_module, "detect_text", return_value=boxes), \
+                mock.patch.object(self.ocr_module, "recognize_crops", return_value=["hello", None]):
+            layout = self.ocr_module._high_accuracy_layout(Image.new("RGB", (100, 100), "white"))
+        self.assertEqual(layout["text"], "hello\nworld")
+        self.assertEqual([line["confidence"] for line in layout["lines"]], [0.42, 0.8])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Unit tests for OCR layout reconstruction
+"""
+import unittest
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    from modules.ocr_layout import analyze_layout, encode_layout, SPANNING
+    MODULE_AVAILABLE = True
+except ImportError:
+    MODULE_AVAILABLE = False
+
+def quad(x0, y0, x1, y1, slope=0.0):
+    """Box with its top and bottom edges tilted by `slope` (dy/dx)"""
+    dy = slope * (x1 - x0)
+    return [[x0, y0], [x1, y0 + dy], [x1, y1 + dy], [x0, y1]]
+
+def word(x0, y0, text, width=60, height=20, slope=0.0, prob=0.9):
+    return (quad(x0, y0, x0 + width, y0 + height, slope), text, prob)
+
+@unittest.skipIf(not MODULE_AVAILABLE, "OCR layout not available")
+class TestLines(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(analyze_layout([]), {"text": "", "columns": 0, "lines": []})
+
+    def test_rows_in_reading_order(self):
+        results = [
+            word(175, 52, "line"), word(100, 50, "second"),
+            word(175, 11, "line"), word(100, 10, "first"),
+        ]
+        layout = analyze_layout(results)
+        self.assertEqual(layout["text"], "first line\nsecond line")
+        self.assertEqual(layout["columns"], 1)
+
+    def test_wide_gap_is_a_tab(self):
+        layout = analyze_layout([word(0, 0, "Name:"), word(200, 0, "John")])
+        self.assertEqual(layout["text"], "Name: \t John")
+
+    def test_skewed_lines_stay_apart(self):
+        """Test that steeply rotated lines are grouped by the page skew, not by raw centroid height"""
+        slope = 0.12
+        results = []
+        for row in range(3):
+            for i in range(6):
+                x = 100 * i
+                results.append(word(x, 40 * row + slope * x, f"r{row}w{i}", width=90, slope=slope))
+        layout = analyze_layout(results)
+        self.assertEqual(len(layout["lines"]), 3)
+        for row, line in enumerate(layout["lines"]):
+            self.assertEqual([w["text"] for w in line["words"]], [f"r{row}w{i}" for i in range(6)])
+
+    def test_structured_output(self):
+        layout = analyze_layout([word(10, 10, "hello", prob=0.5), word(85, 12, "world", prob=1.0)])
+        line, = layout["lines"]
+        self.assertEqual(line["text"], "hello world")
+        self.assertEqual(line["bbox"], [10, 10, 145, 32])
+        self.assertAlmostEqual(line["confidence"], 0.75)
+        self.assertEqual(line["words"][0], {"text": "hello", "bbox": [10, 10, 70, 30], "confidence": 0.5})
+
+@unittest.skipIf(not MODULE_AVAILABLE, "OCR layout not available")
+class TestColumns(unittest.TestCase):
+
+    def two_column_page(self):
+        # Rows line up across the gutter, as typeset columns with one line pitch do
+        results = [(quad(0, 0, 700, 30), "Title", 0.9)]
+        for row in range(5):
+            y = 60 + 30 * row
+            results += [word(0, y, f"L{row}a", width=150), word(165, y, f"L{row}b", width=150)]
+            results += [word(400, y, f"R{row}a", width=150), word(565, y, f"R{row}b", width=150)]
+        results.append((quad(0, 240, 700, 270), "Footer", 0.9))
+        return results
+
+    def test_columns_read_one_after_the_other(self):
+        layout = analyze_layout(self.two_column_page())
+        self.assertEqual(layout["columns"], 2)
+        expected = (["Title"] + [f"L{r}a L{r}b" for r in range(5)]
+                    + [f"R{r}a R{r}b" for r in range(5)] + ["Footer"])
+        self.assertEqual(layout["text"].split("\n"), expected)
+        self.assertEqual(layout["lines"][0]["column"], SPANNING)
+        self.assertEqual(layout["lines"][6]["column"], 1)
+
+    def test_columns_disabled_reads_rows(self):
+        layout = analyze_layout(self.two_column_page(), columns=False)
+        self.assertEqual(layout["columns"], 1)
+        self.assertEqual(layout["text"].split("\n")[1], "L0a L0b \t R0a R0b")
+
+    def test_aligned_text_columns(self):
+        """Test that typeset columns sharing a line pitch are still read one after the other"""
+        results = []
+        for row in range(10):
+            y = 50 + 30 * row
+            results += [(quad(0, y, 400, y + 20), f"L{row}", 0.9), (quad(500, y, 900, y + 20), f"R{row}", 0.9)]
+        layout = analyze_layout(results)
+        self.assertEqual(layout["columns"], 2)
+        self.assertEqual(layout["text"].split("\n"), [f"L{r}" for r in range(10)] + [f"R{r}" for r in range(10)])
+
+    def test_form_rows_are_not_columns(self):
+        """Test that labels and values aligned row by row read as one line per row"""
+        results = []
+        for row in range(4):
+            y = 50 + 40 * row
+            results += [word(50, y, f"Name{row}:", width=100), word(400, y + 2, f"Value{row}", width=200)]
+        layout = analyze_layout(results)
+        self.assertEqual(layout["columns"], 1)
+        self.assertEqual(layout["text"].split("\n"), [f"Name{row}: \t Value{row}" for row in range(4)])
+
+    def test_margin_note_is_not_a_column(self):
+        results = [word(0, 30 * row, f"w{row}") for row in range(5)]
+        results.append(word(600, 0, "7"))
+        layout = analyze_layout(results)
+        self.assertEqual(layout["columns"], 1)
+        self.assertEqual(layout["text"].split("\n")[0], "w0 \t 7")
+
+@unittest.skipIf(not MODULE_AVAILABLE, "OCR layout not available")
+class TestEncodeLayout(unittest.TestCase):
+
+    def test_columnar_encoding(self):
+        results = [
+            word(10, 10, "hello", prob=0.5), word(85, 12, "world", prob=0.87654),
+            word(10, 60, "again", prob=1.0),
+        ]
+        encoded = encode_layout(analyze_layout(results))
+        self.assertEqual(encoded, {
+            "columns": 1,
+            "lines": {
+                "bbox": [10, 10, 145, 32, 10, 60, 70, 80],
+                "column": [0, 0],
+                "confidence": [0.688, 1.0],
+                "words": [2, 1],
+            },
+            "words": {
+                "text": ["hello", "world", "again"],
+                "bbox": [10, 10, 70, 30, 85, 12, 145, 32, 10, 60, 70, 80],
+                "confidence": [0.5, 0.877, 1.0],
+            },
+        })
+
+    def test_empty(self):
+        encoded = encode_layout(analyze_layout([]))
+        self.assertEqual(encoded["words"], {"text": [], "bbox": [], "confidence": []})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Unit tests for tiled OCR preprocessing and seam merging
+"""
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import cv2
+    from modules.ocr_tiling import (
+        tile_grid, iter_preprocessed_tiles, page_threshold, shift_results, merge_tile_results,
+    )
+    MODULE_AVAILABLE = True
+except ImportError:
+    MODULE_AVAILABLE = False
+
+def quad(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+@unittest.skipIf(not MODULE_AVAILABLE, "OCR tiling not available")
+class TestTileGrid(unittest.TestCase):
+
+    def test_tiles_cover_image_with_overlap(self):
+        tiles = tile_grid(1000, 700, tile_size=400, overlap=100)
+        covered = np.zeros((700, 1000), dtype=int)
+        for x0, y0, x1, y1 in tiles:
+            self.assertLessEqual(x1 - x0, 400)
+            self.assertLessEqual(y1 - y0, 400)
+            covered[y0:y1, x0:x1] += 1
+        self.assertTrue((covered >= 1).all())
+        xs = sorted({t[0] for t in tiles})
+        self.assertTrue(all(b - a <= 300 for a, b in zip(xs, xs[1:])))
+
+    def test_starts_are_evenly_spaced(self):
+        xs = sorted({t[0] for t in tile_grid(4000, 100, tile_size=2048, overlap=256)})
+        self.assertEqual(xs, [0, 976, 1952])
+
+    def test_small_image_is_one_tile(self):
+        self.assertEqual(tile_grid(300, 200, tile_size=400, overlap=100), [(0, 0, 300, 200)])
+
+    def test_invalid_overlap(self):
+        with self.assertRaises(ValueError):
+            tile_grid(1000, 1000, tile_size=400, overlap=400)
+
+@unittest.skipIf(not MODULE_AVAILABLE, "OCR tiling not available")
+class TestTiledPreprocessing(unittest.TestCase):
+
+    def test_tiles_match_full_page_binarization(self):
+        """Test that tile interiors equal the full page binarized at the shared threshold"""
+        rng = np.random.default_rng(0)
+        page = np.full((600, 900, 3), 230, dtype=np.uint8)
+        for _ in range(80):
+            x, y = (int(v) for v in rng.integers(0, 880, 2))
+            cv2.rectangle(page, (x, y % 580), (x + 15, y % 580 + 8), (20, 20, 20), -1)
+        image = Image.fromarray(page)
+
+        threshold = page_threshold(image)
+        gray = cv2.cvtColor(page, cv2.COLOR_RGB2GRAY)
+        _, expected = cv2.threshold(cv2.GaussianBlur(gray, (5, 5), 0), threshold, 255, cv2.THRESH_BINARY)
+        for (x0, y0, x1, y1), binary in iter_preprocessed_tiles(image, tile_size=256, overlap=64):
+            # Blur borders differ within 2px of a tile edge only
+            self.assertTrue((binary[2:-2, 2:-2] == expected[y0 + 2:y1 - 2, x0 + 2:x1 - 2]).all())
+
+@unittest.skipIf(not MODULE_AVAILABLE, "OCR tiling not available")
+class TestSeamMerging(unittest.TestCase):
+
+    def setUp(self):
+        # Two tiles side by side on a 700x300 page, overlapping in x = 300..400
+        self.left = (0, 0, 400, 300)
+        self.right = (300, 0, 700, 300)
+
+    def test_shift_results(self):
+        shifted = shift_results([(quad(0, 0, 10, 5), "a", 0.9)], 300, 20)
+        self.assertEqual(shifted[0][0], quad(300, 20, 310, 25))
+
+    def test_duplicate_in_overlap_band_kept_once(self):
+        merged = merge_tile_results([
+            (self.left, [(quad(320, 10, 380, 30), "band", 0.8)]),
+            (self.right, [(quad(321, 10, 380, 31), "band", 0.9)]),
+        ], 700, 300)
+        self.assertEqual(len(merged), 1)
+
+    def test_complete_box_preferred_over_cut_off_copy(self):
+        merged = merge_tile_results([
+            (self.left, [(quad(350, 50, 399, 70), "seam wo", 0.9)]),
+            (self.right, [(quad(350, 50, 420, 70), "seam word", 0.7)]),
+        ], 700, 300)
+        self.assertEqual([r[1] for r in merged], ["seam word"])
+
+    def test_distinct_boxes_all_kept(self):
+        merged = merge_tile_results([
+            (self.left, [(quad(10, 10, 100, 30), "left", 0.9), (quad(10, 40, 100, 60), "below", 0.9)]),
+            (self.right, [(quad(500, 10, 600, 30), "right", 0.9)]),
+        ], 700, 300)
+        self.assertEqual(sorted(r[1] for r in merged), ["below", "left", "right"])
+
+    def test_line_cut_at_seam_is_joined_once(self):
+        """Test that the pieces of a line crossing a seam become one box with the shared words written once"""
+        merged = merge_tile_results([
+            (self.left, [(quad(200, 100, 399, 120), "a very long", 0.9)]),
+            (self.right, [(quad(301, 100, 450, 120), "long line", 0.8)]),
+        ], 700, 300)
+        self.assertEqual(merged, [(quad(200, 100, 450, 120), "a very long line", 0.8)])
+
+    def test_cut_words_at_tile_edges_are_dropped(self):
+        """Test the review case: 2048px tiles overlapping by 256px, a line cut on both sides of the band"""
+        left, right = (0, 0, 2048, 3000), (1792, 0, 3840, 3000)
+        for right_end, right_text, expected in [
+            (2200, "ck brown fox", "the quick brown fox"),
+            (2600, "ck brown fox jumps over the", "the quick brown fox jumps over the"),
+        ]:
+            with self.subTest(right_end=right_end):
+                merged = merge_tile_results([
+                    (left, [(quad(1000, 100, 2048, 130), "the quick bro", 0.9)]),
+                    (right, [(quad(1792, 100, right_end, 130), right_text, 0.9)]),
+                ], 3840, 3000)
+                self.assertEqual([(r[0][1][0], r[1]) for r in merged], [(right_end, expected)])
+
+    def test_line_across_three_tiles(self):
+        tiles = [(0, 0, 400, 300), (300, 0, 700, 300), (600, 0, 1000, 300)]
+        merged = merge_tile_results([
+            (tiles[0], [(quad(100, 10, 399, 30), "one two three", 0.9)]),
+            (tiles[1], [(quad(301, 10, 699, 30), "three four five six", 0.9)]),
+            (tiles[2], [(quad(601, 10, 900, 30), "six seven", 0.9)]),
+        ], 1000, 300)
+        self.assertEqual([r[1] for r in merged], ["one two three four five six seven"])
+
+    def test_separate_lines_are_not_joined(self):
+        merged = merge_tile_results([
+            (self.left, [(quad(200, 100, 399, 120), "upper", 0.9)]),
+            (self.right, [(quad(301, 160, 450, 180), "lower", 0.9)]),
+        ], 700, 300)
+        self.assertEqual(sorted(r[1] for r in merged), ["lower", "upper"])
+
+if __name__ == '__main__':
+    unittest.main()
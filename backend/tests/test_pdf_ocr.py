@@ -0,0 +1,137 @@
+"""
+Unit tests for in-memory PDF rasterization and the streaming PDF OCR endpoint
+"""
+import unittest
+import asyncio
+import json
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import fitz
+    from modules.pdf_tools import PDFTools
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+try:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api.routers import ocr as ocr_router
+    from api.routers.history import get_current_user
+    from services.executor import ExecutorSaturated
+    API_AVAILABLE = PDF_AVAILABLE
+except ImportError:
+    API_AVAILABLE = False
+
+def make_pdf(pages: int) -> bytes:
+    """A PDF of `pages` US-letter pages, each labelled with its number"""
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((72, 72), f"Page {i + 1}", fontsize=24)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+@unittest.skipIf(not PDF_AVAILABLE, "PyMuPDF not available")
+class TestRenderPage(unittest.TestCase):
+
+    def setUp(self):
+        self.tools = PDFTools()
+        self.pdf = make_pdf(3)
+
+    def test_page_count(self):
+        self.assertEqual(self.tools.page_count(self.pdf), 3)
+
+    def test_render_page_scales_with_dpi(self):
+        image = self.tools.render_page(self.pdf, 1, dpi=72)
+        self.assertEqual(image.mode, "RGB")
+        self.assertEqual(image.size, (612, 792))
+        self.assertEqual(self.tools.render_page(self.pdf, 1, dpi=144).size, (1224, 1584))
+
+    def test_render_page_has_ink(self):
+        image = self.tools.render_page(self.pdf, 0, dpi=72).convert("L")
+        self.assertLess(image.getextrema()[0], 128)
+
+class FakeExecutor:
+    """pdf_ocr pool stand-in that reports itself busy for the first `busy` calls"""
+
+    name = "pdf_ocr"
+    max_workers = 2
+
+    def __init__(self, busy: int = 0):
+        self.busy = busy
+
+    def is_saturated(self) -> bool:
+        return False
+
+    async def run(self, func, *args):
+        if self.busy:
+            self.busy -= 1
+            raise ExecutorSaturated("The pdf_ocr service is busy, please retry shortly")
+        await asyncio.sleep(0)
+        return func(*args)
+
+def fake_recognize(pdf_bytes, page_index, mode, use_ai_correction, dpi, languages=None):
+    return f"text of page {page_index + 1}"
+
+@unittest.skipIf(not API_AVAILABLE, "API dependencies not available")
+class TestExtractPdfEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(ocr_router.router, prefix="/api/ocr")
+        app.dependency_overrides[get_current_user] = lambda: None
+        self.client = TestClient(app)
+        self.pdf = make_pdf(4)
+        for target, value in [("_recognize_pdf_page", fake_recognize), ("PDF_OCR_RETRY_DELAY", 0.01)]:
+            patcher = mock.patch.object(ocr_router, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self, executor, **data):
+        with mock.patch.object(ocr_router, "get_executor", return_value=executor):
+            return self.client.post("/api/ocr/extract-pdf", files={"file": ("scan.pdf", self.pdf, "application/pdf")},
+                                    data=data)
+
+    def records(self, response):
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_streams_every_page_then_done(self):
+        response = self.post(FakeExecutor())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        records = self.records(response)
+        self.assertEqual(records[-1], {"done": True, "pages": 4})
+        pages = sorted(records[:-1], key=lambda r: r["page"])
+        self.assertEqual(pages, [{"page": n, "text": f"text of page {n}"} for n in range(1, 5)])
+
+    def test_busy_pool_is_waited_for(self):
+        records = self.records(self.post(FakeExecutor(busy=5)))
+        self.assertFalse([r for r in records if "error" in r])
+        self.assertEqual(len(records), 5)
+
+    def test_page_deadline_fails_only_that_page(self):
+        """Test that a page stuck waiting past its deadline reports an error and the stream still finishes"""
+        with mock.patch.object(ocr_router, "PDF_OCR_PAGE_TIMEOUT", 0.05):
+            records = self.records(self.post(FakeExecutor(busy=10_000)))
+        self.assertEqual(records[-1], {"done": True, "pages": 4})
+        self.assertEqual(sorted(r["page"] for r in records[:-1]), [1, 2, 3, 4])
+        self.assertTrue(all(r["error"] == "Deadline exceeded" for r in records[:-1]))
+
+    def test_dpi_out_of_range(self):
+        for dpi in (10, 10000):
+            self.assertEqual(self.post(FakeExecutor(), dpi=str(dpi)).status_code, 400)
+
+    def test_invalid_pdf(self):
+        with mock.patch.object(ocr_router, "get_executor", return_value=FakeExecutor()):
+            response = self.client.post("/api/ocr/extract-pdf", files={"file": ("x.pdf", b"not a pdf", "application/pdf")})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Unit tests for streaming PDF merges
+"""
+import unittest
+import os
+import tempfile
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import fitz
+    from modules.pdf_tools import PDFTools
+    MODULE_AVAILABLE = True
+except ImportError:
+    MODULE_AVAILABLE = False
+
+@unittest.skipIf(not MODULE_AVAILABLE, "PDF tools not available")
+class TestMergePdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tools = PDFTools()
+        # Input i has i + 1 pages labelled "doc i page j"
+        self.inputs = []
+        for i in range(7):
+            path = os.path.join(self.tmp.name, f"in{i}.pdf")
+            doc = fitz.open()
+            for j in range(i + 1):
+                doc.new_page().insert_text((72, 72), f"doc {i} page {j}")
+            doc.save(path)
+            doc.close()
+            self.inputs.append(path)
+        self.expected = [f"doc {i} page {j}" for i in range(7) for j in range(i + 1)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def merged_labels(self, path):
+        with fitz.open(path) as doc:
+            return [page.get_text().strip() for page in doc]
+
+    def test_page_order_across_flushes(self):
+        """Test that every page arrives once, in order, whatever the flush interval"""
+        for flush_every in (0, 1, 2, 3, 7, 20):
+            with self.subTest(flush_every=flush_every):
+                output_path = os.path.join(self.tmp.name, f"merged{flush_every}.pdf")
+                self.tools.merge_pdfs(self.inputs, output_path, flush_every=flush_every)
+                self.assertEqual(self.merged_labels(output_path), self.expected)
+
+    def test_progress_callback(self):
+        """Test that progress is reported once per input"""
+        calls = []
+        output_path = os.path.join(self.tmp.name, "merged.pdf")
+        self.tools.merge_pdfs(self.inputs, output_path, flush_every=3,
+                              progress_callback=lambda done, total: calls.append((done, total)))
+        self.assertEqual(calls, [(done, 7) for done in range(1, 8)])
+
+    def test_single_input(self):
+        output_path = os.path.join(self.tmp.name, "single.pdf")
+        self.tools.merge_pdfs(self.inputs[2:3], output_path, flush_every=1)
+        self.assertEqual(self.merged_labels(output_path), ["doc 2 page 0", "doc 2 page 1", "doc 2 page 2"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for the task process backend
+"""
+import unittest
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.process_backend import ProcessBackend, SharedArray, export_shared, import_shared
+from services.task_queue import TaskQueueService, TaskStatus
+from tests.test_task_queue import wait_for
+
+class TestSharedResults(unittest.TestCase):
+    
+    def test_round_trip(self):
+        """Test that large arrays travel as handles and small values stay inline"""
+        big = np.arange(300_000, dtype=np.float32).reshape(600, 500)
+        exported = export_shared({"array": big, "meta": [1, "x"], "small": np.zeros(3)}, min_bytes=1024)
+        self.assertIsInstance(exported["array"], SharedArray)
+        self.assertIsInstance(exported["small"], np.ndarray)
+        restored = import_shared(exported)
+        np.testing.assert_array_equal(restored["array"], big)
+        self.assertEqual(restored["meta"], [1, "x"])
+
+class TestProcessBackend(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.backend = ProcessBackend(1, task_types=("fill",), shm_min_bytes=1024)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.shutdown()
+    
+    def test_run_in_worker(self):
+        result = self.backend.run(np.full, (512, 512), 7.0, dtype=np.float32)
+        self.assertEqual(result.shape, (512, 512))
+        self.assertTrue((result == 7.0).all())
+    
+    def test_task_queue_routes_by_type(self):
+        """Test that only the configured task types go to the process pool"""
+        service = TaskQueueService(max_workers=1, process_backend=self.backend)
+        try:
+            submitted = self.backend.stats()["submitted"]
+            service.add_task("p1", np.full, 4, 2, task_type="fill")
+            service.add_task("t1", lambda: "thread", task_type="other")
+            self.assertEqual(wait_for(service, "p1", timeout=60), TaskStatus.COMPLETED)
+            self.assertEqual(wait_for(service, "t1"), TaskStatus.COMPLETED)
+            self.assertEqual(service.get_task_result("p1").tolist(), [2, 2, 2, 2])
+            self.assertEqual(service.get_task_result("t1"), "thread")
+            self.assertEqual(self.backend.stats()["submitted"], submitted + 1)
+        finally:
+            service.process_backend = None  # Shared with the other tests
+            service.stop_workers()
+
+class TestJobWorkerImports(unittest.TestCase):
+    
+    def test_sketch_worker_skips_ocr_stack(self):
+        """Test that a sketch worker's imports and preload leave the OCR models unloaded"""
+        script = (
+            "import sys; import services.jobs as jobs; jobs.preload_models(['sketch']); "
+            "print(sorted(m for m in ('torch', 'transformers', 'easyocr', 'modules.ocr') if m in sys.modules))"
+        )
+        output = subprocess.run([sys.executable, "-c", script], cwd=Path(__file__).parent.parent,
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip().splitlines()[-1], "[]")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Unit tests for the OCR reader registry and script detection pre-pass
+"""
+import unittest
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import cv2
+    from services.reader_registry import ReaderRegistry, normalize_languages
+    from modules.script_detection import detect_script, detect_languages
+    MODULE_AVAILABLE = True
+except ImportError:
+    MODULE_AVAILABLE = False
+
+class FakeReaderFactory:
+    """Records which language sets were built; each reader is just its key"""
+    
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.built = []
+        self.lock = threading.Lock()
+    
+    def __call__(self, languages):
+        time.sleep(self.delay)
+        with self.lock:
+            self.built.append(languages)
+        return ("reader", languages)
+
+@unittest.skipIf(not MODULE_AVAILABLE, "Reader registry not available")
+class TestReaderRegistry(unittest.TestCase):
+    
+    def test_normalize_languages(self):
+        self.assertEqual(normalize_languages("hi, EN"), ("en", "hi"))
+        self.assertEqual(normalize_languages(["mr"]), ("en", "mr"))
+        self.assertEqual(normalize_languages(None), ("en", "hi", "mr"))
+        with self.assertRaises(ValueError):
+            normalize_languages("en,fr")
+    
+    def test_reader_reused_per_language_set(self):
+        factory = FakeReaderFactory()
+        registry = ReaderRegistry(factory, sizer=lambda reader: 10, max_bytes=100)
+        self.assertIs(registry.get(["en"]), registry.get("en"))
+        registry.get("hi")
+        self.assertEqual(factory.built, [("en",), ("en", "hi")])
+        self.assertEqual(registry.stats()["hits"], 1)
+    
+    def test_lru_eviction_under_budget(self):
+        factory = FakeReaderFactory()
+        registry = ReaderRegistry(factory, sizer=lambda reader: 40, max_bytes=100)
+        registry.get("en")
+        registry.get("hi")
+        registry.get("en")  # Most recent: "hi" is now the eviction candidate
+        registry.get("mr")
+        self.assertEqual(registry.stats()["readers"], ["en", "en,mr"])
+        self.assertEqual(registry.stats()["evictions"], 1)
+    
+    def test_oversized_reader_still_served(self):
+        registry = ReaderRegistry(FakeReaderFactory(), sizer=lambda reader: 500, max_bytes=100)
+        registry.get("en")
+        registry.get("hi")
+        self.assertEqual(registry.stats()["readers"], ["en,hi"])
+    
+    def test_concurrent_requests_load_once(self):
+        factory = FakeReaderFactory(delay=0.2)
+        registry = ReaderRegistry(factory, sizer=lambda reader: 1, max_bytes=100)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("hi"))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(factory.built, [("en", "hi")])
+        self.assertEqual(len(set(map(id, results))), 1)
+    
+    def test_failed_load_is_retried(self):
+        calls = []
+        def factory(languages):
+            calls.append(languages)
+            if len(calls) == 1:
+                raise RuntimeError("download failed")
+            return "reader"
+        registry = ReaderRegistry(factory, sizer=lambda reader: 1, max_bytes=100)
+        with self.assertRaises(RuntimeError):
+            registry.get("en")
+        self.assertEqual(registry.get("en"), "reader")
+
+def headline_words(lines: int = 20, width: int = 1200, seed: int = 0) -> Image.Image:
+    """Devanagari-like words: a shirorekha across the top with letters hanging below"""
+    rng = np.random.default_rng(seed)
+    page = np.full((48 * (lines + 2), width, 3), 255, dtype=np.uint8)
+    for line in range(lines):
+        x, y = 40, 48 * (line + 1)
+        while x < width - 150:
+            letters = int(rng.integers(2, 6))
+            cv2.line(page, (x, y), (x + letters * 18, y), (0, 0, 0), 3)
+            for k in range(letters):
+                cx = x + k * 18
+                cv2.line(page, (cx + 14, y), (cx + 14, y + 26), (0, 0, 0), 2)
+                cv2.ellipse(page, (cx + 7, y + 14), (6, 8), 0, 0, 300, (0, 0, 0), 2)
+            x += letters * 18 + int(rng.integers(15, 30))
+    return Image.fromarray(page)
+
+def latin_words(lines: int = 20, width: int = 1200) -> Image.Image:
+    image = Image.new("RGB", (width, 48 * (lines + 2)), "white")
+    draw = ImageDraw.Draw(image)
+    for line in range(lines):
+        draw.text((40, 48 * (line + 1)), "Total amount received with thanks " * 2, fill="black")
+    return image
+
+@unittest.skipIf(not MODULE_AVAILABLE, "Script detection not available")
+class TestScriptDetection(unittest.TestCase):
+    
+    def test_headline_script_detected(self):
+        self.assertEqual(detect_script(headline_words()), "devanagari")
+        self.assertEqual(detect_languages(headline_words()), ("en", "hi", "mr"))
+    
+    def test_latin_page(self):
+        self.assertEqual(detect_script(latin_words()), "latin")
+        self.assertEqual(detect_languages(latin_words()), ("en",))
+    
+    def test_ruled_boxes_are_not_headlines(self):
+        page = np.full((600, 800, 3), 255, dtype=np.uint8)
+        for i in range(10):
+            cv2.rectangle(page, (20, 20 + i * 55), (400, 60 + i * 55), (0, 0, 0), 2)
+        self.assertEqual(detect_script(page), "latin")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Unit tests for the multi-term redaction engine
+"""
+import unittest
+import os
+import tempfile
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import fitz
+    from modules.redaction import MultiPatternMatcher, RedactionEngine, match_page_words, normalize_text
+    MODULE_AVAILABLE = True
+except ImportError:
+    MODULE_AVAILABLE = False
+
+@unittest.skipIf(not MODULE_AVAILABLE, "PyMuPDF not available")
+class TestRedactionEngine(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "input.pdf")
+        doc = fitz.open()
+        for i in range(4):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Patient John Doe, phone 555-1234, page {i}")
+            page.insert_text((72, 100), "Contact: john@example.com or JOHN DOE")
+        doc.save(self.pdf_path)
+        doc.close()
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_matcher_finds_overlapping_patterns(self):
+        """Test that every (overlapping) pattern occurrence is reported"""
+        matcher = MultiPatternMatcher(["he", "she", "hers"])
+        found = sorted((s, e, matcher.patterns[p]) for s, e, p in matcher.find_all("ushers"))
+        self.assertEqual(found, [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")])
+    
+    def _check_redacted(self, output_path):
+        with fitz.open(output_path) as doc:
+            text = "".join(page.get_text() for page in doc).lower()
+        self.assertNotIn("john doe", text)
+        self.assertNotIn("555-1234", text)
+        self.assertNotIn("john@example.com", text)
+        self.assertIn("patient", text)
+    
+    def test_redact_counts_hits_per_term(self):
+        """Test case-insensitive multi-word hits and per-term counts"""
+        output_path = os.path.join(self.tmp.name, "out.pdf")
+        engine = RedactionEngine(["John Doe", "555-1234", "john@example.com", "absent"], workers=1)
+        counts = engine.redact(self.pdf_path, output_path)
+        self.assertEqual(counts, {"John Doe": 8, "555-1234": 4, "john@example.com": 4, "absent": 0})
+        self._check_redacted(output_path)
+    
+    def test_parallel_scan_matches_serial(self):
+        """Test that page-parallel scanning finds the same rects"""
+        terms = ["John Doe", "555-1234", "john@example.com"]
+        serial = RedactionEngine(terms, workers=1).find_matches(self.pdf_path)
+        parallel = RedactionEngine(terms, workers=2, parallel_min_pages=1).find_matches(self.pdf_path)
+        self.assertEqual(serial, parallel)
+
+    def test_term_does_not_cross_blocks(self):
+        """Test that a term is not matched across two unrelated text blocks"""
+        words = [
+            (0, 0, 40, 10, "John", 0, 0, 0),
+            (0, 50, 40, 60, "Doe", 1, 0, 0),
+            (0, 80, 40, 90, "John", 2, 0, 0),
+            (0, 95, 40, 105, "Doe", 2, 1, 0),
+        ]
+        rects, hits = match_page_words(words, MultiPatternMatcher([normalize_text("John Doe")]))
+        self.assertEqual(hits, {0: 1})
+        self.assertEqual(sorted(rects), [(0, 80, 40, 90), (0, 95, 40, 105)])
+    
+    def test_case_folding_that_changes_length(self):
+        """Test that words whose length changes under case folding still match and map to their own letters"""
+        words = [(0, 0, 60, 10, "STRAẞE", 0, 0, 0), (100, 0, 160, 10, "İstanbul", 0, 0, 1)]
+        matcher = MultiPatternMatcher([normalize_text("strasse"), normalize_text("İSTANBUL"), "sse"])
+        rects, hits = match_page_words(words, matcher)
+        self.assertEqual(hits, {0: 1, 1: 1, 2: 1})
+        self.assertIn((0, 0, 60, 10), rects)
+        self.assertIn((100, 0, 160, 10), rects)
+        self.assertIn((40, 0, 60, 10), rects)  # "sse" is the last two of six letters, "ẞE"
+
+if __name__ == '__main__':
+    unittest.main()
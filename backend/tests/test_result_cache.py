@@ -0,0 +1,72 @@
+"""
+Unit tests for the OCR result cache
+"""
+import unittest
+import tempfile
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import numpy as np
+    from PIL import Image
+    from services.result_cache import ResultCache, image_cache_key
+    MODULE_AVAILABLE = True
+except ImportError:
+    MODULE_AVAILABLE = False
+
+@unittest.skipIf(not MODULE_AVAILABLE, "Result cache dependencies not available")
+class TestResultCache(unittest.TestCase):
+    
+    def test_image_key_depends_on_pixels_and_settings(self):
+        """Test that the key changes with pixels and OCR settings only"""
+        img = np.zeros((20, 30, 3), dtype=np.uint8)
+        key = image_cache_key(img, "standard", True)
+        self.assertEqual(key, image_cache_key(img.copy(), "standard", True))
+        self.assertNotEqual(key, image_cache_key(img, "high_accuracy", True))
+        self.assertNotEqual(key, image_cache_key(img, "standard", False))
+        img[0, 0, 0] = 1
+        self.assertNotEqual(key, image_cache_key(img, "standard", True))
+    
+    def test_image_key_depends_on_palette(self):
+        """Test that palette images with the same indices but different colours get different keys"""
+        black = Image.new("P", (10, 10), 0)
+        black.putpalette([0, 0, 0] * 256)
+        white = Image.new("P", (10, 10), 0)
+        white.putpalette([255, 255, 255] * 256)
+        self.assertNotEqual(image_cache_key(black, "standard"), image_cache_key(white, "standard"))
+        self.assertEqual(image_cache_key(white, "standard"),
+                         image_cache_key(Image.new("RGB", (10, 10), "white"), "standard"))
+    
+    def test_lru_eviction_by_bytes(self):
+        """Test that least recently used entries are evicted past the byte budget"""
+        cache = ResultCache(max_bytes=30)
+        cache.put("a", "x" * 8)  # 10 bytes as JSON
+        cache.put("b", "y" * 8)
+        self.assertEqual(cache.get("a"), "x" * 8)  # a is now most recent
+        cache.put("c", "z" * 8)
+        cache.put("d", "w" * 8)  # evicts b
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "x" * 8)
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 30)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+    
+    def test_disk_tier_survives_memory_clear(self):
+        """Test that entries are served from disk after the memory tier is dropped"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(max_bytes=1024, disk_dir=Path(tmp))
+            cache.put("k1", "recognized text")
+            cache.clear()
+            self.assertEqual(cache.get("k1"), "recognized text")
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            # Promoted back into memory
+            self.assertEqual(cache.get("k1"), "recognized text")
+            self.assertEqual(cache.stats()["hits"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Unit tests for the fair task scheduler
+"""
+import unittest
+import queue
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.scheduler import FairScheduler
+
+class FakeTask:
+    def __init__(self, name, user_id, client_id=None):
+        self.name = name
+        self.user_id = user_id
+        self.client_id = client_id
+
+class TestFairScheduler(unittest.TestCase):
+    
+    def drain(self, scheduler):
+        """Pop every runnable task, completing each immediately"""
+        order = []
+        while True:
+            try:
+                task = scheduler.get(timeout=0)
+            except queue.Empty:
+                return order
+            order.append(task.name)
+            scheduler.task_done(task)
+    
+    def test_users_interleave_within_lane(self):
+        """Test that a backlog from one user does not delay another user's tasks"""
+        scheduler = FairScheduler(max_in_flight=10)
+        for i in range(5):
+            scheduler.put(FakeTask(f"a{i}", "alice"))
+        scheduler.put(FakeTask("b0", "bob"))
+        scheduler.put(FakeTask("b1", "bob"))
+        self.assertEqual(self.drain(scheduler)[:4], ["a0", "b0", "a1", "b1"])
+    
+    def test_interactive_lane_runs_first(self):
+        """Test strict priority between lanes"""
+        scheduler = FairScheduler()
+        scheduler.put(FakeTask("bulk", "alice"), priority="batch")
+        scheduler.put(FakeTask("quick", "bob"), priority="interactive")
+        self.assertEqual(self.drain(scheduler), ["quick", "bulk"])
+    
+    def test_cost_and_weight_shape_share(self):
+        """Test that expensive tasks earn fewer turns than cheap ones"""
+        scheduler = FairScheduler(max_in_flight=10, user_weights={"carol": 2.0})
+        scheduler.put(FakeTask("big", "alice"), cost=4)
+        for i in range(4):
+            scheduler.put(FakeTask(f"c{i}", "carol"))
+        self.assertEqual(self.drain(scheduler), ["c0", "c1", "c2", "c3", "big"])
+    
+    def test_in_flight_limit(self):
+        """Test that a user at the limit is skipped until a task finishes"""
+        scheduler = FairScheduler(max_in_flight=1)
+        first = FakeTask("a0", "alice")
+        scheduler.put(first)
+        scheduler.put(FakeTask("a1", "alice"))
+        self.assertIs(scheduler.get(timeout=0), first)
+        with self.assertRaises(queue.Empty):
+            scheduler.get(timeout=0)
+        scheduler.task_done(first)
+        self.assertEqual(scheduler.get(timeout=0).name, "a1")
+    
+    def test_anonymous_user(self):
+        """Test that tasks without a user id are still scheduled"""
+        scheduler = FairScheduler()
+        scheduler.put(FakeTask("anon", None))
+        self.assertEqual(self.drain(scheduler), ["anon"])
+    
+    def test_anonymous_clients_capped_separately(self):
+        """Test that one anonymous client at its limit does not block another"""
+        scheduler = FairScheduler(max_in_flight=1)
+        first = FakeTask("x0", None, client_id="10.0.0.1")
+        scheduler.put(first)
+        scheduler.put(FakeTask("x1", None, client_id="10.0.0.1"))
+        scheduler.put(FakeTask("y0", None, client_id="10.0.0.2"))
+        self.assertIs(scheduler.get(timeout=0), first)
+        self.assertEqual(scheduler.get(timeout=0).name, "y0")
+        with self.assertRaises(queue.Empty):
+            scheduler.get(timeout=0)
+        scheduler.task_done(first)
+        self.assertEqual(scheduler.get(timeout=0).name, "x1")
+    
+    def test_waiting_batch_lane_is_aged_ahead(self):
+        """Test that a batch task waiting past max_wait runs before newer interactive work"""
+        scheduler = FairScheduler(max_in_flight=10, max_wait=0.05)
+        scheduler.put(FakeTask("bulk", "alice"), priority="batch")
+        time.sleep(0.1)
+        scheduler.put(FakeTask("quick", "bob"), priority="interactive")
+        self.assertEqual(self.drain(scheduler), ["bulk", "quick"])
+    
+    def test_aged_backlog_alternates_with_interactive(self):
+        """Test that interactive work keeps moving while a whole batch backlog has aged"""
+        scheduler = FairScheduler(max_in_flight=10, max_wait=0.05)
+        for i in range(4):
+            scheduler.put(FakeTask(f"b{i}", "alice"), priority="batch")
+        time.sleep(0.1)
+        for i in range(4):
+            scheduler.put(FakeTask(f"q{i}", "bob"), priority="interactive")
+        self.assertEqual(self.drain(scheduler), ["b0", "q0", "b1", "q1", "b2", "q2", "b3", "q3"])
+    
+    def test_strict_priority_without_max_wait(self):
+        scheduler = FairScheduler(max_wait=0)
+        scheduler.put(FakeTask("bulk", "alice"), priority="batch")
+        time.sleep(0.01)
+        scheduler.put(FakeTask("quick", "bob"), priority="interactive")
+        self.assertEqual(self.drain(scheduler), ["quick", "bulk"])
+    
+    def test_unknown_priority(self):
+        with self.assertRaises(ValueError):
+            FairScheduler().put(FakeTask("x", None), priority="urgent")
+    
+    def test_close_releases_waiters(self):
+        scheduler = FairScheduler()
+        scheduler.close()
+        self.assertIsNone(scheduler.get(timeout=1))
+
+if __name__ == '__main__':
+    unittest.main()
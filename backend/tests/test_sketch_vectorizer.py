@@ -0,0 +1,187 @@
+"""
+Unit tests for the sketch vectorizer
+"""
+import unittest
+import gzip
+import re
+import shutil
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+try:
+    import cv2
+    from modules.sketch_vectorizer import (
+        label_bounding_boxes, trace_label, trace_layers, contour_to_path,
+        assign_nearest, quantize_colors, resolve_quantization,
+    )
+    from core.config import SKETCH_QUALITY_PRESETS
+    from modules.sketch import SketchModule
+    from modules.gemini_client import get_gemini_client
+    from services.cancellation import CancellationToken, TaskCancelled, use_token
+    MODULE_AVAILABLE = True
+except ImportError:
+    MODULE_AVAILABLE = False
+
+def full_image_paths(label_img, label):
+    """Reference tracer: a full-image mask for the label"""
+    mask = np.where(label_img == label, 255, 0).astype(np.uint8)
+    contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    paths = []
+    for contour in contours:
+        if cv2.contourArea(contour) < 2:
+            continue
+        approx = cv2.approxPolyDP(contour, 0.0005 * cv2.arcLength(contour, True), True)
+        if len(approx) >= 3:
+            paths.append(contour_to_path(approx))
+    return paths
+
+def decode_path(d):
+    """Absolute points of each sub-path in compact path data (M/h/v/l/z only)"""
+    subpaths = []
+    for command, args in re.findall(r"([MhvlzZ])([^MhvlzZ]*)", d):
+        values = [int(v) for v in re.findall(r"-?\d+", args)]
+        if command == "M":
+            subpaths.append([tuple(values)])
+        elif command == "h":
+            for dx in values:
+                x, y = subpaths[-1][-1]
+                subpaths[-1].append((x + dx, y))
+        elif command == "v":
+            for dy in values:
+                x, y = subpaths[-1][-1]
+                subpaths[-1].append((x, y + dy))
+        elif command == "l":
+            for dx, dy in zip(values[::2], values[1::2]):
+                x, y = subpaths[-1][-1]
+                subpaths[-1].append((x + dx, y + dy))
+    return subpaths
+
+@unittest.skipIf(not MODULE_AVAILABLE, "Sketch vectorizer not available")
+class TestSketchVectorizer(unittest.TestCase):
+    
+    def setUp(self):
+        # Blocky random labels so regions touch each other and the image border
+        rng = np.random.default_rng(0)
+        coarse = rng.integers(0, 6, size=(12, 16)).astype(np.int32)
+        self.labels = np.kron(coarse, np.ones((7, 5), dtype=np.int32))
+        self.labels[0, :] = 2
+    
+    def test_bounding_boxes(self):
+        boxes = label_bounding_boxes(self.labels, 8)
+        for label in range(8):
+            ys, xs = np.nonzero(self.labels == label)
+            if len(ys) == 0:
+                self.assertTrue((boxes[label] == -1).all())
+            else:
+                self.assertEqual(list(boxes[label]), [ys.min(), ys.max() + 1, xs.min(), xs.max() + 1])
+    
+    def test_cropped_tracing_matches_full_image(self):
+        """Test that tracing inside the bounding box yields the same paths"""
+        boxes = label_bounding_boxes(self.labels, 6)
+        for label in range(6):
+            self.assertEqual(trace_label(self.labels, label, boxes[label]), full_image_paths(self.labels, label))
+
+    def test_parallel_tracing_keeps_layer_order(self):
+        boxes = label_bounding_boxes(self.labels, 8)
+        serial = list(trace_layers(self.labels, boxes, workers=1))
+        parallel = list(trace_layers(self.labels, boxes, workers=3, parallel_min_pixels=0))
+        self.assertEqual([i for i, _ in serial], [0, 1, 2, 3, 4, 5])
+        self.assertEqual(parallel, serial)
+    
+    def test_parallel_tracing_stops_when_cancelled(self):
+        boxes = label_bounding_boxes(self.labels, 6)
+        token = CancellationToken()
+        with use_token(token):
+            layers = trace_layers(self.labels, boxes, workers=2, parallel_min_pixels=0)
+            next(layers)
+            token.cancel()
+            with self.assertRaises(TaskCancelled):
+                next(layers)
+    
+    def test_compact_path_round_trip(self):
+        points = np.array([[5, 7], [9, 7], [9, 3], [12, 1], [14, 4], [2, 4], [2, 10]])
+        d = contour_to_path(points.reshape(-1, 1, 2))
+        self.assertEqual(d, "M5 7h4v-4l3-2 2 3h-12v6z")
+        self.assertEqual(decode_path(d), [[tuple(p) for p in points]])
+
+@unittest.skipIf(not MODULE_AVAILABLE, "Sketch vectorizer not available")
+class TestColorQuantization(unittest.TestCase):
+    
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.pixels = rng.uniform(0, 255, size=(5000, 3)).astype(np.float32)
+    
+    def test_assign_nearest_matches_brute_force(self):
+        centers = self.pixels[:16]
+        expected = ((self.pixels[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        labels = assign_nearest(self.pixels, centers, chunk=777)
+        self.assertTrue((labels == expected).all())
+    
+    def test_subsampled_quantization(self):
+        labels, centers = quantize_colors(self.pixels, 8, attempts=1, sample_size=500)
+        self.assertEqual(centers.shape, (8, 3))
+        self.assertEqual(labels.shape, (5000,))
+        self.assertTrue((labels == assign_nearest(self.pixels, centers)).all())
+    
+    def test_full_quantization(self):
+        labels, centers = quantize_colors(self.pixels, 8, attempts=1, sample_size=None)
+        self.assertEqual(labels.shape, (5000,))
+        self.assertTrue(0 <= labels.min() and labels.max() < 8)
+    
+    def test_presets_and_overrides(self):
+        self.assertEqual(resolve_quantization("fast"), SKETCH_QUALITY_PRESETS["fast"])
+        settings = resolve_quantization("fast", k=24, sample_size=0)
+        self.assertEqual(settings["k"], 24)
+        self.assertIsNone(settings["sample_size"])
+        with self.assertRaises(ValueError):
+            resolve_quantization("ultra")
+        with self.assertRaises(ValueError):
+            resolve_quantization(k=1)
+        with self.assertRaises(ValueError):
+            resolve_quantization(attempts=0)
+
+@unittest.skipIf(not MODULE_AVAILABLE, "Sketch vectorizer not available")
+class TestSvgWriter(unittest.TestCase):
+    
+    def setUp(self):
+        if get_gemini_client().is_ready:
+            self.skipTest("AI enhancement changes the SVG")
+        self.temp_dir = tempfile.mkdtemp()
+        self.sketch = SketchModule()
+        rng = np.random.default_rng(2)
+        self.image = np.kron(rng.integers(0, 255, size=(8, 8, 3)), np.ones((6, 6, 1))).astype(np.uint8)
+        self.options = dict(quality="fast", k=6)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_streamed_file_matches_string(self):
+        expected = self.sketch.image_to_svg(self.image, **self.options)
+        result = self.sketch.write_svg(self.image, f"{self.temp_dir}/out.svg", **self.options)
+        self.assertEqual(Path(result["path"]).read_text(), expected)
+        self.assertEqual(result["bytes"], len(expected))
+        self.assertEqual(result["preview"], expected)
+    
+    def test_svgz_output(self):
+        expected = self.sketch.image_to_svg(self.image, **self.options)
+        result = self.sketch.write_svg(self.image, f"{self.temp_dir}/out.svgz", compress=True, **self.options)
+        with gzip.open(result["path"], "rt") as f:
+            self.assertEqual(f.read(), expected)
+        self.assertLess(result["stored_bytes"], result["bytes"])
+    
+    def test_preview_is_well_formed(self):
+        """Test that a preview smaller than the document keeps whole layers and closes the SVG"""
+        result = self.sketch.write_svg(self.image, f"{self.temp_dir}/out.svg", preview_bytes=600, **self.options)
+        self.assertLess(len(result["preview"]), result["bytes"])
+        root = ET.fromstring(result["preview"])
+        self.assertTrue(root.tag.endswith("svg"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Unit tests for the background task queue
+"""
+import unittest
+import tempfile
+import threading
+import time
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.task_queue import TaskQueueService, TaskStatus, Task, estimate_size
+from services.task_journal import TaskJournal
+
+def wait_for(service, task_id, timeout=5.0):
+    """Poll until the task leaves the pending/in-progress states"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = service.get_task_status(task_id)
+        if status not in (TaskStatus.PENDING, TaskStatus.IN_PROGRESS):
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"Task {task_id} did not finish")
+
+class LockProbe(bytes):
+    """Result that records whether the queue lock was free while it was pickled"""
+    lock = None
+    free = []
+    
+    def __reduce__(self):
+        acquired = self.lock.acquire(timeout=1)
+        if acquired:
+            self.lock.release()
+        self.free.append(acquired)
+        return (bytes, (bytes(self),))
+
+class TestTaskQueueService(unittest.TestCase):
+    
+    def setUp(self):
+        self.service = TaskQueueService(max_workers=2)
+    
+    def tearDown(self):
+        self.service.stop_workers()
+    
+    def test_task_metadata_and_result(self):
+        """Test that reserved keywords are recorded and not passed to the function"""
+        self.service.add_task("t1", lambda a, b=0: a + b, 2, b=3, user_id="u1", task_type="add")
+        self.assertEqual(wait_for(self.service, "t1"), TaskStatus.COMPLETED)
+        task = self.service.get_task("t1")
+        self.assertEqual((task.user_id, task.task_type), ("u1", "add"))
+        self.assertIsNotNone(task.finished_at)
+        self.assertEqual(self.service.get_task_result("t1"), 5)
+    
+    def test_failed_task_records_error(self):
+        """Test that exceptions mark the task failed"""
+        self.service.add_task("t2", lambda: 1 / 0)
+        self.assertEqual(wait_for(self.service, "t2"), TaskStatus.FAILED)
+        self.assertIn("division", self.service.get_task("t2").error)
+        with self.assertRaises(Exception):
+            self.service.get_task_result("t2")
+    
+    def test_estimate_size(self):
+        """Test result size estimation for common result shapes"""
+        self.assertEqual(estimate_size(b"abc"), 3)
+        self.assertGreater(estimate_size({"text": "a" * 100}), 100)
+
+class TestResultRetention(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.service.stop_workers()
+        self.tmp.cleanup()
+    
+    def test_args_dropped_after_finish(self):
+        """Test that task inputs are released once the task completes"""
+        self.service = TaskQueueService(max_workers=1, spill_dir=self.tmp.name)
+        self.service.add_task("t1", len, b"x" * 1000)
+        wait_for(self.service, "t1")
+        self.assertEqual(self.service.get_task("t1").args, ())
+        self.assertEqual(self.service.get_task_result("t1"), 1000)
+    
+    def test_results_over_budget_spill_to_disk(self):
+        """Test that the oldest results spill to disk and still load back"""
+        self.service = TaskQueueService(max_workers=1, max_result_bytes=1500, spill_dir=self.tmp.name)
+        for i in range(3):
+            self.service.add_task(f"t{i}", lambda i=i: bytes([i]) * 1000)
+            wait_for(self.service, f"t{i}")
+        stats = self.service.stats()
+        self.assertLessEqual(stats["retained_bytes"], 1500)
+        self.assertEqual(stats["spilled_count"], 2)
+        self.assertIsNotNone(self.service.get_task("t0").result_path)
+        self.assertEqual(self.service.get_task_result("t0"), b"\x00" * 1000)
+        self.assertEqual(self.service.get_task_result("t2"), b"\x02" * 1000)
+    
+    def test_spill_pickles_outside_lock(self):
+        """Test that spilling does not hold the queue lock while pickling"""
+        self.service = TaskQueueService(max_workers=1, max_result_bytes=1500, spill_dir=self.tmp.name)
+        LockProbe.lock, LockProbe.free = self.service.lock, []
+        self.service.add_task("t1", lambda: LockProbe(b"x" * 2000))
+        wait_for(self.service, "t1")
+        deadline = time.time() + 5
+        while self.service.get_task("t1").result_path is None and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.service.get_task_result("t1"), b"x" * 2000)
+        self.assertTrue(LockProbe.free)
+        self.assertTrue(all(LockProbe.free))
+    
+    def test_expired_tasks_are_forgotten(self):
+        """Test that finished tasks past the TTL are dropped and listeners notified"""
+        self.service = TaskQueueService(max_workers=1, result_ttl=0.05, spill_dir=self.tmp.name)
+        expired = []
+        self.service.add_expiry_listener(lambda task: expired.append(task.task_id))
+        self.service.add_task("t1", lambda: "done")
+        wait_for(self.service, "t1")
+        deadline = time.time() + 5
+        while self.service.get_task("t1") is not None and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertIsNone(self.service.get_task("t1"))
+        self.assertEqual(expired, ["t1"])
+        self.assertEqual(self.service.stats()["retained_count"], 0)
+
+class TestDurableQueue(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal_path = Path(self.tmp.name) / "journal.sqlite3"
+        self.services = []
+    
+    def tearDown(self):
+        for service in self.services:
+            service.stop_workers()
+            service.journal.close()
+        self.tmp.cleanup()
+    
+    def start(self):
+        service = TaskQueueService(max_workers=1, spill_dir=self.tmp.name, journal=TaskJournal(self.journal_path))
+        self.services.append(service)
+        return service
+    
+    def test_pending_tasks_replay_after_restart(self):
+        """Test that a task journaled but never run is executed by the next service"""
+        journal = TaskJournal(self.journal_path)
+        task = Task("t1", sorted, [3, 1, 2])
+        task.user_id, task.task_type, task.priority = "u1", "sort", "batch"
+        self.assertTrue(journal.record_submit(task, cost=1.0))
+        journal.close()
+        
+        service = self.start()
+        self.assertEqual(service.stats()["replayed_count"], 1)
+        self.assertEqual(wait_for(service, "t1"), TaskStatus.COMPLETED)
+        self.assertEqual(service.get_task_result("t1"), [1, 2, 3])
+        self.assertEqual(service.get_task("t1").user_id, "u1")
+        self.assertEqual(service.journal.count("pending"), 0)
+    
+    def test_results_survive_restart(self):
+        """Test that finished tasks are restored with their result file"""
+        first = self.start()
+        first.add_task("t1", sorted, "cba", task_type="sort")
+        wait_for(first, "t1")
+        first.stop_workers()
+        first.journal.close()
+        
+        second = self.start()
+        self.assertEqual(second.get_task_status("t1"), TaskStatus.COMPLETED)
+        self.assertEqual(second.get_task_result("t1"), ["a", "b", "c"])
+        self.assertEqual(second.stats()["replayed_count"], 0)
+    
+    def test_unpicklable_result_still_completes(self):
+        """Test that a result the journal cannot store does not fail the task"""
+        first = self.start()
+        first.add_task("t1", threading.Lock)
+        self.assertEqual(wait_for(first, "t1"), TaskStatus.COMPLETED)
+        self.assertTrue(first.get_task("t1").journaled)
+        self.assertIsNotNone(first.get_task_result("t1"))
+        first.stop_workers()
+        first.journal.close()
+        
+        second = self.start()
+        self.assertEqual(second.get_task_status("t1"), TaskStatus.COMPLETED)
+        self.assertIsNone(second.get_task_result("t1"))
+    
+    def test_unpicklable_tasks_still_run(self):
+        service = self.start()
+        service.add_task("t1", lambda: "ok")
+        self.assertEqual(wait_for(service, "t1"), TaskStatus.COMPLETED)
+        self.assertFalse(service.get_task("t1").journaled)
+        self.assertEqual(service.journal.count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
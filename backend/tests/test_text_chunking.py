@@ -0,0 +1,81 @@
+"""
+Unit tests for long-document chunking
+"""
+import unittest
+import json
+import re
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules.text_chunking import split_text, stitch_chunks, parse_json_list, merge_unique
+
+try:
+    from modules.gemini_client import GeminiClient
+    from services.llm_cache import LLMCache, MemoryCacheBackend
+    CLIENT_AVAILABLE = True
+except ImportError:
+    CLIENT_AVAILABLE = False
+
+PAGES = "\f".join(f"Page {i} first paragraph.\n\nPage {i} second paragraph with more words.\n" for i in range(6))
+
+class TestTextChunking(unittest.TestCase):
+    
+    def test_split_round_trips_and_respects_size(self):
+        """Test that non-overlapping chunks rebuild the text and stay within size"""
+        chunks = split_text(PAGES, max_chars=120)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), PAGES)
+        self.assertTrue(all(len(c) <= 120 for c in chunks))
+    
+    def test_split_prefers_page_boundaries(self):
+        """Test that chunks end on page breaks when pages fit"""
+        page_len = PAGES.index("\f") + 1
+        chunks = split_text(PAGES, max_chars=page_len + 5)
+        self.assertTrue(all(c.endswith("\f") for c in chunks[:-1]))
+    
+    def test_hard_split_of_unbroken_text(self):
+        """Test that text without any boundary is still split"""
+        chunks = split_text("x" * 250, max_chars=100)
+        self.assertEqual([len(c) for c in chunks], [100, 100, 50])
+    
+    def test_overlap_repeats_previous_tail(self):
+        """Test that overlapping chunks start with the end of the previous chunk"""
+        chunks = split_text(PAGES, max_chars=120, overlap=30)
+        plain = split_text(PAGES, max_chars=120)
+        for previous, chunk, own in zip(plain, chunks[1:], plain[1:]):
+            self.assertTrue(chunk.endswith(own))
+            self.assertTrue(previous.endswith(chunk[:len(chunk) - len(own)]))
+    
+    def test_stitch_falls_back_per_chunk(self):
+        """Test stitching keeps boundaries and original text for failed chunks"""
+        originals = ["one\n\n", "two\n\n", "three"]
+        self.assertEqual(stitch_chunks(originals, ["ONE", "", "THREE\n"]), "ONE\n\ntwo\n\nTHREE")
+    
+    def test_parse_and_merge(self):
+        """Test JSON parsing with code fences and order-preserving dedupe"""
+        self.assertEqual(parse_json_list('```json\n["a", "b"]\n```'), ["a", "b"])
+        self.assertEqual(parse_json_list("not json"), [])
+        self.assertEqual(merge_unique([["a", "b"], ["b", "c"]]), ["a", "b", "c"])
+    
+    @unittest.skipIf(not CLIENT_AVAILABLE, "Gemini client dependencies not available")
+    def test_redaction_covers_whole_document(self):
+        """Test that identify_sensitive_data sees every chunk and merges results"""
+        prompts = []
+        
+        class FakeClient(GeminiClient):
+            async def agenerate(self, prompt):
+                prompts.append(prompt)
+                return json.dumps(re.findall(r"Name\d+", prompt))
+        
+        text = "\n\n".join(f"Name{i} lives here. Name0 too." for i in range(400))
+        client = FakeClient(api_key="test-key", cache=LLMCache(MemoryCacheBackend(100), ttl=60))
+        found = json.loads(client.identify_sensitive_data(text))
+        self.assertGreater(len(prompts), 1)
+        self.assertEqual(set(found), {f"Name{i}" for i in range(400)})
+        self.assertEqual(len(found), 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+"""
+Unit tests for recognition accuracy metrics
+"""
+import unittest
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules.text_metrics import character_error_rate
+
+class TestCharacterErrorRate(unittest.TestCase):
+    
+    def test_character_error_rate(self):
+        self.assertEqual(character_error_rate("total", "total"), 0.0)
+        self.assertEqual(character_error_rate("total", "tota1"), 0.2)
+        self.assertEqual(character_error_rate("", ""), 0.0)
+        self.assertEqual(character_error_rate("", "x"), 1.0)
+        self.assertEqual(character_error_rate("ab", "ba"), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Parity tests for the optimized TrOCR inference backends
+"""
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Add the project root to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from modules.text_metrics import character_error_rate
+
+try:
+    from modules.trocr_backends import (
+        load_trocr, generate_text, _load_onnx, token_budget, fast_decoding_kwargs, onnx_export_path, HAS_ONNXRUNTIME,
+    )
+    from core.config import TROCR_FAST_MAX_TOKENS, TROCR_MODEL_NAME
+    MODULE_AVAILABLE = True
+except ImportError:
+    MODULE_AVAILABLE = False
+
+SAMPLE_LINES = [
+    "The quick brown fox",
+    "Invoice total 1250",
+    "received with thanks",
+    "Meeting at 10 am",
+]
+
+def line_crop(text: str) -> Image.Image:
+    """A dark-on-white text line, roughly the size of an EasyOCR line box"""
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", 32)
+    except Exception:
+        font = ImageFont.load_default()
+    image = Image.new("RGB", (24 * len(text) + 40, 64), "white")
+    ImageDraw.Draw(image).text((20, 12), text, fill="black", font=font)
+    return image
+
+def weights_cached(model_name: str) -> bool:
+    """Whether the model loads without the network (a local directory or the Hugging Face cache)"""
+    if Path(model_name).is_dir():
+        return True
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return False
+    cached = lambda filename: isinstance(try_to_load_from_cache(model_name, filename), str)
+    return cached("config.json") and (cached("model.safetensors") or cached("pytorch_model.bin"))
+
+def mean_cer(references, hypotheses) -> float:
+    return sum(character_error_rate(r, h) for r, h in zip(references, hypotheses)) / len(references)
+
+@unittest.skipIf(not MODULE_AVAILABLE, "TrOCR dependencies not available")
+class TestTrOCRBackendParity(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.crops = [line_crop(text) for text in SAMPLE_LINES]
+        if not weights_cached(TROCR_MODEL_NAME):
+            # Downloading would stall offline runs for minutes of retries
+            raise unittest.SkipTest(f"{TROCR_MODEL_NAME} is not in the local Hugging Face cache")
+        try:
+            processor, model, device = load_trocr("torch")
+        except Exception as e:
+            raise unittest.SkipTest(f"TrOCR weights not available: {e}")
+        cls.reference = generate_text(processor, model, cls.crops, device)
+    
+    def check_backend(self, backend: str, max_cer: float):
+        processor, model, device = load_trocr(backend)
+        texts = generate_text(processor, model, self.crops, device)
+        self.assertEqual(len(texts), len(self.crops))
+        self.assertLessEqual(mean_cer(self.reference, texts), max_cer)
+    
+    def test_quantized_matches_fp32(self):
+        self.check_backend("quantized", 0.1)
+    
+    @unittest.skipIf(MODULE_AVAILABLE and not HAS_ONNXRUNTIME, "optimum[onnxruntime] not installed")
+    def test_onnx_matches_fp32(self):
+        self.check_backend("onnx", 0.02)
+    
+    def test_fast_preset_matches_default_decoding(self):
+        processor, model, device = load_trocr("torch")
+        texts = generate_text(processor, model, self.crops, device, **fast_decoding_kwargs(self.crops))
+        self.assertLessEqual(mean_cer(self.reference, texts), 0.1)
+
+@unittest.skipIf(not MODULE_AVAILABLE, "TrOCR dependencies not available")
+class TestFastDecoding(unittest.TestCase):
+    
+    def test_budget_grows_with_aspect_ratio(self):
+        word = token_budget(Image.new("RGB", (120, 40)))
+        line = token_budget(Image.new("RGB", (900, 40)))
+        self.assertLess(word, line)
+        self.assertLessEqual(token_budget(Image.new("RGB", (20000, 10))), TROCR_FAST_MAX_TOKENS)
+    
+    def test_batch_uses_largest_budget_and_greedy_search(self):
+        crops = [Image.new("RGB", (120, 40)), Image.new("RGB", (900, 40))]
+        kwargs = fast_decoding_kwargs(crops)
+        self.assertEqual(kwargs["max_new_tokens"], token_budget(crops[1]))
+        self.assertEqual(kwargs["num_beams"], 1)
+        self.assertFalse(kwargs["do_sample"])
+
+@unittest.skipIf(not MODULE_AVAILABLE, "TrOCR dependencies not available")
+class TestOnnxExport(unittest.TestCase):
+    
+    def test_one_directory_per_model(self):
+        root = Path("/cache")
+        base = onnx_export_path("microsoft/trocr-base-handwritten", root)
+        self.assertEqual(base, root / "microsoft--trocr-base-handwritten")
+        self.assertNotEqual(base, onnx_export_path("microsoft/trocr-small-printed", root))
+        self.assertEqual(onnx_export_path("/models/../my trocr", root).parent, root)
+    
+    def test_export_once_then_reuse(self):
+        """Test that the export lands in the model's directory in one piece and is reused"""
+        exports = []
+        
+        class FakeORTModel:
+            @classmethod
+            def from_pretrained(cls, source, export=False):
+                if export:
+                    exports.append(source)
+                return cls()
+            
+            def save_pretrained(self, path):
+                (Path(path) / "config.json").write_text("{}")
+        
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch("modules.trocr_backends.ORTModelForVision2Seq", FakeORTModel, create=True):
+            for model_name in ("org/model-a", "org/model-a", "org/model-b"):
+                _load_onnx(model_name, Path(tmp))
+            self.assertEqual(exports, ["org/model-a", "org/model-b"])
+            self.assertEqual(sorted(p.name for p in Path(tmp).iterdir()), ["org--model-a", "org--model-b"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,7 +13,7 @@ const api = axios.create({
 });
 
 export const ocrAPI = {
-    extractText: async (file: File, mode: 'standard' | 'high_accuracy') => {
+    extractText: async (file: File, mode: 'standard' | 'high_accuracy' | 'fast_handwriting') => {
         const formData = new FormData();
         formData.append('file', file);
         formData.append('mode', mode);